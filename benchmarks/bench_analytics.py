@@ -0,0 +1,69 @@
+"""
+Скорость аналитики weather.analytics на синтетической истории:
+сборка массивов из порций строк (как из БД) и сводка по городам.
+БД не нужна.
+
+Запуск:
+    python benchmarks/bench_analytics.py --rows 2000000 --cities 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from weather.analytics import History, history_from_chunks, summarize
+
+CHUNK_SIZE = 100000
+
+
+def make_history(rows: int, cities: int) -> History:
+    """Синтетическая история за год: показания городов, упорядоченные по времени."""
+    rng = np.random.default_rng(0)
+    seconds = np.sort(rng.integers(0, 365 * 86400, rows))
+    return History(
+        [f"city-{c}" for c in range(cities)],
+        rng.integers(0, cities, rows).astype(np.int32),
+        np.datetime64("2023-01-01") + seconds.astype("timedelta64[s]"),
+        rng.normal(10, 8, rows),
+        rng.gamma(2, 5, rows),
+        rng.uniform(0, 360, rows),
+    )
+
+
+def make_chunks(history: History, rows: int):
+    """Порции кортежей в том виде, как их выдает iter_history_columns."""
+    times = history.times.astype(np.int64).tolist()
+    names = [history.cities[c] for c in history.codes.tolist()]
+    columns = list(zip(names, times, history.temperature.tolist(),
+                       history.wind_speed.tolist(), history.wind_direction.tolist()))
+    return [columns[i:i + CHUNK_SIZE] for i in range(0, rows, CHUNK_SIZE)]
+
+
+def run(rows: int, cities: int) -> None:
+    history = make_history(rows, cities)
+    chunks = make_chunks(history, rows)
+
+    started = time.perf_counter()
+    loaded = history_from_chunks(chunks)
+    load = time.perf_counter() - started
+
+    started = time.perf_counter()
+    summary = summarize(loaded)
+    compute = time.perf_counter() - started
+
+    print(f"показаний: {rows}, городов: {len(summary)}")
+    print(f"сборка массивов: {load:.3f} с, {rows / load:,.0f} строк/с")
+    print(f"сводка:          {compute:.3f} с, {rows / compute:,.0f} строк/с")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк аналитики истории погоды")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Количество показаний")
+    parser.add_argument("--cities", type=int, default=10, help="Количество городов")
+    args = parser.parse_args()
+    run(args.rows, args.cities)
@@ -0,0 +1,165 @@
+"""
+Бенчмарк запроса истории (get_recent_weather) на синтетических данных:
+до — одиночные индексы и JOIN + ORDER BY по всей истории города,
+после — покрывающий индекс (location_id, weather_time DESC) и top-N через LATERAL.
+
+Данные создаются в отдельной схеме и удаляются после запуска,
+рабочие таблицы не затрагиваются. Нужна доступная БД из настроек DB_*.
+
+Запуск:
+    python benchmarks/bench_history.py --rows 2000000 --cities 1000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import psycopg2
+
+from weather.config import get_connection_string
+from weather.database import RECENT_WEATHER_SQL
+
+SCHEMA = "bench_history"
+
+# Запрос истории до изменения
+LEGACY_RECENT_WEATHER_SQL = """
+SELECT 
+    wr.temperature,
+    wr.wind_speed,
+    wr.wind_direction,
+    wr.weather_time,
+    wr.recorded_at,
+    l.city_name,
+    l.latitude,
+    l.longitude
+FROM weather_records wr
+JOIN locations l ON wr.location_id = l.id
+WHERE l.city_name = %s
+ORDER BY wr.weather_time DESC
+LIMIT %s
+"""
+
+# Параметры подставляются psycopg2, поэтому литеральные % удвоены
+SETUP_SQL = """
+DROP SCHEMA IF EXISTS {schema} CASCADE;
+CREATE SCHEMA {schema};
+SET search_path TO {schema};
+
+CREATE TABLE locations (
+    id SERIAL PRIMARY KEY,
+    city_name VARCHAR(100) NOT NULL,
+    latitude DECIMAL(9,6) NOT NULL,
+    longitude DECIMAL(9,6) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (city_name, latitude, longitude)
+);
+
+CREATE TABLE weather_records (
+    id SERIAL,
+    location_id INTEGER REFERENCES locations(id),
+    temperature DECIMAL(5,2) NOT NULL,
+    wind_speed DECIMAL(5,2) NOT NULL,
+    wind_direction INTEGER,
+    weather_time TIMESTAMP NOT NULL,
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, weather_time)
+) PARTITION BY RANGE (weather_time);
+
+DO $$
+DECLARE
+    month_start TIMESTAMP;
+BEGIN
+    FOR month_start IN SELECT generate_series(TIMESTAMP '2023-01-01', TIMESTAMP '2023-12-01', INTERVAL '1 month') LOOP
+        EXECUTE format(
+            'CREATE TABLE %%I PARTITION OF weather_records FOR VALUES FROM (%%L) TO (%%L)',
+            'weather_records_' || to_char(month_start, 'YYYY_MM'), month_start, month_start + INTERVAL '1 month'
+        );
+    END LOOP;
+END;
+$$;
+
+INSERT INTO locations (city_name, latitude, longitude)
+SELECT 'city-' || g, 40 + g * 0.001, 30 + g * 0.001
+FROM generate_series(1, %(cities)s) g;
+
+INSERT INTO weather_records (location_id, temperature, wind_speed, wind_direction, weather_time)
+SELECT 1 + (g %% %(cities)s),
+       round((random() * 50 - 15)::numeric, 2),
+       round((random() * 25)::numeric, 2),
+       (random() * 359)::int,
+       TIMESTAMP '2023-01-01' + ((g / %(cities)s) %% (365 * 96)) * INTERVAL '15 minutes'
+FROM generate_series(1, %(rows)s) g;
+
+-- Индексы до изменения
+CREATE INDEX idx_weather_records_time ON weather_records(weather_time);
+CREATE INDEX idx_weather_records_location ON weather_records(location_id);
+"""
+
+AFTER_SQL = """
+SET search_path TO {schema};
+CREATE INDEX idx_weather_records_location_time
+    ON weather_records (location_id, weather_time DESC)
+    INCLUDE (temperature, wind_speed, wind_direction, recorded_at);
+DROP INDEX idx_weather_records_location;
+"""
+
+
+def measure(cursor, sql: str, params, repeat: int):
+    """Возвращает план выполнения и медиану времени запроса в миллисекундах."""
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+    plan = "\n".join(row[0] for row in cursor.fetchall())
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return plan, statistics.median(timings)
+
+
+def run(rows: int, cities: int, limit: int, repeat: int, keep: bool) -> None:
+    conn = psycopg2.connect(get_connection_string())
+    conn.autocommit = True  # VACUUM нельзя выполнять в транзакции
+    cursor = conn.cursor()
+
+    try:
+        print(f"Заполнение: {rows} записей, {cities} городов...")
+        started = time.perf_counter()
+        cursor.execute(SETUP_SQL.format(schema=SCHEMA), {"rows": rows, "cities": cities})
+        cursor.execute("VACUUM ANALYZE locations, weather_records")
+        print(f"готово за {time.perf_counter() - started:.1f} с")
+
+        params = ("city-42", limit)
+        before_plan, before_ms = measure(cursor, LEGACY_RECENT_WEATHER_SQL, params, repeat)
+
+        cursor.execute(AFTER_SQL.format(schema=SCHEMA))
+        cursor.execute("VACUUM ANALYZE weather_records")
+        after_plan, after_ms = measure(cursor, RECENT_WEATHER_SQL, (limit, "city-42", limit), repeat)
+
+        print("\n=== До: одиночные индексы, JOIN + ORDER BY ===")
+        print(before_plan)
+        print("\n=== После: покрывающий индекс, LATERAL top-N ===")
+        print(after_plan)
+        print(f"\nмедиана до:    {before_ms:.2f} мс")
+        print(f"медиана после: {after_ms:.2f} мс")
+        print(f"ускорение:     x{before_ms / after_ms:.1f}")
+    finally:
+        if not keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк запроса истории погоды")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Количество записей")
+    parser.add_argument("--cities", type=int, default=1000, help="Количество городов")
+    parser.add_argument("--limit", type=int, default=5, help="Записей в истории (LIMIT)")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого запроса")
+    parser.add_argument("--keep", action="store_true", help="Не удалять схему с данными после запуска")
+    args = parser.parse_args()
+    run(args.rows, args.cities, args.limit, args.repeat, args.keep)
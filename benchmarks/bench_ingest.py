@@ -0,0 +1,86 @@
+"""
+Сравнение скорости записи в PostgreSQL: построчно (save_weather_data)
+и пакетно (save_weather_batch). Нужна доступная БД из настроек DB_*.
+
+Запуск:
+    python benchmarks/bench_ingest.py --rows 5000 --cities 50
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from weather.database import WeatherDatabase
+
+CITY_PREFIX = "bench-ingest-"
+START = datetime(2023, 10, 1)
+
+
+def make_payloads(rows: int, cities: int):
+    """Синтетические ответы API: rows записей для cities городов."""
+    payloads = []
+    for i in range(rows):
+        c = i % cities
+        payloads.append({
+            "city": f"{CITY_PREFIX}{c}",
+            "latitude": round(40 + c * 0.01, 4),
+            "longitude": round(30 + c * 0.01, 4),
+            "current_weather": {
+                "temperature": round(-10 + (i % 400) / 10, 1),
+                "windspeed": (i % 50) / 2,
+                "winddirection": i % 360,
+                # Уникальное время для каждого города: шаг 15 минут, как у Open-Meteo
+                "time": (START + timedelta(minutes=15 * (i // cities))).isoformat(timespec="minutes"),
+            },
+        })
+    return payloads
+
+
+def cleanup(db: WeatherDatabase) -> None:
+    """Удаляет данные, созданные бенчмарком."""
+    with db.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM weather_records WHERE location_id IN "
+                "(SELECT id FROM locations WHERE city_name LIKE %s)", (CITY_PREFIX + "%",)
+            )
+            cursor.execute("DELETE FROM locations WHERE city_name LIKE %s", (CITY_PREFIX + "%",))
+
+
+def run(rows: int, cities: int) -> None:
+    logging.disable(logging.INFO)
+    db = WeatherDatabase()
+    db.init_db()
+    payloads = make_payloads(rows, cities)
+
+    cleanup(db)
+    started = time.perf_counter()
+    for payload in payloads:
+        db.save_weather_data(payload)
+    per_row = time.perf_counter() - started
+
+    cleanup(db)
+    started = time.perf_counter()
+    saved = db.save_weather_batch(payloads)
+    batch = time.perf_counter() - started
+
+    cleanup(db)
+    db.close()
+
+    print(f"записей: {rows}, городов: {cities}, сохранено пакетно: {saved}")
+    print(f"построчно: {per_row:.3f} с, {rows / per_row:,.0f} строк/с")
+    print(f"пакетно:   {batch:.3f} с, {rows / batch:,.0f} строк/с")
+    print(f"ускорение: x{per_row / batch:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк записи погоды в PostgreSQL")
+    parser.add_argument("--rows", type=int, default=5000, help="Количество записей")
+    parser.add_argument("--cities", type=int, default=50, help="Количество городов")
+    args = parser.parse_args()
+    run(args.rows, args.cities)
@@ -0,0 +1,122 @@
+"""
+Тесты для модуля аналитики истории погоды.
+"""
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime, timedelta
+
+from weather import analytics
+from weather.analytics import (
+    history_from_chunks, percentiles, daily_means, rolling_mean,
+    degree_days, circular_mean, summarize,
+)
+
+np = analytics.np
+START = datetime(2023, 1, 1)
+
+
+def make_rows(city, temps_by_day, wind_direction=180.0, wind_speed=5.0):
+    """Строки истории: по четыре показания в день с заданными температурами."""
+    rows = []
+    for day, temps in enumerate(temps_by_day):
+        for hour, temp in zip((0, 6, 12, 18), temps):
+            rows.append((city, START + timedelta(days=day, hours=hour), temp, wind_speed, wind_direction))
+    return rows
+
+
+@unittest.skipIf(np is None, "numpy не установлен")
+class TestAnalytics(unittest.TestCase):
+    """Тесты векторных вычислений."""
+    
+    def test_history_from_chunks(self):
+        """Тест: порции строк складываются в плоские массивы с кодами городов."""
+        history = history_from_chunks([
+            [("Moscow", START, 1.0, 2.0, 90.0), ("Paris", START, 10.0, 3.0, None)],
+            [],
+            [("Moscow", START + timedelta(hours=1), 2.0, 2.0, 90.0)],
+        ])
+        
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.cities, ["Moscow", "Paris"])
+        self.assertEqual(history.codes.tolist(), [0, 1, 0])
+        self.assertTrue(np.isnan(history.wind_direction[1]))
+        self.assertEqual([(city, part.tolist()) for city, part in history.groups()],
+                         [("Moscow", [0, 2]), ("Paris", [1])])
+    
+    def test_history_from_epoch_seconds(self):
+        """Тест: время из БД приходит секундами эпохи."""
+        history = history_from_chunks([[("Moscow", 1672531200, 1.0, 2.0, 90.0)]])
+        
+        self.assertEqual(str(history.times[0]), "2023-01-01T00:00:00")
+    
+    def test_empty_history(self):
+        """Тест: пустая история не ломает сводку."""
+        self.assertEqual(summarize(history_from_chunks([])), {})
+    
+    def test_percentiles_ignore_nan(self):
+        """Тест перцентилей без учета пропусков."""
+        values = np.array([1.0, 2.0, 3.0, 4.0, np.nan])
+        
+        self.assertEqual(percentiles(values, (0, 50, 100)), {0: 1.0, 50: 2.5, 100: 4.0})
+        self.assertEqual(percentiles(np.array([np.nan]), (50,)), {50: None})
+    
+    def test_daily_means(self):
+        """Тест: средние по календарным дням, в том числе для неупорядоченных записей."""
+        times = np.array(["2023-01-02T01:00", "2023-01-01T05:00", "2023-01-01T07:00"], dtype="datetime64[s]")
+        
+        days, means = daily_means(times, np.array([4.0, 1.0, 3.0]))
+        
+        self.assertEqual([str(d) for d in days], ["2023-01-01", "2023-01-02"])
+        self.assertEqual(means.tolist(), [2.0, 4.0])
+    
+    def test_rolling_mean(self):
+        """Тест скользящего среднего с пропусками."""
+        result = rolling_mean(np.array([1.0, 2.0, np.nan, 4.0]), window=2)
+        
+        self.assertTrue(np.isnan(result[0]))
+        self.assertEqual(result[1:].tolist(), [1.5, 2.0, 4.0])
+        self.assertTrue(np.isnan(rolling_mean(np.array([1.0]), window=3)).all())
+    
+    def test_degree_days(self):
+        """Тест градусо-дней отопления и охлаждения по средним дневным температурам."""
+        history = history_from_chunks([make_rows("Moscow", [[8, 8, 8, 8], [20, 22, 24, 26]])])
+        
+        result = degree_days(history.times, history.temperature, base=18)
+        
+        self.assertEqual(result, {"heating": 10.0, "cooling": 5.0})
+    
+    def test_circular_mean(self):
+        """Тест: среднее направлений через 0° — север, а не юг."""
+        direction, steadiness = circular_mean([350, 10])
+        self.assertAlmostEqual(direction, 0.0)
+        self.assertGreater(steadiness, 0.98)
+        
+        # Противоположные ветра гасят друг друга; вес — скорость ветра
+        direction, steadiness = circular_mean([90, 270], weights=[3, 1])
+        self.assertAlmostEqual(direction, 90.0)
+        self.assertAlmostEqual(steadiness, 0.5)
+        
+        self.assertEqual(circular_mean([np.nan]), (None, 0.0))
+    
+    def test_summarize_compares_cities(self):
+        """Тест: сводка считается для каждого города отдельно."""
+        history = history_from_chunks([
+            make_rows("Moscow", [[0, 2, 4, 6]] * 3, wind_direction=350.0)
+            + make_rows("Paris", [[10, 12, 14, 16]] * 3, wind_direction=10.0)
+        ])
+        
+        summary = summarize(history, qs=(50,), base=18, window=2)
+        
+        self.assertEqual(set(summary), {"Moscow", "Paris"})
+        self.assertEqual(summary["Moscow"]["count"], 12)
+        self.assertEqual(summary["Moscow"]["days"], 3)
+        self.assertEqual(summary["Moscow"]["temp_mean"], 3.0)
+        self.assertEqual(summary["Paris"]["percentiles"], {50: 13.0})
+        self.assertEqual(summary["Paris"]["rolling_mean"], 13.0)
+        self.assertEqual(summary["Moscow"]["heating_degree_days"], 45.0)
+        self.assertEqual(summary["Paris"]["wind_direction_mean"], 10.0)
+        self.assertEqual(summary["Paris"]["wind_steadiness"], 1.0)
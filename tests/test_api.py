@@ -8,13 +8,24 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from weather.api import get_coordinates, get_location_info, get_weather
+from weather.api import (
+    get_coordinates, get_location_info, get_weather, get_forecast, get_weather_for_locations,
+    InvalidLocationError,
+)
 
 
 class TestAPI(unittest.TestCase):
     """Тесты для модуля работы с API."""
     
-    @patch('weather.api.requests.get')
+    def setUp(self):
+        # Изолируем тесты от кэша геокодирования на диске
+        self.read_geo_cache = patch('weather.api.read_geo_cache', return_value=None).start()
+        self.write_geo_cache = patch('weather.api.write_geo_cache').start()
+        self.read_negative_cache = patch('weather.api.read_negative_cache', return_value=None).start()
+        self.write_negative_cache = patch('weather.api.write_negative_cache').start()
+        self.addCleanup(patch.stopall)
+    
+    @patch('weather.api.http_get')
     def test_get_coordinates_success(self, mock_get):
         """Тест успешного получения координат."""
         mock_response = MagicMock()
@@ -28,7 +39,7 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(lat, 55.75)
         self.assertEqual(lon, 37.61)
     
-    @patch('weather.api.requests.get')
+    @patch('weather.api.http_get')
     def test_get_coordinates_city_not_found(self, mock_get):
         """Тест получения координат для несуществующего города."""
         mock_response = MagicMock()
@@ -39,7 +50,7 @@ class TestAPI(unittest.TestCase):
         with self.assertRaises(ValueError):
             get_coordinates("NonexistentCity")
     
-    @patch('weather.api.requests.get')
+    @patch('weather.api.http_get')
     def test_get_coordinates_request_exception(self, mock_get):
         """Тест исключения при запросе координат."""
         mock_get.side_effect = Exception("Network error")
@@ -47,7 +58,7 @@ class TestAPI(unittest.TestCase):
         with self.assertRaises(Exception):
             get_coordinates("Moscow")
     
-    @patch('weather.api.requests.get')
+    @patch('weather.api.http_get')
     def test_get_location_info_by_city(self, mock_get):
         """Тест получения информации о местоположении по городу."""
         mock_response = MagicMock()
@@ -68,7 +79,7 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(result["lat"], 55.75)
         self.assertEqual(result["lon"], 37.61)
     
-    @patch('weather.api.requests.get')
+    @patch('weather.api.http_get')
     def test_get_location_info_by_coordinates(self, mock_get):
         """Тест получения информации о местоположении по координатам."""
         mock_response = MagicMock()
@@ -91,7 +102,7 @@ class TestAPI(unittest.TestCase):
         self.assertIsNone(result)
     
     @patch('weather.api.get_location_info')
-    @patch('weather.api.requests.get')
+    @patch('weather.api.http_get')
     def test_get_weather_success(self, mock_get, mock_location):
         """Тест успешного получения погоды."""
         mock_location.return_value = {
@@ -118,6 +129,71 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(result["city"], "Moscow")
         self.assertIn("current_weather", result)
     
+    @patch('weather.api.get_location_info')
+    @patch('weather.api.http_get')
+    def test_get_forecast_one_request(self, mock_get, mock_location):
+        """Тест: почасовой и дневной прогноз запрашиваются одним запросом."""
+        mock_location.return_value = {"city": "Moscow", "lat": 55.75, "lon": 37.61}
+        mock_get.return_value.json.return_value = {"hourly": {"time": []}}
+        
+        result = get_forecast(city="Moscow", days=3)
+        
+        self.assertEqual(result["city"], "Moscow")
+        mock_get.assert_called_once()
+        params = mock_get.call_args[1]["params"]
+        self.assertEqual(params["forecast_days"], 3)
+        self.assertIn("temperature_2m", params["hourly"].split(","))
+        self.assertIn("precipitation_sum", params["daily"].split(","))
+        self.assertNotIn("current_weather", params)
+    
+    @patch('weather.api.http_get')
+    def test_get_weather_for_locations_one_request(self, mock_get):
+        """Тест: несколько координат запрашиваются одним запросом и разбираются по местоположениям."""
+        mock_get.return_value.json.return_value = [
+            {"latitude": 55.75, "current_weather": {"temperature": 1}},
+            {"latitude": 48.85, "current_weather": {"temperature": 2}},
+        ]
+        locations = [{"city": "Moscow", "lat": 55.75, "lon": 37.61}, {"city": "Paris", "lat": 48.85, "lon": 2.35}]
+        
+        results = get_weather_for_locations(locations)
+        
+        mock_get.assert_called_once()
+        params = mock_get.call_args[1]["params"]
+        self.assertEqual(params["latitude"], "55.75,48.85")
+        self.assertEqual(params["longitude"], "37.61,2.35")
+        self.assertEqual([r["city"] for r in results], ["Moscow", "Paris"])
+        self.assertEqual(results[1]["current_weather"]["temperature"], 2)
+    
+    @patch('weather.api.http_get')
+    def test_get_weather_for_locations_single_and_mismatch(self, mock_get):
+        """Тест: ответ-объект для одной точки и ошибка при несовпадении числа ответов."""
+        mock_get.return_value.json.return_value = {"current_weather": {"temperature": 1}}
+        
+        results = get_weather_for_locations([{"city": "Moscow", "lat": 55.75, "lon": 37.61}])
+        self.assertEqual(results[0]["city"], "Moscow")
+        
+        with self.assertRaises(ConnectionError):
+            get_weather_for_locations([
+                {"city": "Moscow", "lat": 55.75, "lon": 37.61},
+                {"city": "Paris", "lat": 48.85, "lon": 2.35},
+            ])
+    
+    @patch('weather.api.http_get')
+    def test_get_weather_for_locations_bad_request(self, mock_get):
+        """Тест: отказ API из-за координат (400) отличается от сбоя сети или сервера."""
+        locations = [{"city": "X", "lat": 95.0, "lon": 10.0}]
+        mock_get.return_value.status_code = 400
+        mock_get.return_value.json.return_value = {"error": True, "reason": "Latitude must be in range of -90 to 90°"}
+        
+        with self.assertRaisesRegex(InvalidLocationError, "Latitude"):
+            get_weather_for_locations(locations)
+        
+        mock_get.return_value.status_code = 503
+        mock_get.return_value.raise_for_status.side_effect = Exception("503 Service Unavailable")
+        with self.assertRaises(ConnectionError) as ctx:
+            get_weather_for_locations(locations)
+        self.assertNotIsInstance(ctx.exception, InvalidLocationError)
+    
     @patch('weather.api.get_location_info')
     def test_get_weather_location_failed(self, mock_location):
         """Тест получения погоды при ошибке определения местоположения."""
@@ -127,7 +203,7 @@ class TestAPI(unittest.TestCase):
             get_weather(city="NonexistentCity")
     
     @patch('weather.api.get_location_info')
-    @patch('weather.api.requests.get')
+    @patch('weather.api.http_get')
     def test_get_weather_connection_error(self, mock_get, mock_location):
         """Тест получения погоды при ошибке соединения."""
         mock_location.return_value = {
@@ -138,4 +214,93 @@ class TestAPI(unittest.TestCase):
         mock_get.side_effect = Exception("API unavailable")
         
         with self.assertRaises(ConnectionError):
-            get_weather(city="Moscow")
\ No newline at end of file
+            get_weather(city="Moscow")
+    
+    @patch('weather.api.http_get')
+    def test_get_location_info_uses_geo_cache(self, mock_get):
+        """Тест получения местоположения из кэша геокодирования без запроса к API."""
+        self.read_geo_cache.return_value = {"city": "Moscow", "lat": 55.75, "lon": 37.61}
+        
+        result = get_location_info(city="Moscow")
+        
+        self.assertEqual(result, {"city": "Moscow", "lat": 55.75, "lon": 37.61})
+        self.read_geo_cache.assert_called_once_with("city:moscow")
+        mock_get.assert_not_called()
+    
+    @patch('weather.api.http_get')
+    def test_get_location_info_reverse_geo_cache(self, mock_get):
+        """Тест обратного геокодирования из кэша по округленным координатам."""
+        self.read_geo_cache.return_value = {"city": "Moscow"}
+        
+        result = get_location_info(lat=55.755831, lon=37.617311)
+        
+        self.assertEqual(result, {"city": "Moscow", "lat": 55.755831, "lon": 37.617311})
+        self.read_geo_cache.assert_called_once_with("coords:55.7558,37.6173")
+        mock_get.assert_not_called()
+    
+    @patch('weather.api.http_get')
+    def test_get_location_info_saves_to_geo_cache(self, mock_get):
+        """Тест сохранения результата геокодирования в кэш."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "results": [{"name": "Moscow", "latitude": 55.75, "longitude": 37.61}]
+        }
+        mock_get.return_value = mock_response
+        
+        get_location_info(city="Moscow")
+        
+        self.write_geo_cache.assert_called_once_with(
+            "city:moscow", {"city": "Moscow", "lat": 55.75, "lon": 37.61}
+        )
+
+    @patch('weather.api.http_get')
+    def test_get_location_info_cache_write_error(self, mock_get):
+        """Тест: ошибка записи в кэш геокодирования не делает поиск неудачным."""
+        self.write_geo_cache.side_effect = OSError("database is locked")
+        mock_get.return_value.json.return_value = {
+            "results": [{"name": "Moscow", "latitude": 55.75, "longitude": 37.61}]
+        }
+        mock_get.return_value.raise_for_status.return_value = None
+        
+        with self.assertLogs('weather.api', level='WARNING'):
+            loc = get_location_info(city="Moscow")
+        
+        self.assertEqual(loc, {"city": "Moscow", "lat": 55.75, "lon": 37.61})
+        self.write_negative_cache.assert_not_called()
+
+    @patch('weather.api.http_get')
+    def test_get_location_info_negative_cache_hit(self, mock_get):
+        """Тест: недавняя неудача геокодирования не повторяет запрос к API."""
+        self.read_negative_cache.return_value = {"reason": "not_found", "message": "Город 'Xyz' не найден."}
+        
+        self.assertIsNone(get_location_info(city="Xyz"))
+        self.read_negative_cache.assert_called_once_with("city:xyz")
+        mock_get.assert_not_called()
+    
+    @patch('weather.api.http_get')
+    def test_get_location_info_remembers_not_found(self, mock_get):
+        """Тест сохранения «город не найден» в кэш неудач."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"results": []}
+        mock_get.return_value = mock_response
+        
+        self.assertIsNone(get_location_info(city="Xyz"))
+        self.write_negative_cache.assert_called_once_with("city:xyz", "not_found", "Город 'Xyz' не найден.")
+    
+    @patch('weather.api.http_get')
+    def test_get_location_info_remembers_error(self, mock_get):
+        """Тест сохранения сетевой ошибки в кэш неудач."""
+        mock_get.side_effect = Exception("Network error")
+        
+        self.assertIsNone(get_location_info(lat=55.75, lon=37.61))
+        key, reason, _ = self.write_negative_cache.call_args[0]
+        self.assertEqual((key, reason), ("coords:55.75,37.61", "error"))
+    
+    @patch('weather.api.http_get')
+    def test_get_coordinates_negative_cache_hit(self, mock_get):
+        """Тест: get_coordinates сразу сообщает о ненайденном городе из кэша."""
+        self.read_negative_cache.return_value = {"reason": "not_found", "message": "Город 'Xyz' не найден."}
+        
+        with self.assertRaises(ValueError):
+            get_coordinates("Xyz")
+        mock_get.assert_not_called()
@@ -0,0 +1,189 @@
+"""
+Тесты для асинхронного модуля работы с API.
+"""
+
+import unittest
+from unittest.mock import patch
+import asyncio
+import threading
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from weather.async_api import AsyncWeatherClient
+from weather.api import GEOCODING_URL, REVERSE_GEOCODING_URL, FORECAST_URL
+
+
+class FakeResponse:
+    """Ответ-заглушка, совместимый с aiohttp.ClientResponse."""
+    
+    def __init__(self, payload, delay=0.0):
+        self.payload = payload
+        self.delay = delay
+    
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        if isinstance(self.payload, Exception):
+            raise self.payload
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+    
+    def raise_for_status(self):
+        return None
+    
+    async def json(self, content_type=None):
+        return self.payload
+
+
+class FakeSession:
+    """Сессия-заглушка: отвечает по URL и считает одновременные запросы."""
+    
+    def __init__(self, routes, delay=0.0):
+        self.routes = routes
+        self.delay = delay
+        self.calls = []
+    
+    def get(self, url, params=None, headers=None):
+        self.calls.append((url, params))
+        payload = self.routes[url]
+        if callable(payload):
+            payload = payload(params)
+        return FakeResponse(payload, self.delay)
+
+
+FORECAST = {
+    "latitude": 55.75,
+    "longitude": 37.61,
+    "current_weather": {"temperature": 20, "windspeed": 10, "winddirection": 180, "time": "2023-10-01T12:00"}
+}
+
+
+class TestAsyncAPI(unittest.IsolatedAsyncioTestCase):
+    """Тесты для асинхронного модуля работы с API."""
+    
+    def setUp(self):
+        # Изолируем тесты от кэша геокодирования на диске
+        patch('weather.api.read_geo_cache', return_value=None).start()
+        patch('weather.api.write_geo_cache').start()
+        self.read_negative_cache = patch('weather.api.read_negative_cache', return_value=None).start()
+        self.write_negative_cache = patch('weather.api.write_negative_cache').start()
+        self.addCleanup(patch.stopall)
+    
+    async def test_get_weather_by_city(self):
+        """Тест получения погоды по городу."""
+        session = FakeSession({
+            GEOCODING_URL: {"results": [{"name": "Moscow", "latitude": 55.75, "longitude": 37.61}]},
+            FORECAST_URL: dict(FORECAST),
+        })
+        async with AsyncWeatherClient(session=session) as client:
+            data = await client.get_weather(city="Moscow")
+        
+        self.assertEqual(data["city"], "Moscow")
+        self.assertEqual([url for url, _ in session.calls], [GEOCODING_URL, FORECAST_URL])
+    
+    async def test_get_location_info_by_coordinates(self):
+        """Тест обратного геокодирования."""
+        session = FakeSession({REVERSE_GEOCODING_URL: {"address": {"town": "Khimki"}}})
+        async with AsyncWeatherClient(session=session) as client:
+            loc = await client.get_location_info(lat=55.89, lon=37.44)
+        
+        self.assertEqual(loc, {"city": "Khimki", "lat": 55.89, "lon": 37.44})
+    
+    async def test_get_coordinates_city_not_found(self):
+        """Тест получения координат для несуществующего города."""
+        session = FakeSession({GEOCODING_URL: {"results": []}})
+        async with AsyncWeatherClient(session=session) as client:
+            with self.assertRaises(ValueError):
+                await client.get_coordinates("NonexistentCity")
+        
+        self.write_negative_cache.assert_called_once_with(
+            "city:nonexistentcity", "not_found", "Город 'NonexistentCity' не найден."
+        )
+    
+    async def test_geo_cache_runs_off_event_loop(self):
+        """Тест: кэш геокодирования (SQLite) читается и пишется не в потоке цикла событий."""
+        threads = []
+        patch('weather.api.read_geo_cache', side_effect=lambda key: threads.append(threading.get_ident())).start()
+        patch('weather.api.write_geo_cache', side_effect=lambda *a: threads.append(threading.get_ident())).start()
+        session = FakeSession({
+            GEOCODING_URL: {"results": [{"name": "Moscow", "latitude": 55.75, "longitude": 37.61}]},
+        })
+        async with AsyncWeatherClient(session=session) as client:
+            await client.get_location_info(city="Moscow")
+        
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+    
+    async def test_negative_cache_skips_request(self):
+        """Тест: недавняя неудача геокодирования не повторяет запрос."""
+        self.read_negative_cache.return_value = {"reason": "not_found", "message": "Город 'Xyz' не найден."}
+        session = FakeSession({})
+        async with AsyncWeatherClient(session=session) as client:
+            self.assertIsNone(await client.get_location_info(city="Xyz"))
+        
+        self.assertEqual(session.calls, [])
+    
+    async def test_get_weather_many_respects_concurrency(self):
+        """Тест ограничения числа одновременных запросов."""
+        in_flight = 0
+        peak = 0
+        
+        class CountingSession(FakeSession):
+            def get(inner, url, params=None, headers=None):
+                response = FakeSession.get(inner, url, params, headers)
+                original_enter = response.__aenter__
+                
+                async def counting_enter():
+                    nonlocal in_flight, peak
+                    in_flight += 1
+                    peak = max(peak, in_flight)
+                    try:
+                        return await original_enter()
+                    finally:
+                        in_flight -= 1
+                
+                response.__aenter__ = counting_enter
+                return response
+        
+        session = CountingSession({
+            GEOCODING_URL: lambda params: {"results": [{"name": params["name"], "latitude": 1.0, "longitude": 2.0}]},
+            FORECAST_URL: lambda params: dict(FORECAST),
+        }, delay=0.01)
+        
+        items = [{"city": f"City{i}", "lat": None, "lon": None} for i in range(20)]
+        async with AsyncWeatherClient(concurrency=3, session=session) as client:
+            results = await client.get_weather_many(items)
+        
+        self.assertEqual([r["city"] for r in results], [f"City{i}" for i in range(20)])
+        self.assertLessEqual(peak, 3)
+    
+    async def test_get_weather_many_collects_errors(self):
+        """Тест возврата ошибок по каждому элементу."""
+        session = FakeSession({
+            GEOCODING_URL: lambda params: {"results": []} if params["name"] == "Nowhere"
+            else {"results": [{"name": params["name"], "latitude": 1.0, "longitude": 2.0}]},
+            FORECAST_URL: lambda params: dict(FORECAST),
+        })
+        items = [{"city": "Moscow", "lat": None, "lon": None}, {"city": "Nowhere", "lat": None, "lon": None}]
+        async with AsyncWeatherClient(session=session) as client:
+            results = await client.get_weather_many(items)
+        
+        self.assertEqual(results[0]["city"], "Moscow")
+        self.assertIsInstance(results[1], ValueError)
+    
+    async def test_get_weather_many_cancellation(self):
+        """Тест отмены всех незавершенных запросов."""
+        session = FakeSession({
+            GEOCODING_URL: {"results": [{"name": "Moscow", "latitude": 1.0, "longitude": 2.0}]},
+            FORECAST_URL: dict(FORECAST),
+        }, delay=10)
+        items = [{"city": "Moscow", "lat": None, "lon": None}] * 5
+        
+        async with AsyncWeatherClient(session=session) as client:
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.get_weather_many(items), timeout=0.05)
+        
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        self.assertEqual(pending, [])
@@ -0,0 +1,188 @@
+"""
+Тесты для модуля пакетного режима.
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from weather.api import InvalidLocationError
+from weather.batch import parse_batch_item, read_batch_items, fetch_many, collect_batch_items
+
+
+class TestBatch(unittest.TestCase):
+    """Тесты для модуля пакетного режима."""
+    
+    def test_parse_batch_item_city(self):
+        """Тест разбора названия города."""
+        self.assertEqual(parse_batch_item(" Moscow "), {"city": "Moscow", "lat": None, "lon": None})
+    
+    def test_parse_batch_item_coordinates(self):
+        """Тест разбора пары координат."""
+        self.assertEqual(parse_batch_item("55.75,37.61"), {"city": None, "lat": 55.75, "lon": 37.61})
+    
+    def test_parse_batch_item_coordinates_out_of_range(self):
+        """Тест: координаты вне диапазона отклоняются."""
+        for item in ("95,10", "-91,0", "10,181", "0,-180.5"):
+            with self.subTest(item=item), self.assertRaises(ValueError):
+                parse_batch_item(item)
+        self.assertEqual(parse_batch_item("90,-180"), {"city": None, "lat": 90.0, "lon": -180.0})
+    
+    def test_parse_batch_item_nearby_coordinates_share_key(self):
+        """Тест: близкие координаты квантуются в одну точку."""
+        self.assertEqual(parse_batch_item("55.7558,37.6173"), parse_batch_item("55.7559,37.6172"))
+    
+    def test_parse_batch_item_city_with_comma(self):
+        """Тест разбора названия с запятой."""
+        self.assertEqual(parse_batch_item("Paris, France")["city"], "Paris, France")
+    
+    @patch('weather.batch.write_cache')
+    @patch('weather.batch.read_cache', return_value=None)
+    @patch('weather.batch.get_weather')
+    def test_invalid_item_does_not_abort_batch(self, mock_get_weather, mock_read_cache, mock_write_cache):
+        """Тест: неразобранный элемент дает ошибку только у себя, остальные запрашиваются."""
+        mock_get_weather.side_effect = lambda city=None, lat=None, lon=None: {"city": city}
+        
+        items = collect_batch_items(["Moscow", "95,10", "Paris"])
+        self.assertIn("вне диапазона", items[1]["error"])
+        
+        results = fetch_many(items)
+        
+        self.assertEqual([r["key"] for r in results], ["Moscow", "95,10", "Paris"])
+        self.assertEqual(results[0]["data"], {"city": "Moscow"})
+        self.assertIn("вне диапазона", results[1]["error"])
+        self.assertEqual(results[2]["data"], {"city": "Paris"})
+        self.assertEqual(mock_get_weather.call_count, 2)
+    
+    def test_read_batch_items_skips_comments(self):
+        """Тест чтения файла пакета без пустых строк и комментариев."""
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+            f.write("Moscow\n\n# комментарий\n55.75,37.61\n")
+        try:
+            self.assertEqual(read_batch_items(f.name), ["Moscow", "55.75,37.61"])
+        finally:
+            os.remove(f.name)
+    
+    @patch('weather.batch.write_cache')
+    @patch('weather.batch.read_cache')
+    @patch('weather.batch.get_weather')
+    def test_fetch_many_results_and_errors(self, mock_get_weather, mock_read_cache, mock_write_cache):
+        """Тест получения результатов и ошибок по каждому элементу."""
+        mock_read_cache.side_effect = lambda key: {"city": "London"} if key == "London" else None
+        
+        def fake_get_weather(city=None, lat=None, lon=None):
+            if city == "Nowhere":
+                raise ValueError("Не удалось определить местоположение.")
+            return {"city": city or "Coords"}
+        
+        mock_get_weather.side_effect = fake_get_weather
+        
+        items = [parse_batch_item(i) for i in ["Moscow", "London", "Nowhere", "55.75,37.61", "Moscow"]]
+        results = fetch_many(items, workers=4)
+        
+        self.assertEqual([r["key"] for r in results], ["Moscow", "London", "Nowhere", "55.75,37.61", "Moscow"])
+        self.assertEqual(results[0]["data"], {"city": "Moscow"})
+        self.assertTrue(results[1]["cached"])
+        self.assertIn("местоположение", results[2]["error"])
+        self.assertEqual(results[3]["data"], {"city": "Coords"})
+        # Повторяющийся элемент запрашивается один раз
+        self.assertEqual(mock_get_weather.call_count, 3)
+    
+    @patch('weather.batch.write_cache')
+    @patch('weather.batch.read_cache', return_value=None)
+    @patch('weather.batch.get_weather')
+    def test_fetch_many_is_concurrent(self, mock_get_weather, mock_read_cache, mock_write_cache):
+        """Тест параллельного выполнения запросов."""
+        active = []
+        peak = []
+        lock = threading.Lock()
+        
+        def slow_get_weather(city=None, lat=None, lon=None):
+            with lock:
+                active.append(city)
+                peak.append(len(active))
+            time.sleep(0.2)
+            with lock:
+                active.remove(city)
+            return {"city": city}
+        
+        mock_get_weather.side_effect = slow_get_weather
+        
+        items = [parse_batch_item(f"City{i}") for i in range(8)]
+        started = time.monotonic()
+        results = fetch_many(items, workers=8)
+        elapsed = time.monotonic() - started
+        
+        self.assertEqual(len(results), 8)
+        self.assertGreater(max(peak), 1)
+        self.assertLess(elapsed, 0.2 * 8 / 2)
+    
+    @patch('weather.batch.write_cache')
+    @patch('weather.batch.read_cache')
+    @patch('weather.batch.get_location_info')
+    @patch('weather.batch.get_weather_for_locations')
+    def test_fetch_many_grouped(self, mock_multi, mock_location, mock_read_cache, mock_write_cache):
+        """Тест: промахи кэша запрашиваются группами координат, попадания — из кэша."""
+        mock_read_cache.side_effect = lambda key: {"city": "City0"} if key == "City0" else None
+        mock_location.side_effect = lambda city=None, lat=None, lon=None: (
+            None if city == "Nowhere" else {"city": city, "lat": 1.0, "lon": 2.0}
+        )
+        mock_multi.side_effect = lambda locations: [{"city": loc["city"]} for loc in locations]
+        
+        names = [f"City{i}" for i in range(6)] + ["Nowhere", "City1"]
+        results = fetch_many([parse_batch_item(n) for n in names], workers=2, group_size=2)
+        
+        self.assertEqual([r["key"] for r in results], names)
+        self.assertTrue(results[0]["cached"])
+        self.assertEqual([r["data"] for r in results[1:6]], [{"city": f"City{i}"} for i in range(1, 6)])
+        self.assertIn("местоположение", results[6]["error"])
+        self.assertEqual(results[7]["data"], {"city": "City1"})
+        # 5 промахов кэша с известными координатами — 3 запроса по 2 координаты
+        self.assertEqual(mock_multi.call_count, 3)
+        self.assertTrue(all(len(c[0][0]) <= 2 for c in mock_multi.call_args_list))
+        self.assertEqual(mock_write_cache.call_count, 5)
+    
+    @patch('weather.batch.write_cache')
+    @patch('weather.batch.read_cache', return_value=None)
+    @patch('weather.batch.get_location_info')
+    @patch('weather.batch.get_weather_for_locations')
+    def test_fetch_many_grouped_error(self, mock_multi, mock_location, mock_read_cache, mock_write_cache):
+        """Тест: сбой сети или API отмечается у всей группы без повторных запросов."""
+        mock_location.side_effect = lambda city=None, lat=None, lon=None: {"city": city, "lat": 1.0, "lon": 2.0}
+        mock_multi.side_effect = ConnectionError("timeout")
+        
+        results = fetch_many([parse_batch_item("Moscow"), parse_batch_item("Paris")], group_size=10)
+        
+        self.assertEqual([r["error"] for r in results], ["timeout", "timeout"])
+        mock_multi.assert_called_once()
+        mock_write_cache.assert_not_called()
+    
+    @patch('weather.batch.write_cache')
+    @patch('weather.batch.read_cache', return_value=None)
+    @patch('weather.batch.get_location_info')
+    @patch('weather.batch.get_weather_for_locations')
+    def test_fetch_many_grouped_bad_item_isolated(self, mock_multi, mock_location, mock_read_cache, mock_write_cache):
+        """Тест: точка, из-за которой API отклоняет запрос группы, не портит остальные."""
+        mock_location.side_effect = lambda city=None, lat=None, lon=None: {
+            "city": city, "lat": 95.0 if city == "Bad" else 1.0, "lon": 2.0
+        }
+        
+        def multi(locations):
+            if any(loc["lat"] > 90 for loc in locations):
+                raise InvalidLocationError("Latitude must be in range of -90 to 90°")
+            return [{"city": loc["city"]} for loc in locations]
+        
+        mock_multi.side_effect = multi
+        names = ["Moscow", "London", "Bad", "Paris"]
+        
+        results = fetch_many([parse_batch_item(n) for n in names], group_size=10)
+        
+        self.assertEqual([r["data"] for r in results],
+                         [{"city": "Moscow"}, {"city": "London"}, None, {"city": "Paris"}])
+        self.assertIn("Latitude", results[2]["error"])
+        self.assertEqual(mock_write_cache.call_count, 3)
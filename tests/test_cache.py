@@ -3,27 +3,48 @@
 """
 
 import unittest
+from unittest.mock import patch
 import sys
 import os
 import json
+import multiprocessing
 from datetime import datetime, timedelta
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from weather.cache import read_cache, write_cache, CACHE_FILE, CACHE_TTL
+from weather import cache as cache_module
+from weather.cache import (
+    read_cache, write_cache, CACHE_FILE, CACHE_TTL, CACHE_DB_FILE,
+    read_cache_entry, CACHE_MAX_STALE,
+    read_geo_cache, write_geo_cache, make_geo_key, GEO_CACHE_FILE,
+    read_negative_cache, write_negative_cache, NEGATIVE_CACHE_TTL, NEGATIVE_ERROR_TTL,
+    MemoryCache, cache_stats, clear_memory_cache, compact_cache,
+    read_forecast_cache, write_forecast_cache, FORECAST_CACHE_TTL
+)
+
+CACHE_PATHS = (CACHE_DB_FILE, CACHE_DB_FILE + "-wal", CACHE_DB_FILE + "-shm", CACHE_FILE, GEO_CACHE_FILE)
+
+
+def _write_many(worker: int, count: int) -> None:
+    """Пишет в кэш из отдельного процесса."""
+    for i in range(count):
+        write_cache(f"Worker{worker}-City{i}", {"worker": worker, "i": i})
 
 
 class TestCache(unittest.TestCase):
     """Тесты для модуля кэширования."""
     
     def setUp(self):
-        # Убедимся, что файл кэша не существует перед тестами
-        if os.path.exists(CACHE_FILE):
-            os.remove(CACHE_FILE)
+        # Убедимся, что файлы кэша не существуют перед тестами
+        for path in CACHE_PATHS:
+            if os.path.exists(path):
+                os.remove(path)
+        clear_memory_cache()
     
     def tearDown(self):
         # Очистка после тестов
-        if os.path.exists(CACHE_FILE):
-            os.remove(CACHE_FILE)
+        for path in CACHE_PATHS:
+            if os.path.exists(path):
+                os.remove(path)
     
     def test_write_and_read_cache(self):
         """Тест записи и чтения из кэша."""
@@ -31,7 +52,7 @@ class TestCache(unittest.TestCase):
         write_cache("Moscow", test_data)
         
         # Проверяем, что файл создан
-        self.assertTrue(os.path.exists(CACHE_FILE))
+        self.assertTrue(os.path.exists(CACHE_DB_FILE))
         
         # Читаем данные
         cached_data = read_cache("Moscow")
@@ -63,6 +84,32 @@ class TestCache(unittest.TestCase):
         cached_data = read_cache("Moscow")
         self.assertIsNone(cached_data)
     
+    def test_read_cache_entry_stale(self):
+        """Тест чтения устаревшей записи в режиме stale-while-revalidate."""
+        cache = {
+            "Moscow": {
+                "timestamp": (datetime.now() - CACHE_TTL - timedelta(minutes=5)).isoformat(),
+                "weather": {"temperature": 20}
+            }
+        }
+        with open(CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        
+        entry = read_cache_entry("Moscow")
+        self.assertEqual(entry["weather"], {"temperature": 20})
+        self.assertTrue(entry["stale"])
+        self.assertIsNone(read_cache("Moscow"))
+        
+        # Жесткий предел устаревания
+        self.assertIsNone(read_cache_entry("Moscow", max_stale=timedelta(minutes=1)))
+    
+    def test_read_cache_entry_fresh(self):
+        """Тест чтения актуальной записи в режиме stale-while-revalidate."""
+        write_cache("Moscow", {"temperature": 20})
+        entry = read_cache_entry("Moscow")
+        self.assertFalse(entry["stale"])
+        self.assertLess(entry["age"], 60)
+    
     def test_read_cache_corrupted_file(self):
         """Тест чтения поврежденного файла кэша."""
         # Создаем поврежденный JSON
@@ -74,7 +121,294 @@ class TestCache(unittest.TestCase):
     
     def test_cache_file_creation(self):
         """Тест создания файла кэша."""
-        self.assertFalse(os.path.exists(CACHE_FILE))
+        self.assertFalse(os.path.exists(CACHE_DB_FILE))
         write_cache("Test", {"data": "test"})
-        self.assertTrue(os.path.exists(CACHE_FILE))
-        
\ No newline at end of file
+        self.assertTrue(os.path.exists(CACHE_DB_FILE))
+        
+    
+    def test_make_geo_key(self):
+        """Тест ключей кэша геокодирования."""
+        self.assertEqual(make_geo_key(city=" Москва "), "city:москва")
+        self.assertEqual(make_geo_key(lat=55.755831, lon=37.617311), "coords:55.7558,37.6173")
+    
+    def test_geo_cache_separate_from_weather(self):
+        """Тест хранения геокодирования отдельно от погоды."""
+        location = {"city": "Moscow", "lat": 55.75, "lon": 37.61}
+        write_geo_cache("city:moscow", location)
+        
+        self.assertEqual(read_geo_cache("city:moscow"), location)
+        self.assertIsNone(read_cache("city:moscow"))
+    
+    def test_geo_cache_ttl(self):
+        """Тест срока жизни кэша геокодирования."""
+        cache = {
+            "city:moscow": {
+                "timestamp": (datetime.now() - timedelta(days=365)).isoformat(),
+                "location": {"city": "Moscow", "lat": 55.75, "lon": 37.61}
+            }
+        }
+        with open(GEO_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        
+        self.assertIsNone(read_geo_cache("city:moscow"))
+        
+        # Без срока жизни запись не устаревает
+        original_ttl = cache_module.GEO_CACHE_TTL
+        cache_module.GEO_CACHE_TTL = None
+        try:
+            self.assertIsNotNone(read_geo_cache("city:moscow"))
+        finally:
+            cache_module.GEO_CACHE_TTL = original_ttl
+    
+    def test_negative_cache(self):
+        """Тест кэша неудачного геокодирования."""
+        write_negative_cache("city:xyz", "not_found", "Город 'Xyz' не найден.")
+        
+        self.assertEqual(read_negative_cache("city:xyz"), {"reason": "not_found", "message": "Город 'Xyz' не найден."})
+        self.assertIsNone(read_geo_cache("city:xyz"))
+    
+    def test_negative_cache_ttl_by_reason(self):
+        """Тест: ошибки запроса помнятся меньше, чем «город не найден»."""
+        write_negative_cache("city:missing", "not_found")
+        write_negative_cache("city:broken", "error")
+        
+        later = datetime.now() + NEGATIVE_ERROR_TTL + timedelta(seconds=1)
+        with patch('weather.cache.datetime') as mock_datetime:
+            mock_datetime.now.return_value = later
+            clear_memory_cache()
+            self.assertIsNotNone(read_negative_cache("city:missing"))
+            self.assertIsNone(read_negative_cache("city:broken"))
+            
+            mock_datetime.now.return_value = datetime.now() + NEGATIVE_CACHE_TTL + timedelta(seconds=1)
+            clear_memory_cache()
+            self.assertIsNone(read_negative_cache("city:missing"))
+    
+    def test_migrate_legacy_json_cache(self):
+        """Тест переноса записей из старого JSON-файла в базу."""
+        cache = {
+            "Moscow": {"timestamp": datetime.now().isoformat(), "weather": {"temperature": 20}},
+            "London": {"timestamp": datetime.now().isoformat(), "weather": {"temperature": 15}},
+        }
+        with open(CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        
+        self.assertEqual(read_cache("Moscow"), {"temperature": 20})
+        self.assertEqual(read_cache("London"), {"temperature": 15})
+        self.assertFalse(os.path.exists(CACHE_FILE))
+    
+    def test_migrate_keeps_newer_entries(self):
+        """Тест: перенос не затирает более свежие записи в базе."""
+        write_cache("Moscow", {"temperature": 25})
+        cache = {
+            "Moscow": {
+                "timestamp": (datetime.now() - timedelta(minutes=5)).isoformat(),
+                "weather": {"temperature": 20}
+            }
+        }
+        with open(CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        
+        self.assertEqual(read_cache("Moscow"), {"temperature": 25})
+    
+    def test_write_does_not_touch_other_entries(self):
+        """Тест обновления одной записи без потери остальных."""
+        for i in range(50):
+            write_cache(f"City{i}", {"temperature": i})
+        write_cache("City7", {"temperature": 100})
+        
+        self.assertEqual(read_cache("City7"), {"temperature": 100})
+        self.assertEqual(read_cache("City49"), {"temperature": 49})
+    
+    def test_memory_hit_skips_disk(self):
+        """Тест чтения популярной записи из памяти без обращения к диску."""
+        write_cache("Moscow", {"temperature": 20})
+        
+        with patch('weather.cache._connect', side_effect=AssertionError("обращение к диску")):
+            self.assertEqual(read_cache("Moscow"), {"temperature": 20})
+        
+        self.assertEqual(cache_stats()["hits"], 1)
+    
+    def test_memory_returns_independent_copies(self):
+        """Тест: изменение результата не портит запись в памяти."""
+        write_cache("Moscow", {"temperature": 20})
+        read_cache("Moscow")["temperature"] = 99
+        self.assertEqual(read_cache("Moscow"), {"temperature": 20})
+    
+    def test_memory_miss_loads_from_disk(self):
+        """Тест заполнения памяти при чтении с диска."""
+        write_cache("Moscow", {"temperature": 20})
+        clear_memory_cache()
+        
+        self.assertEqual(read_cache("Moscow"), {"temperature": 20})
+        self.assertEqual(read_cache("Moscow"), {"temperature": 20})
+        self.assertEqual(cache_stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    
+    def test_compact_removes_expired(self):
+        """Тест удаления записей с истекшим сроком хранения."""
+        cache = {
+            "Old": {
+                "timestamp": (datetime.now() - CACHE_TTL - CACHE_MAX_STALE - timedelta(minutes=1)).isoformat(),
+                "weather": {"temperature": 1}
+            }
+        }
+        with open(CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        write_cache("Moscow", {"temperature": 20})
+        
+        result = compact_cache()
+        
+        self.assertEqual(result["expired"], 1)
+        self.assertEqual(result["entries"], 1)
+        self.assertEqual(read_cache("Moscow"), {"temperature": 20})
+    
+    def test_compact_evicts_oldest_over_limit(self):
+        """Тест вытеснения самых старых записей сверх лимита."""
+        for i in range(5):
+            write_cache(f"City{i}", {"temperature": i})
+        
+        with patch.object(cache_module, "CACHE_MAX_ENTRIES", 3):
+            result = compact_cache()
+        
+        self.assertEqual(result["evicted"], 2)
+        self.assertIsNone(read_cache("City0"))
+        self.assertIsNone(read_cache("City1"))
+        self.assertEqual(read_cache("City4"), {"temperature": 4})
+    
+    def test_compact_evicts_short_lived_before_geocoding(self):
+        """Тест: сверх лимита вытесняется погода, а не записанное раньше геокодирование."""
+        write_geo_cache(make_geo_key(city="Moscow"), {"city": "Moscow", "lat": 55.75, "lon": 37.61})
+        for i in range(3):
+            write_cache(f"City{i}", {"temperature": i})
+        
+        with patch.object(cache_module, "CACHE_MAX_ENTRIES", 2):
+            compact_cache()
+        
+        self.assertEqual(read_geo_cache(make_geo_key(city="Moscow"))["city"], "Moscow")
+        self.assertIsNone(read_cache("City0"))
+        self.assertEqual(read_cache("City2"), {"temperature": 2})
+    
+    def test_lazy_compaction_drops_evicted_from_memory(self):
+        """Тест: запись, вытесненная ленивой компакцией, не читается из памяти процесса."""
+        with patch.object(cache_module, "COMPACT_EVERY_WRITES", 3), \
+             patch.object(cache_module, "CACHE_MAX_ENTRIES", 2):
+            for i in range(3):
+                write_cache(f"City{i}", {"temperature": i})
+        
+        self.assertIsNone(read_cache("City0"))
+        self.assertEqual(read_cache("City1"), {"temperature": 1})
+    
+    def test_compact_max_bytes(self):
+        """Тест ограничения суммарного размера кэша."""
+        for i in range(4):
+            write_cache(f"City{i}", {"payload": "x" * 100})
+        
+        with patch.object(cache_module, "CACHE_MAX_BYTES", 250):
+            result = compact_cache()
+        
+        self.assertLessEqual(result["bytes"], 250)
+        self.assertEqual(result["entries"], 2)
+    
+    def test_compact_max_bytes_counts_utf8(self):
+        """Тест: размер кэша считается в байтах UTF-8, а не в символах."""
+        for i in range(4):
+            write_cache(f"Город{i}", {"payload": "ж" * 100})
+        
+        # 100 символов кириллицы — 200 байт на запись
+        with patch.object(cache_module, "CACHE_MAX_BYTES", 500):
+            result = compact_cache()
+        
+        self.assertLessEqual(result["bytes"], 500)
+        self.assertEqual(result["entries"], 2)
+    
+    def test_lazy_compaction_after_writes(self):
+        """Тест автоматической компакции после порога записей."""
+        with patch.object(cache_module, "COMPACT_EVERY_WRITES", 3), \
+             patch.object(cache_module, "CACHE_MAX_ENTRIES", 2):
+            for i in range(3):
+                write_cache(f"City{i}", {"temperature": i})
+        
+        clear_memory_cache()
+        self.assertIsNone(read_cache("City0"))
+        self.assertEqual(read_cache("City2"), {"temperature": 2})
+
+    
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "нужен fork")
+    def test_parallel_processes_do_not_lose_updates(self):
+        """Тест: параллельные процессы не теряют записи друг друга."""
+        write_cache("Warmup", {"temperature": 0})
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=_write_many, args=(w, 30)) for w in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+            self.assertEqual(process.exitcode, 0)
+        
+        clear_memory_cache()
+        for w in range(4):
+            for i in range(30):
+                self.assertEqual(read_cache(f"Worker{w}-City{i}"), {"worker": w, "i": i})
+    
+    def test_migration_when_file_already_taken(self):
+        """Тест: перенос не падает, если файл уже перенес другой процесс."""
+        write_cache("Moscow", {"temperature": 20})
+        with open(CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump({}, f)
+        
+        real_open = open
+        
+        def vanishing_open(path, *args, **kwargs):
+            if path == CACHE_FILE:
+                os.remove(CACHE_FILE)
+                raise FileNotFoundError(path)
+            return real_open(path, *args, **kwargs)
+        
+        clear_memory_cache()
+        with patch('builtins.open', side_effect=vanishing_open):
+            self.assertEqual(read_cache("Moscow"), {"temperature": 20})
+
+    
+    def test_forecast_cache_separate_namespace(self):
+        """Тест: прогноз хранится отдельно от текущей погоды и устаревает через час."""
+        write_forecast_cache("Moscow:7", {"city": "Moscow", "hourly": {"temperature": "AAAA"}})
+        
+        self.assertEqual(read_forecast_cache("Moscow:7")["hourly"], {"temperature": "AAAA"})
+        self.assertIsNone(read_cache("Moscow:7"))
+        
+        clear_memory_cache()
+        later = datetime.now() + FORECAST_CACHE_TTL + timedelta(minutes=1)
+        with patch('weather.cache.datetime') as mock_datetime:
+            mock_datetime.now.return_value = later
+            self.assertIsNone(read_forecast_cache("Moscow:7"))
+
+class TestMemoryCache(unittest.TestCase):
+    """Тесты для LRU-кэша в памяти."""
+    
+    def test_lru_eviction(self):
+        """Тест вытеснения давно не использованных записей."""
+        memory = MemoryCache(max_size=2)
+        now = datetime.now().timestamp()
+        memory.put("weather", "a", now, "1")
+        memory.put("weather", "b", now, "2")
+        memory.get("weather", "a", CACHE_TTL)
+        memory.put("weather", "c", now, "3")
+        
+        self.assertEqual(memory.get("weather", "a", CACHE_TTL), "1")
+        self.assertIsNone(memory.get("weather", "b", CACHE_TTL))
+        self.assertEqual(memory.stats()["size"], 2)
+    
+    def test_ttl_expiry(self):
+        """Тест срока жизни записей в памяти."""
+        memory = MemoryCache(max_size=2)
+        old = (datetime.now() - CACHE_TTL - timedelta(minutes=1)).timestamp()
+        memory.put("weather", "a", old, "1")
+        
+        self.assertIsNone(memory.get("weather", "a", CACHE_TTL))
+        self.assertEqual(memory.get("weather", "a", None), "1")
+    
+    def test_disabled(self):
+        """Тест отключения кэша в памяти нулевым размером."""
+        memory = MemoryCache(max_size=0)
+        memory.put("weather", "a", datetime.now().timestamp(), "1")
+        self.assertIsNone(memory.get("weather", "a", CACHE_TTL))
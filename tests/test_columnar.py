@@ -0,0 +1,108 @@
+"""
+Тесты для колоночной выгрузки и загрузки истории (Parquet / Arrow).
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime
+from decimal import Decimal
+
+from weather import columnar
+from weather.columnar import export_columnar, import_columnar
+
+
+def make_rows(count):
+    """Строки истории в том виде, как их выдает серверный курсор БД."""
+    return [
+        {
+            "location_id": i % 2 + 1,
+            "city_name": "Moscow" if i % 2 == 0 else "Paris",
+            "latitude": Decimal("55.750000") if i % 2 == 0 else Decimal("48.850000"),
+            "longitude": Decimal("37.610000") if i % 2 == 0 else Decimal("2.350000"),
+            "weather_time": datetime(2023, 10, 1 + i // 24, i % 24),
+            "temperature": Decimal("20.50"),
+            "wind_speed": Decimal("10.00"),
+            "wind_direction": 180,
+            "recorded_at": datetime(2023, 10, 3),
+        }
+        for i in range(count)
+    ]
+
+
+class FakeDatabase:
+    """БД, которая запоминает пакеты записи."""
+    
+    def __init__(self):
+        self.batches = []
+    
+    def write_weather_batch(self, payloads):
+        self.batches.append(payloads)
+        return len(payloads)
+
+
+@unittest.skipIf(columnar.pa is None, "pyarrow не установлен")
+class TestColumnar(unittest.TestCase):
+    """Тесты выгрузки в Parquet/Arrow и обратной загрузки."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "history")
+    
+    def test_export_partitioned_by_day_and_location(self):
+        """Тест: набор файлов разбит по дням и местоположениям."""
+        count = export_columnar(iter(make_rows(48)), self.path, "parquet", chunk_size=10)
+        
+        self.assertEqual(count, 48)
+        self.assertEqual(sorted(os.listdir(self.path)), ["day=2023-10-01", "day=2023-10-02"])
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.path, "day=2023-10-01"))),
+            ["location_id=1", "location_id=2"]
+        )
+    
+    def test_roundtrip(self):
+        """Тест: выгруженный архив загружается обратно в формате ответа API."""
+        for fmt in ("parquet", "arrow"):
+            with self.subTest(fmt=fmt):
+                path = os.path.join(self.tmp.name, fmt)
+                export_columnar(iter(make_rows(6)), path, fmt)
+                db = FakeDatabase()
+                
+                result = import_columnar(db, path, fmt, chunk_size=4)
+                
+                self.assertEqual(result, {"rows": 6, "written": 6})
+                self.assertTrue(all(len(batch) <= 4 for batch in db.batches))
+                payloads = [p for batch in db.batches for p in batch]
+                moscow = sorted(
+                    p["current_weather"]["time"] for p in payloads if p["city"] == "Moscow"
+                )
+                self.assertEqual(moscow, ["2023-10-01T00:00:00", "2023-10-01T02:00:00", "2023-10-01T04:00:00"])
+                self.assertEqual(payloads[0]["current_weather"]["temperature"], 20.5)
+                # Исходное время записи не заменяется временем загрузки
+                self.assertEqual({p["recorded_at"] for p in payloads}, {"2023-10-03T00:00:00"})
+    
+    def test_import_single_city(self):
+        """Тест: загрузка только выбранного города."""
+        export_columnar(iter(make_rows(6)), self.path)
+        db = FakeDatabase()
+        
+        result = import_columnar(db, self.path, city="Paris")
+        
+        self.assertEqual(result["rows"], 3)
+        self.assertEqual({p["city"] for batch in db.batches for p in batch}, {"Paris"})
+    
+    def test_reexport_replaces_partitions(self):
+        """Тест: повторная выгрузка перезаписывает секции, а не дублирует строки."""
+        export_columnar(iter(make_rows(6)), self.path)
+        export_columnar(iter(make_rows(6)), self.path)
+        
+        self.assertEqual(import_columnar(FakeDatabase(), self.path)["rows"], 6)
+    
+    def test_unknown_format(self):
+        """Тест: неизвестный формат вызывает ValueError."""
+        with self.assertRaises(ValueError):
+            export_columnar(iter([]), self.path, "orc")
@@ -3,13 +3,27 @@
 """
 
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import sys
 import os
+import threading
+import json
+import tempfile
+from datetime import datetime
 from io import StringIO
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from weather import commands
+from weather.config import HTTP_CONFIG
+from weather.parser import create_parser
+
+
+def make_args(**kwargs):
+    """Создаёт аргументы так же, как после разбора командной строки."""
+    args = create_parser().parse_args([])
+    for name, value in kwargs.items():
+        setattr(args, name, value)
+    return args
 
 
 class TestCommands(unittest.TestCase):
@@ -19,6 +33,8 @@ class TestCommands(unittest.TestCase):
         # Сохраняем оригинальный stdout
         self.original_stdout = sys.stdout
         sys.stdout = StringIO()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
     
     def tearDown(self):
         # Восстанавливаем stdout
@@ -42,11 +58,7 @@ class TestCommands(unittest.TestCase):
         mock_read_cache.return_value = cached_data
         
         # Создаем mock args
-        args = MagicMock()
-        args.city = "Moscow"
-        args.lat = None
-        args.lon = None
-        args.refresh = False
+        args = make_args(city="Moscow", refresh=False)
         
         commands.handle_command(args)
         
@@ -74,11 +86,7 @@ class TestCommands(unittest.TestCase):
         }
         mock_get_weather.return_value = api_data
         
-        args = MagicMock()
-        args.city = "Moscow"
-        args.lat = None
-        args.lon = None
-        args.refresh = False
+        args = make_args(city="Moscow", refresh=False)
         
         commands.handle_command(args)
         
@@ -103,11 +111,7 @@ class TestCommands(unittest.TestCase):
         }
         mock_get_weather.return_value = api_data
         
-        args = MagicMock()
-        args.city = "Moscow"
-        args.lat = None
-        args.lon = None
-        args.refresh = True
+        args = make_args(city="Moscow", refresh=True)
         
         commands.handle_command(args)
         
@@ -115,13 +119,224 @@ class TestCommands(unittest.TestCase):
         mock_read_cache.assert_not_called()
         mock_get_weather.assert_called_once()
     
+    @patch('weather.commands.get_weather')
+    @patch('weather.commands.read_cache')
+    def test_handle_command_quantizes_coordinates(self, mock_read_cache, mock_get_weather):
+        """Тест: близкие координаты дают один ключ кэша."""
+        mock_read_cache.return_value = {"city": "Moscow", "current_weather": {}}
+        
+        commands.handle_command(make_args(lat=55.7558, lon=37.6173))
+        commands.handle_command(make_args(lat=55.7559, lon=37.6172))
+        
+        self.assertEqual(mock_read_cache.call_args_list[0], mock_read_cache.call_args_list[1])
+        mock_get_weather.assert_not_called()
+    
+    @patch('weather.commands.refresh_in_background')
+    @patch('weather.commands.get_weather')
+    @patch('weather.commands.read_cache_entry')
+    def test_handle_command_serves_stale(self, mock_read_entry, mock_get_weather, mock_refresh):
+        """Тест: устаревшие данные показываются сразу и обновляются в фоне."""
+        mock_read_entry.return_value = {
+            "weather": {"city": "Moscow", "current_weather": {"temperature": 20}},
+            "stale": True,
+            "age": 3600,
+        }
+        
+        commands.handle_command(make_args(city="Moscow", allow_stale=True))
+        
+        output = sys.stdout.getvalue()
+        self.assertIn("обновляется", output)
+        self.assertIn("20", output)
+        mock_get_weather.assert_not_called()
+        mock_refresh.assert_called_once_with("Moscow", city="Moscow", lat=None, lon=None, write_behind=False)
+    
+    @patch('weather.commands.db')
+    @patch('weather.commands.write_cache')
+    @patch('weather.commands.get_weather')
+    def test_refresh_in_background(self, mock_get_weather, mock_write_cache, mock_db):
+        """Тест фонового обновления кэша."""
+        mock_get_weather.return_value = {"city": "Moscow"}
+        
+        thread = commands.refresh_in_background("Moscow", city="Moscow")
+        thread.join(timeout=5)
+        
+        mock_write_cache.assert_called_once_with("Moscow", {"city": "Moscow"})
+        mock_db.save_weather_data.assert_called_once_with({"city": "Moscow"})
+    
+    @patch('weather.commands.get_write_behind')
+    @patch('weather.commands.db')
+    @patch('weather.commands.write_cache')
+    @patch('weather.commands.get_weather')
+    def test_refresh_in_background_write_behind(self, mock_get_weather, mock_write_cache, mock_db, mock_get_wb):
+        """Тест: фоновое обновление с write-behind пишет через очередь, а не напрямую в БД."""
+        mock_get_weather.return_value = {"city": "Moscow"}
+        
+        thread = commands.refresh_in_background("Moscow", city="Moscow", write_behind=True)
+        thread.join(timeout=5)
+        
+        mock_get_wb.return_value.put.assert_called_once_with({"city": "Moscow"})
+        mock_db.save_weather_data.assert_not_called()
+    
+    @patch('weather.commands.db')
+    @patch('weather.commands.write_cache')
+    @patch('weather.commands.get_weather')
+    def test_refresh_in_background_reports_db_error(self, mock_get_weather, mock_write_cache, mock_db):
+        """Тест: ошибка БД при фоновом обновлении выводится предупреждением."""
+        mock_get_weather.return_value = {"city": "Moscow"}
+        mock_db.save_weather_data.side_effect = ConnectionError("connection refused")
+        
+        thread = commands.refresh_in_background("Moscow", city="Moscow")
+        thread.join(timeout=5)
+        
+        self.assertIn("Не удалось сохранить в БД: connection refused", sys.stdout.getvalue())
+    
+    @patch('weather.commands.db')
+    @patch('weather.commands.handle_batch')
+    def test_handle_command_per_request_with_async(self, mock_handle_batch, mock_db):
+        """Тест: --per-request вместе с --async отклоняется, без него берется HTTP_BATCH_LOCATIONS."""
+        commands.handle_command(make_args(batch=["Moscow"], use_async=True, per_request=10))
+        
+        mock_handle_batch.assert_not_called()
+        self.assertIn("--per-request", sys.stdout.getvalue())
+        
+        commands.handle_command(make_args(batch=["Moscow"]))
+        self.assertEqual(mock_handle_batch.call_args[1]["per_request"], HTTP_CONFIG.batch_locations)
+    
+    @patch('weather.commands.db')
+    @patch('weather.commands.fetch_many')
+    def test_handle_batch_saves_fresh_in_one_call(self, mock_fetch_many, mock_db):
+        """Тест: свежие данные пакета сохраняются в БД одним вызовом."""
+        mock_fetch_many.return_value = [
+            {"key": "Moscow", "data": {"city": "Moscow"}, "cached": False, "error": None},
+            {"key": "Paris", "data": {"city": "Paris"}, "cached": True, "error": None},
+            {"key": "Rome", "data": {"city": "Rome"}, "cached": False, "error": None},
+            {"key": "Nowhere", "data": None, "cached": False, "error": "not found"},
+        ]
+        
+        commands.handle_batch([{"city": "Moscow", "lat": None, "lon": None}], per_request=50)
+        
+        self.assertEqual(mock_fetch_many.call_args[1]["group_size"], 50)
+        mock_db.save_weather_batch.assert_called_once_with([{"city": "Moscow"}, {"city": "Rome"}])
+        mock_db.save_weather_data.assert_not_called()
+        self.assertIn("3 успешно, 1 с ошибками", sys.stdout.getvalue())
+    
+    @patch('weather.commands.get_write_behind')
+    @patch('weather.commands.db')
+    @patch('weather.commands.write_cache')
+    @patch('weather.commands.read_cache')
+    @patch('weather.commands.get_weather')
+    def test_handle_command_write_behind(self, mock_get_weather, mock_read_cache, mock_write_cache,
+                                         mock_db, mock_get_write_behind):
+        """Тест: при отложенной записи данные уходят в очередь, а не в БД напрямую."""
+        mock_read_cache.return_value = None
+        mock_get_weather.return_value = {"city": "Moscow"}
+        
+        commands.handle_command(make_args(city="Moscow", write_behind=True))
+        
+        mock_get_write_behind.return_value.put.assert_called_once_with({"city": "Moscow"})
+        mock_db.save_weather_data.assert_not_called()
+        mock_db.init_db.assert_not_called()
+    
+    @patch('weather.commands.db')
+    def test_handle_command_export(self, mock_db):
+        """Тест: выгрузка пишет историю из серверного курсора в файл."""
+        mock_db.iter_weather_history.return_value = iter([{"city_name": "Moscow", "temperature": 20}])
+        path = os.path.join(self.tmp.name, "history.ndjson")
+        
+        commands.handle_command(make_args(city="Moscow", export=path))
+        
+        mock_db.iter_weather_history.assert_called_once_with("Moscow")
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["temperature"], 20)
+        self.assertIn("Выгружено записей для Moscow: 1", sys.stdout.getvalue())
+    
+    @patch('weather.commands.import_columnar')
+    @patch('weather.commands.db')
+    def test_handle_command_import_history(self, mock_db, mock_import):
+        """Тест: загрузка архива истории по умолчанию читает Parquet."""
+        mock_import.return_value = {"rows": 10, "written": 7}
+        
+        commands.handle_command(make_args(import_history="archive"))
+        
+        mock_import.assert_called_once_with(mock_db, "archive", "parquet", city=None)
+        self.assertIn("Загружено записей: 10", sys.stdout.getvalue())
+    
+    @patch('weather.commands.db')
+    @patch('weather.commands.write_forecast_cache')
+    @patch('weather.commands.read_forecast_cache')
+    @patch('weather.commands.get_forecast')
+    def test_handle_command_forecast(self, mock_get_forecast, mock_read_cache, mock_write_cache, mock_db):
+        """Тест: прогноз запрашивается одним вызовом, кэшируется и сохраняется в БД."""
+        mock_read_cache.return_value = None
+        mock_get_forecast.return_value = {
+            "city": "Moscow", "latitude": 55.75, "longitude": 37.61,
+            "hourly": {"time": ["2023-10-01T00:00", "2023-10-01T01:00"], "temperature_2m": [1.0, 2.0]},
+            "daily": {"time": ["2023-10-01"], "temperature_2m_max": [2.0]},
+        }
+        
+        commands.handle_command(make_args(city="Moscow", forecast=3))
+        
+        mock_get_forecast.assert_called_once_with(city="Moscow", lat=None, lon=None, days=3)
+        self.assertEqual(mock_write_cache.call_args[0][0], "Moscow:3")
+        mock_db.save_forecast.assert_called_once()
+        mock_db.save_weather_data.assert_not_called()
+        self.assertIn("Прогноз для Moscow на 3 дн.", sys.stdout.getvalue())
+        self.assertIn("2023-10-01:", sys.stdout.getvalue())
+    
+    @patch('weather.commands.db')
+    @patch('weather.commands.write_forecast_cache')
+    @patch('weather.commands.read_forecast_cache', return_value=None)
+    @patch('weather.commands.get_forecast')
+    def test_handle_command_forecast_write_behind(self, mock_get_forecast, mock_read_cache, mock_write_cache, mock_db):
+        """Тест: с write-behind прогноз выводится до записи в БД, запись идет в фоновом потоке."""
+        mock_get_forecast.return_value = {
+            "city": "Moscow", "latitude": 55.75, "longitude": 37.61,
+            "hourly": {"time": ["2023-10-01T00:00", "2023-10-01T01:00"], "temperature_2m": [1.0, 2.0]},
+        }
+        printed = []
+        mock_db.save_forecast.side_effect = lambda forecast: printed.append(sys.stdout.getvalue())
+        
+        commands.handle_command(make_args(city="Moscow", forecast=3, write_behind=True))
+        for thread in threading.enumerate():
+            if thread.name == "save-forecast":
+                thread.join(timeout=5)
+        
+        mock_db.init_db.assert_called_once()
+        mock_db.save_forecast.assert_called_once()
+        self.assertIn("Прогноз для Moscow", printed[0])
+    
+    @patch('weather.commands.db')
+    def test_handle_command_stats_compare(self, mock_db):
+        """Тест: --stats с --compare считает аналитику по истории всех городов за один проход."""
+        mock_db.iter_history_columns.return_value = iter([[
+            ("Moscow", datetime(2023, 10, 1, 0), 10.0, 5.0, 350.0),
+            ("Moscow", datetime(2023, 10, 1, 12), 14.0, 5.0, 10.0),
+            ("Paris", datetime(2023, 10, 1, 0), 16.0, 3.0, 90.0),
+        ]])
+        
+        commands.handle_command(make_args(city="Moscow", stats=True, compare=["Paris", "Rome"], days=30))
+        
+        mock_db.iter_history_columns.assert_called_once_with(["Moscow", "Paris", "Rome"], 30)
+        mock_db.get_weather_stats.assert_not_called()
+        output = sys.stdout.getvalue()
+        self.assertIn("Статистика погоды для Moscow за последние 30 дней", output)
+        self.assertIn("p50 = 12.0 °C", output)
+        self.assertIn("Статистика для города 'Rome' за последние 30 дней не найдена", output)
+        self.assertIn("Paris: температура +4.0 °C", output)
+    
+    @patch('weather.commands.db')
+    def test_handle_command_stats_rollups(self, mock_db):
+        """Тест: --stats без параметров аналитики читает дневные агрегаты за --days дней."""
+        mock_db.get_weather_stats.return_value = {}
+        
+        commands.handle_command(make_args(city="Moscow", stats=True, days=30))
+        
+        mock_db.get_weather_stats.assert_called_once_with("Moscow", 30)
+        mock_db.iter_history_columns.assert_not_called()
+    
     def test_handle_command_no_arguments(self):
         """Тест обработки команды без аргументов."""
-        args = MagicMock()
-        args.city = None
-        args.lat = None
-        args.lon = None
-        args.refresh = False
+        args = make_args(city=None, refresh=False)
         
         commands.handle_command(args)
         
@@ -138,11 +353,7 @@ class TestCommands(unittest.TestCase):
     
         mock_get_weather.side_effect = Exception("API Error")
     
-        args = MagicMock()
-        args.city = "Moscow"
-        args.lat = None
-        args.lon = None
-        args.refresh = False
+        args = make_args(city="Moscow", refresh=False)
     
         commands.handle_command(args)
     
@@ -0,0 +1,529 @@
+"""
+Тесты для модуля работы с базой данных (пул соединений).
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import date, datetime
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+from weather.config import DatabaseConfig
+from weather.database import WeatherDatabase
+
+
+def make_connection():
+    """Создает поддельное соединение psycopg2."""
+    conn = MagicMock()
+    conn.closed = 0
+    return conn
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Тесты пула соединений WeatherDatabase."""
+    
+    def setUp(self):
+        self.pool_class = patch('weather.database.pg_pool.ThreadedConnectionPool').start()
+        self.pool = self.pool_class.return_value
+        self.pool.closed = False
+        self.addCleanup(patch.stopall)
+    
+    def make_db(self, **kwargs):
+        """Создает WeatherDatabase с настройками пула по умолчанию и переопределениями."""
+        options = dict(pool_min=1, pool_max=2, pool_timeout=1, pool_max_lifetime=0, pool_pre_ping=False)
+        options.update(kwargs)
+        return WeatherDatabase(DatabaseConfig(**options))
+    
+    def test_pool_created_lazily_and_reused(self):
+        """Тест: пул создается один раз, соединение возвращается в пул."""
+        conn = make_connection()
+        self.pool.getconn.return_value = conn
+        db = self.make_db()
+        self.pool_class.assert_not_called()
+        
+        for _ in range(3):
+            with db.get_connection() as c:
+                self.assertIs(c, conn)
+        
+        self.pool_class.assert_called_once()
+        self.assertEqual(self.pool_class.call_args[0][:2], (1, 2))
+        self.assertEqual(self.pool.putconn.call_count, 3)
+        self.pool.putconn.assert_called_with(conn)
+        self.assertEqual(conn.commit.call_count, 3)
+    
+    def test_rollback_on_error(self):
+        """Тест отката транзакции при исключении внутри блока."""
+        conn = make_connection()
+        self.pool.getconn.return_value = conn
+        db = self.make_db()
+        
+        with self.assertRaises(ValueError):
+            with db.get_connection():
+                raise ValueError("boom")
+        
+        conn.rollback.assert_called_once()
+        conn.commit.assert_not_called()
+        self.pool.putconn.assert_called_once_with(conn)
+    
+    def test_broken_connection_discarded(self):
+        """Тест: соединение с сетевой ошибкой закрывается, а не возвращается в пул."""
+        conn = make_connection()
+        self.pool.getconn.return_value = conn
+        db = self.make_db()
+        
+        with self.assertRaises(psycopg2.OperationalError):
+            with db.get_connection():
+                raise psycopg2.OperationalError("server closed the connection")
+        
+        self.pool.putconn.assert_called_once_with(conn, close=True)
+    
+    def test_pre_ping_replaces_dead_connection(self):
+        """Тест проверки соединения перед выдачей."""
+        dead, alive = make_connection(), make_connection()
+        dead.cursor.return_value.__enter__.return_value.execute.side_effect = psycopg2.OperationalError()
+        self.pool.getconn.side_effect = [dead, alive]
+        db = self.make_db(pool_pre_ping=True)
+        
+        with db.get_connection() as c:
+            self.assertIs(c, alive)
+        
+        self.pool.putconn.assert_any_call(dead, close=True)
+    
+    @patch('weather.database.time.monotonic')
+    def test_max_lifetime(self, mock_monotonic):
+        """Тест пересоздания соединения, превысившего максимальный срок жизни."""
+        old, fresh = make_connection(), make_connection()
+        self.pool.getconn.side_effect = [old, old, fresh]
+        db = self.make_db(pool_max_lifetime=60)
+        
+        mock_monotonic.return_value = 1000
+        with db.get_connection():
+            pass
+        
+        mock_monotonic.return_value = 1061
+        with db.get_connection() as c:
+            self.assertIs(c, fresh)
+        self.pool.putconn.assert_any_call(old, close=True)
+    
+    def test_pool_timeout(self):
+        """Тест ожидания свободного соединения при исчерпанном пуле."""
+        self.pool.getconn.side_effect = lambda: make_connection()
+        db = self.make_db(pool_max=1, pool_timeout=0.05)
+        
+        with db.get_connection():
+            errors = []
+            
+            def worker():
+                try:
+                    with db.get_connection():
+                        pass
+                except pg_pool.PoolError as e:
+                    errors.append(e)
+            
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+        
+        self.assertEqual(len(errors), 1)
+        
+        # После освобождения соединение снова доступно
+        with db.get_connection():
+            pass
+    
+    def test_close(self):
+        """Тест закрытия всех соединений пула."""
+        self.pool.getconn.return_value = make_connection()
+        db = self.make_db()
+        with db.get_connection():
+            pass
+        
+        db.close()
+        
+        self.pool.closeall.assert_called_once()
+    
+    def test_save_weather_data_uses_pool(self):
+        """Тест: сохранение погоды берет соединение из пула."""
+        conn = make_connection()
+        self.pool.getconn.return_value = conn
+        db = self.make_db()
+        patch('weather.database.execute_values', fake_execute_values([MOSCOW])).start()
+        
+        db.save_weather_data({
+            "city": "Moscow",
+            "latitude": 55.75,
+            "longitude": 37.61,
+            "current_weather": {"temperature": 20, "windspeed": 10, "winddirection": 180, "time": "2023-10-01T12:00"}
+        })
+        
+        self.pool.getconn.assert_called_once()
+        self.pool.putconn.assert_called_once_with(conn)
+        conn.commit.assert_called()
+        self.assertEqual(db._location_ids, {("Moscow", 55.75, 37.61): 7})
+
+
+MOSCOW = {"id": 7, "city_name": "Moscow", "latitude": 55.75, "longitude": 37.61}
+PARIS = {"id": 8, "city_name": "Paris", "latitude": 48.85, "longitude": 2.35}
+
+
+def fake_execute_values(locations, unchanged=()):
+    """
+    Поддельный execute_values: upsert местоположений возвращает их ID,
+    upsert записей — только записи, значения которых изменились.
+    
+    Args:
+        locations: Строки таблицы locations
+        unchanged: Пары (location_id, temperature), уже сохраненные с теми же значениями
+    """
+    def execute(cursor, sql, rows, **kwargs):
+        if "INSERT INTO locations" in sql:
+            keys = set(rows)
+            return [row for row in locations if (row["city_name"], row["latitude"], row["longitude"]) in keys]
+        if "INSERT INTO weather_records" in sql:
+            return [
+                {"location_id": row[0], "weather_time": datetime.fromisoformat(row[4])}
+                for row in rows if row[:2] not in unchanged
+            ]
+        return None
+    return MagicMock(side_effect=execute)
+
+
+class TestBatchIngest(unittest.TestCase):
+    """Тесты пакетного сохранения записей о погоде."""
+    
+    def setUp(self):
+        pool_class = patch('weather.database.pg_pool.ThreadedConnectionPool').start()
+        self.conn = make_connection()
+        pool_class.return_value.getconn.return_value = self.conn
+        self.execute_values = patch('weather.database.execute_values', fake_execute_values([MOSCOW, PARIS])).start()
+        self.refresh_rollups = patch.object(WeatherDatabase, '_refresh_rollups').start()
+        self.addCleanup(patch.stopall)
+        self.db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+    
+    def payload(self, city, lat, lon, temperature, time="2023-10-01T12:00"):
+        return {
+            "city": city,
+            "latitude": lat,
+            "longitude": lon,
+            "current_weather": {"temperature": temperature, "windspeed": 5, "winddirection": 90, "time": time}
+        }
+    
+    def calls(self, marker):
+        """Аргументы вызовов execute_values, SQL которых содержит marker."""
+        return [c[0] for c in self.execute_values.call_args_list if marker in c[0][1]]
+    
+    def test_save_weather_batch_single_transaction(self):
+        """Тест: местоположения создаются одним upsert, записи вставляются одним вызовом."""
+        payloads = [
+            self.payload("Moscow", 55.75, 37.61, 20),
+            self.payload("Paris", 48.85, 2.35, 15),
+            self.payload("Moscow", 55.75, 37.61, 21, time="2023-10-01T12:15"),
+            {"city": "Broken"},
+        ]
+        
+        self.assertEqual(self.db.save_weather_batch(payloads), 3)
+        
+        self.assertEqual(self.execute_values.call_count, 2)
+        (upsert_args,) = self.calls("INSERT INTO locations")
+        (records_args,) = self.calls("INSERT INTO weather_records")
+        self.assertIn("ON CONFLICT (city_name, latitude, longitude)", upsert_args[1])
+        self.assertEqual(upsert_args[2], [("Moscow", 55.75, 37.61), ("Paris", 48.85, 2.35)])
+        self.assertEqual([row[:2] for row in records_args[2]], [(7, 20), (8, 15), (7, 21)])
+        self.conn.commit.assert_called()
+        
+        # Агрегаты пересчитываются для затронутых пар (location_id, day)
+        pairs = self.refresh_rollups.call_args[0][1]
+        self.assertEqual(sorted(set(pairs)), [(7, date(2023, 10, 1)), (8, date(2023, 10, 1))])
+    
+    def test_duplicate_time_in_batch_keeps_last(self):
+        """Тест: повтор (location_id, weather_time) в пакете записывается один раз, последним значением."""
+        payloads = [self.payload("Moscow", 55.75, 37.61, 20), self.payload("Moscow", 55.75, 37.61, 22)]
+        
+        self.assertEqual(self.db.save_weather_batch(payloads), 1)
+        
+        (records_args,) = self.calls("INSERT INTO weather_records")
+        self.assertEqual([row[:2] for row in records_args[2]], [(7, 22)])
+        self.assertIn("ON CONFLICT (location_id, weather_time)", records_args[1])
+        self.assertIn("IS DISTINCT FROM", records_args[1])
+    
+    def test_recorded_at_carried_through(self):
+        """Тест: переданное время записи (загрузка архива) сохраняется, без него — текущее."""
+        archived = dict(self.payload("Moscow", 55.75, 37.61, 20), recorded_at="2023-10-03T00:00:00")
+        
+        self.db.save_weather_batch([archived, self.payload("Paris", 48.85, 2.35, 15)])
+        
+        (records_args,) = self.calls("INSERT INTO weather_records")
+        self.assertEqual([row[5] for row in records_args[2]], ["2023-10-03T00:00:00", None])
+        self.assertIn("COALESCE(%s::TIMESTAMP, CURRENT_TIMESTAMP)", self.execute_values.call_args[1]["template"])
+    
+    def test_unchanged_records_skip_rollups(self):
+        """Тест: запись без изменений не учитывается и не пересчитывает агрегаты."""
+        patch('weather.database.execute_values', fake_execute_values([MOSCOW], unchanged={(7, 20)})).start()
+        
+        self.assertEqual(self.db.save_weather_batch([self.payload("Moscow", 55.75, 37.61, 20)]), 0)
+        self.assertEqual(self.refresh_rollups.call_args[0][1], [])
+    
+    def test_location_ids_cached_after_commit(self):
+        """Тест: повторное сохранение для города не запрашивает местоположение."""
+        self.db.save_weather_batch([self.payload("Moscow", 55.75, 37.61, 20)])
+        self.db.save_weather_batch([self.payload("Moscow", 55.75, 37.61, 21)])
+        
+        self.assertEqual(len(self.calls("INSERT INTO locations")), 1)
+        self.assertEqual(self.calls("INSERT INTO weather_records")[-1][2][0][:2], (7, 21))
+    
+    def test_save_weather_data_uses_location_cache(self):
+        """Тест: save_weather_data берет ID местоположения и секцию из кэша процесса."""
+        cursor = self.conn.cursor.return_value.__enter__.return_value
+        
+        self.db.save_weather_data(self.payload("Moscow", 55.75, 37.61, 20))
+        self.db.save_weather_data(self.payload("Moscow", 55.75, 37.61, 21))
+        
+        self.assertEqual(len(self.calls("INSERT INTO locations")), 1)
+        self.assertEqual(len(self.calls("INSERT INTO weather_records")), 2)
+        # Секция месяца проверяется один раз
+        self.assertEqual(cursor.execute.call_count, 1)
+    
+    def test_location_cache_cleared_on_error(self):
+        """Тест: после ошибки записи кэш ID местоположений сбрасывается."""
+        self.db.save_weather_batch([self.payload("Moscow", 55.75, 37.61, 20)])
+        self.assertEqual(len(self.db._location_ids), 1)
+        
+        self.execute_values.side_effect = psycopg2.IntegrityError("violates foreign key constraint")
+        self.assertEqual(self.db.save_weather_batch([self.payload("Moscow", 55.75, 37.61, 21)]), 0)
+        
+        self.assertEqual(self.db._location_ids, {})
+    
+    def test_save_weather_batch_empty(self):
+        """Тест: пустой пакет не обращается к БД."""
+        self.assertEqual(self.db.save_weather_batch([]), 0)
+        self.execute_values.assert_not_called()
+    
+    def test_save_weather_batch_error(self):
+        """Тест: ошибка БД логируется и не пробрасывается."""
+        self.execute_values.side_effect = psycopg2.DatabaseError("boom")
+        
+        self.assertEqual(self.db.save_weather_batch([self.payload("Moscow", 55.75, 37.61, 20)]), 0)
+        self.conn.rollback.assert_called()
+
+
+class TestPartitions(unittest.TestCase):
+    """Тесты помесячных секций weather_records."""
+    
+    def setUp(self):
+        pool_class = patch('weather.database.pg_pool.ThreadedConnectionPool').start()
+        self.conn = make_connection()
+        pool_class.return_value.getconn.return_value = self.conn
+        self.cursor = self.conn.cursor.return_value.__enter__.return_value
+        self.addCleanup(patch.stopall)
+        self.db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False, retention_months=3))
+    
+    def test_ensure_partitions_once_per_month(self):
+        """Тест: секция каждого месяца проверяется один раз."""
+        months = self.db._ensure_partitions(
+            self.cursor, ["2023-10-01T12:00", "2023-10-15T00:15", "2023-11-01T00:00"]
+        )
+        
+        self.assertEqual(months, {datetime(2023, 10, 1), datetime(2023, 11, 1)})
+        self.assertEqual(
+            [c[0][1] for c in self.cursor.execute.call_args_list],
+            [(datetime(2023, 10, 1),), (datetime(2023, 11, 1),)]
+        )
+        
+        self.db._partitions.update(months)
+        self.cursor.execute.reset_mock()
+        self.db._ensure_partitions(self.cursor, ["2023-10-20T10:00"])
+        self.cursor.execute.assert_not_called()
+    
+    @patch('weather.database.date')
+    def test_drop_old_partitions(self, mock_date):
+        """Тест удаления секций старше срока хранения."""
+        mock_date.today.return_value = date(2024, 2, 17)
+        self.cursor.fetchall.return_value = [
+            {"name": "weather_records_2023_10"},
+            {"name": "weather_records_2023_11"},
+            {"name": "weather_records_2023_12"},
+            {"name": "weather_records_2024_02"},
+            {"name": "weather_records_legacy"},
+        ]
+        
+        dropped = self.db.drop_old_partitions()
+        
+        self.assertEqual(dropped, ["weather_records_2023_10"])
+        self.assertEqual(self.cursor.execute.call_count, 3)
+        self.cursor.execute.assert_called_with(
+            "DELETE FROM weather_daily_rollups WHERE day < %s", (date(2023, 11, 1),)
+        )
+    
+    def test_drop_old_partitions_disabled(self):
+        """Тест: без срока хранения секции не удаляются."""
+        self.assertEqual(self.db.drop_old_partitions(retention_months=0), [])
+        self.conn.cursor.assert_not_called()
+
+
+class TestRollups(unittest.TestCase):
+    """Тесты дневных агрегатов weather_daily_rollups."""
+    
+    def setUp(self):
+        pool_class = patch('weather.database.pg_pool.ThreadedConnectionPool').start()
+        self.conn = make_connection()
+        pool_class.return_value.getconn.return_value = self.conn
+        self.cursor = self.conn.cursor.return_value.__enter__.return_value
+        self.addCleanup(patch.stopall)
+        self.db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+    
+    @patch('weather.database.execute_values')
+    def test_refresh_touched_pairs(self, mock_execute_values):
+        """Тест пересчета агрегатов только для затронутых пар."""
+        self.db._refresh_rollups(self.cursor, {(2, date(2023, 10, 2)), (1, date(2023, 10, 1))})
+        
+        args, kwargs = mock_execute_values.call_args
+        self.assertIn("INSERT INTO weather_daily_rollups", args[1])
+        self.assertIn("ON CONFLICT (location_id, day) DO UPDATE", args[1])
+        self.assertEqual(args[2], [(1, date(2023, 10, 1)), (2, date(2023, 10, 2))])
+        
+        # Перед пересчетом берутся блокировки местоположений по возрастанию ID
+        lock_sql, lock_params = self.cursor.execute.call_args[0]
+        self.assertIn("pg_advisory_xact_lock", lock_sql)
+        self.assertEqual(lock_params[1], [1, 2])
+        
+        mock_execute_values.reset_mock()
+        self.cursor.execute.reset_mock()
+        self.db._refresh_rollups(self.cursor, [])
+        mock_execute_values.assert_not_called()
+        self.cursor.execute.assert_not_called()
+    
+    def test_full_refresh(self):
+        """Тест полного пересчета агрегатов за период."""
+        self.cursor.rowcount = 12
+        
+        self.assertEqual(self.db.refresh_rollups(days=30), 12)
+        
+        delete_sql, insert_sql = [c[0][0] for c in self.cursor.execute.call_args_list]
+        self.assertIn("DELETE FROM weather_daily_rollups", delete_sql)
+        self.assertIn("FROM weather_records", insert_sql)
+        # Агрегат, записанный параллельной вставкой между DELETE и INSERT, не вызывает ошибку
+        self.assertIn("ON CONFLICT (location_id, day) DO UPDATE", insert_sql)
+        self.assertEqual(self.cursor.execute.call_args[0][1], {"days": 30})
+        self.conn.commit.assert_called()
+    
+    def test_stats_read_rollups(self):
+        """Тест: статистика считается по дневным агрегатам, а не по сырым записям."""
+        self.cursor.fetchone.return_value = {
+            "avg_temp": 20, "max_temp": 25, "min_temp": 15, "avg_wind": 5, "records_count": 48
+        }
+        
+        stats = self.db.get_weather_stats("Moscow", days=7)
+        
+        self.assertEqual(stats["records_count"], 48)
+        sql, params = self.cursor.execute.call_args[0]
+        self.assertIn("FROM weather_daily_rollups", sql)
+        self.assertNotIn("weather_records", sql)
+        self.assertEqual(params, ("Moscow", 7))
+
+
+class TestHistory(unittest.TestCase):
+    """Тесты чтения истории погоды."""
+    
+    @patch('weather.database.pg_pool.ThreadedConnectionPool')
+    def test_recent_weather_top_n_per_location(self, pool_class):
+        """Тест: история выбирается top-N запросом по каждому местоположению."""
+        conn = make_connection()
+        pool_class.return_value.getconn.return_value = conn
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [{"temperature": 20, "city_name": "Moscow"}]
+        db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+        
+        records = db.get_recent_weather("Moscow", limit=5)
+        
+        self.assertEqual(records, [{"temperature": 20, "city_name": "Moscow"}])
+        sql, params = cursor.execute.call_args[0]
+        self.assertIn("CROSS JOIN LATERAL", sql)
+        self.assertEqual(params, (5, "Moscow", 5))
+    
+    @patch('weather.database.pg_pool.ThreadedConnectionPool')
+    def test_export_streams_through_named_cursor(self, pool_class):
+        """Тест: выгрузка читает историю порциями через серверный курсор."""
+        conn = make_connection()
+        pool_class.return_value.getconn.return_value = conn
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchmany.side_effect = [
+            [{"city_name": "Moscow", "temperature": 1}, {"city_name": "Moscow", "temperature": 2}],
+            [{"city_name": "Moscow", "temperature": 3}],
+            [],
+        ]
+        db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+        
+        rows = db.iter_weather_history("Moscow", chunk_size=2)
+        conn.cursor.assert_not_called()
+        
+        self.assertEqual([row["temperature"] for row in rows], [1, 2, 3])
+        conn.cursor.assert_called_once_with(name="weather_history_export")
+        self.assertEqual(cursor.itersize, 2)
+        cursor.fetchall.assert_not_called()
+        cursor.fetchmany.assert_called_with(2)
+        sql, params = cursor.execute.call_args[0]
+        self.assertIn("WHERE l.city_name = %s", sql)
+        self.assertEqual(params, ("Moscow",))
+        conn.commit.assert_called_once()
+    
+    @patch('weather.database.pg_pool.ThreadedConnectionPool')
+    def test_export_all_cities(self, pool_class):
+        """Тест: без города выгружается история всех городов."""
+        conn = make_connection()
+        pool_class.return_value.getconn.return_value = conn
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchmany.return_value = []
+        db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+        
+        self.assertEqual(list(db.iter_weather_history()), [])
+        
+        sql, params = cursor.execute.call_args[0]
+        self.assertNotIn("WHERE", sql)
+        self.assertEqual(params, ())
+    
+    @patch('weather.database.pg_pool.ThreadedConnectionPool')
+    def test_save_forecast_single_row_of_arrays(self, pool_class):
+        """Тест: прогноз сохраняется одной строкой с массивами переменных."""
+        conn = make_connection()
+        pool_class.return_value.getconn.return_value = conn
+        cursor = conn.cursor.return_value.__enter__.return_value
+        db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+        db._location_ids[("Moscow", 55.75, 37.61)] = 7
+        forecast = MagicMock(city="Moscow", latitude=55.75, longitude=37.61,
+                             hourly_start=datetime(2023, 10, 1), step_minutes=60,
+                             utc_offset_seconds=0, daily_start=datetime(2023, 10, 1), hours=2)
+        forecast.to_lists.return_value = {"temperature": [1.0, None], "temp_max": [2.0]}
+        
+        db.save_forecast(forecast)
+        
+        cursor.execute.assert_called_once()
+        sql, params = cursor.execute.call_args[0]
+        self.assertIn("INSERT INTO weather_forecasts", sql)
+        self.assertEqual(params["location_id"], 7)
+        self.assertEqual(params["temperature"], [1.0, None])
+        self.assertEqual(params["daily_start"], date(2023, 10, 1))
+        conn.commit.assert_called()
+    
+    @patch('weather.database.pg_pool.ThreadedConnectionPool')
+    def test_history_columns_for_analytics(self, pool_class):
+        """Тест: история для аналитики читается порциями кортежей для всех городов сразу."""
+        conn = make_connection()
+        pool_class.return_value.getconn.return_value = conn
+        cursor = conn.cursor.return_value.__enter__.return_value
+        chunk = [("Moscow", datetime(2023, 10, 1), 20.0, 5.0, 180.0)]
+        cursor.fetchmany.side_effect = [chunk, []]
+        db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+        
+        self.assertEqual(list(db.iter_history_columns(["Moscow", "Paris"], days=30)), [chunk])
+        
+        self.assertEqual(conn.cursor.call_args[1]["name"], "weather_history_columns")
+        sql, params = cursor.execute.call_args[0]
+        self.assertIn("ANY(%s)", sql)
+        # Те же календарные дни, что у статистики по агрегатам
+        self.assertIn("weather_time >= CURRENT_DATE - %s", sql)
+        self.assertEqual(params, (["Moscow", "Paris"], 30))
@@ -0,0 +1,87 @@
+"""
+Тесты для модуля выгрузки истории погоды.
+"""
+
+import unittest
+import sys
+import os
+import csv
+import json
+from io import StringIO
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime
+from decimal import Decimal
+
+from weather.export import detect_format, write_history
+
+
+ROW = {
+    "city_name": "Moscow",
+    "latitude": Decimal("55.750000"),
+    "longitude": Decimal("37.610000"),
+    "weather_time": datetime(2023, 10, 1, 12, 0),
+    "temperature": Decimal("20.50"),
+    "wind_speed": Decimal("10.00"),
+    "wind_direction": 180,
+    "recorded_at": datetime(2023, 10, 1, 12, 5),
+}
+
+
+class TestExport(unittest.TestCase):
+    """Тесты выгрузки в CSV и NDJSON."""
+    
+    def test_detect_format(self):
+        """Тест определения формата по расширению файла."""
+        self.assertEqual(detect_format("history.csv"), "csv")
+        self.assertEqual(detect_format("history.ndjson"), "ndjson")
+        self.assertEqual(detect_format("history.jsonl"), "ndjson")
+        self.assertEqual(detect_format("-"), "csv")
+        self.assertEqual(detect_format("history.csv", "ndjson"), "ndjson")
+        self.assertEqual(detect_format("archive.parquet/"), "parquet")
+        self.assertEqual(detect_format("archive.arrow"), "arrow")
+    
+    def test_write_csv(self):
+        """Тест: CSV с заголовком и строкой на запись."""
+        out = StringIO()
+        
+        count = write_history(iter([ROW, ROW]), out, "csv")
+        
+        self.assertEqual(count, 2)
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["city_name"], "Moscow")
+        self.assertEqual(rows[0]["temperature"], "20.5")
+        self.assertEqual(rows[0]["weather_time"], "2023-10-01T12:00:00")
+    
+    def test_write_ndjson(self):
+        """Тест: NDJSON — один JSON-объект на строку, Decimal и datetime приведены."""
+        out = StringIO()
+        
+        count = write_history(iter([ROW]), out, "ndjson")
+        
+        self.assertEqual(count, 1)
+        record = json.loads(out.getvalue().splitlines()[0])
+        self.assertEqual(record["temperature"], 20.5)
+        self.assertEqual(record["wind_direction"], 180)
+        self.assertEqual(record["recorded_at"], "2023-10-01T12:05:00")
+    
+    def test_rows_consumed_lazily(self):
+        """Тест: строки пишутся по мере чтения, итератор не материализуется."""
+        out = StringIO()
+        written = []
+        
+        def rows():
+            for i in range(3):
+                # К моменту выдачи следующей строки предыдущая уже записана
+                written.append(out.getvalue().count("\n"))
+                yield dict(ROW, wind_direction=i)
+        
+        write_history(rows(), out, "ndjson")
+        
+        self.assertEqual(written, [0, 1, 2])
+    
+    def test_unknown_format(self):
+        """Тест: неизвестный формат вызывает ValueError."""
+        with self.assertRaises(ValueError):
+            write_history(iter([]), StringIO(), "xml")
@@ -0,0 +1,130 @@
+"""
+Тесты для модуля прогноза на массивах NumPy.
+"""
+
+import unittest
+import sys
+import os
+import json
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime
+
+from weather import forecast as forecast_module
+from weather.forecast import Forecast, parse_forecast
+
+
+def make_response(hours=48, with_daily=True):
+    """Ответ Open-Meteo с почасовым (и дневным) прогнозом с 2023-10-01 00:00."""
+    data = {
+        "city": "Moscow",
+        "latitude": 55.75,
+        "longitude": 37.61,
+        "utc_offset_seconds": 10800,
+        "hourly": {
+            "time": [f"2023-10-{1 + i // 24:02d}T{i % 24:02d}:00" for i in range(hours)],
+            "temperature_2m": [float(i % 24) for i in range(hours)],
+            "precipitation": [0.5 if i in (3, 30) else 0.0 for i in range(hours)],
+            "wind_speed_10m": [10.0 + i for i in range(hours)],
+            "wind_direction_10m": [180] * (hours - 1) + [None],
+        },
+    }
+    if with_daily:
+        data["daily"] = {
+            "time": ["2023-10-01", "2023-10-02"],
+            "temperature_2m_max": [23.0, 23.0],
+            "temperature_2m_min": [0.0, 0.0],
+            "precipitation_sum": [0.5, 0.5],
+            "wind_speed_10m_max": [33.0, 57.0],
+        }
+    return data
+
+
+@unittest.skipIf(forecast_module.np is None, "numpy не установлен")
+class TestForecast(unittest.TestCase):
+    """Тесты прогноза."""
+    
+    def test_parse_typed_arrays(self):
+        """Тест: переменные хранятся массивами float32, время — началом и шагом."""
+        forecast = parse_forecast(make_response())
+        
+        self.assertEqual(forecast.hours, 48)
+        self.assertEqual(forecast.step_minutes, 60)
+        self.assertEqual(forecast.hourly_start, datetime(2023, 10, 1))
+        self.assertEqual(forecast.hourly["temperature"].dtype, forecast_module.np.float32)
+        self.assertTrue(forecast_module.np.isnan(forecast.hourly["wind_direction"][-1]))
+        self.assertEqual(str(forecast.times[25]), "2023-10-02T01:00")
+    
+    def test_irregular_step(self):
+        """Тест: неравномерный почасовой ряд отклоняется."""
+        data = make_response(hours=3)
+        data["hourly"]["time"][2] = "2023-10-01T05:00"
+        
+        with self.assertRaises(ValueError):
+            parse_forecast(data)
+    
+    def test_summary_next_hours(self):
+        """Тест: сводка по окну ближайших часов начиная с текущего часа."""
+        forecast = parse_forecast(make_response())
+        
+        summary = forecast.summary(hours=6, now=datetime(2023, 10, 1, 2, 30))
+        
+        self.assertEqual(summary["start"], "2023-10-01T02:00")
+        self.assertEqual(summary["end"], "2023-10-01T07:00")
+        self.assertEqual(summary["hours"], 6)
+        self.assertEqual(summary["temp_min"], 2.0)
+        self.assertEqual(summary["temp_max"], 7.0)
+        self.assertEqual(summary["temp_mean"], 4.5)
+        self.assertEqual(summary["precipitation_total"], 0.5)
+        self.assertEqual(summary["precipitation_hours"], 1)
+        self.assertEqual(summary["wind_max"], 17.0)
+    
+    def test_summary_after_forecast_end(self):
+        """Тест: окно за пределами прогноза пустое."""
+        forecast = parse_forecast(make_response())
+        
+        summary = forecast.summary(now=datetime(2023, 10, 5))
+        
+        self.assertEqual(summary["hours"], 0)
+        self.assertIsNone(summary["temp_max"])
+    
+    def test_daily_summary_from_api(self):
+        """Тест: дневная сводка из дневного ряда API."""
+        days = parse_forecast(make_response()).daily_summary()
+        
+        self.assertEqual([d["day"] for d in days], ["2023-10-01", "2023-10-02"])
+        self.assertEqual(days[1]["wind_max"], 57.0)
+    
+    def test_daily_summary_from_hourly(self):
+        """Тест: без дневного ряда сводка считается из почасового по дням."""
+        days = parse_forecast(make_response(with_daily=False)).daily_summary()
+        
+        self.assertEqual(days, [
+            {"day": "2023-10-01", "temp_max": 23.0, "temp_min": 0.0, "precipitation_sum": 0.5, "wind_max": 33.0},
+            {"day": "2023-10-02", "temp_max": 23.0, "temp_min": 0.0, "precipitation_sum": 0.5, "wind_max": 57.0},
+        ])
+    
+    def test_cache_roundtrip_is_compact(self):
+        """Тест: представление для кэша восстанавливается и меньше исходного ответа."""
+        response = make_response(hours=168)
+        forecast = parse_forecast(response)
+        
+        stored = forecast.to_dict()
+        restored = Forecast.from_dict(json.loads(json.dumps(stored)))
+        
+        self.assertLess(len(json.dumps(stored)), len(json.dumps(response)))
+        self.assertEqual(restored.hourly_start, forecast.hourly_start)
+        self.assertEqual(restored.utc_offset_seconds, 10800)
+        self.assertEqual(
+            restored.summary(now=datetime(2023, 10, 3)),
+            forecast.summary(now=datetime(2023, 10, 3))
+        )
+        self.assertEqual(restored.daily_summary(), forecast.daily_summary())
+    
+    def test_to_lists_for_database(self):
+        """Тест: ряды для БД — списки чисел, NaN заменен на None."""
+        lists = parse_forecast(make_response()).to_lists()
+        
+        self.assertEqual(lists["temperature"][:3], [0.0, 1.0, 2.0])
+        self.assertIsNone(lists["wind_direction"][-1])
+        self.assertEqual(lists["wind_max"], [33.0, 57.0])
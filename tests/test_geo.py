@@ -0,0 +1,56 @@
+"""
+Тесты для модуля квантования координат.
+"""
+
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from weather.config import SpatialConfig
+from weather.geo import snap_to_grid, geohash_encode, geohash_decode, quantize
+
+
+class TestGeo(unittest.TestCase):
+    """Тесты для модуля квантования координат."""
+    
+    def test_snap_to_grid_nearby_points(self):
+        """Тест: близкие точки попадают в один узел сетки."""
+        self.assertEqual(snap_to_grid(55.7558, 37.6173, 0.01), (55.76, 37.62))
+        self.assertEqual(snap_to_grid(55.7559, 37.6173, 0.01), (55.76, 37.62))
+    
+    def test_snap_to_grid_coarse_step(self):
+        """Тест сетки с крупным шагом."""
+        self.assertEqual(snap_to_grid(55.7558, -37.6173, 0.25), (55.75, -37.5))
+    
+    def test_geohash_encode_known_value(self):
+        """Тест кодирования geohash на известном примере."""
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+    
+    def test_geohash_decode_roundtrip(self):
+        """Тест декодирования geohash в центр ячейки."""
+        lat, lon = geohash_decode("u4pruydqqvj")
+        self.assertAlmostEqual(lat, 57.64911, places=4)
+        self.assertAlmostEqual(lon, 10.40744, places=4)
+    
+    def test_quantize_schemes(self):
+        """Тест выбора схемы квантования."""
+        self.assertEqual(quantize(55.7558, 37.6173, SpatialConfig(scheme="none")), (55.7558, 37.6173))
+        self.assertEqual(quantize(55.7558, 37.6173, SpatialConfig(scheme="grid", grid_step=0.1)), (55.8, 37.6))
+        
+        config = SpatialConfig(scheme="geohash", geohash_precision=5)
+        self.assertEqual(quantize(55.7558, 37.6173, config), quantize(55.7601, 37.6205, config))
+    
+    def test_quantize_unknown_scheme(self):
+        """Тест неизвестной схемы квантования."""
+        with self.assertRaises(ValueError):
+            quantize(55.75, 37.61, SpatialConfig(scheme="hexagon"))
+    
+    def test_invalid_grid_step(self):
+        """Тест: нулевой или отрицательный шаг сетки отклоняется понятной ошибкой."""
+        for step in (0, -0.01):
+            with self.subTest(step=step):
+                with self.assertRaisesRegex(ValueError, "COORD_GRID_STEP"):
+                    SpatialConfig(scheme="grid", grid_step=step)
+                with self.assertRaisesRegex(ValueError, "Шаг сетки"):
+                    snap_to_grid(55.75, 37.61, step)
@@ -0,0 +1,49 @@
+"""
+Тесты для модуля общей HTTP-сессии.
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from weather import http
+from weather.config import HttpConfig
+
+
+class TestHttp(unittest.TestCase):
+    """Тесты для модуля общей HTTP-сессии."""
+    
+    def tearDown(self):
+        http.close_session()
+    
+    def test_get_session_is_shared(self):
+        """Тест переиспользования одной сессии."""
+        self.assertIs(http.get_session(), http.get_session())
+    
+    def test_close_session_creates_new_one(self):
+        """Тест пересоздания сессии после закрытия."""
+        first = http.get_session()
+        http.close_session()
+        self.assertIsNot(http.get_session(), first)
+    
+    def test_create_session_pool_sizes(self):
+        """Тест настройки размеров пула соединений."""
+        session = http.create_session(HttpConfig(pool_connections=3, pool_maxsize=32, max_retries=2))
+        adapter = session.get_adapter("https://api.open-meteo.com")
+        
+        self.assertEqual(adapter._pool_connections, 3)
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertEqual(adapter.max_retries.total, 2)
+        session.close()
+    
+    def test_http_get_uses_shared_session(self):
+        """Тест выполнения запроса через общую сессию с таймаутом по умолчанию."""
+        session = MagicMock()
+        with patch('weather.http.get_session', return_value=session):
+            http.http_get("https://example.org", params={"a": 1})
+        
+        session.get.assert_called_once_with(
+            "https://example.org", params={"a": 1}, headers=None, timeout=http.HTTP_CONFIG.timeout
+        )
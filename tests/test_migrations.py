@@ -0,0 +1,152 @@
+"""
+Тесты для версионированных миграций схемы.
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import psycopg2
+
+from weather.config import DatabaseConfig
+from weather.database import WeatherDatabase
+from weather.migrations import (
+    get_schema_version, apply_migrations, migrate, MIGRATIONS, SCHEMA_VERSION, MIGRATION_LOCK_ID
+)
+
+
+class FakeCursor:
+    """Курсор, который запоминает SQL и эмулирует таблицу schema_migrations."""
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self._result = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql.strip())
+        if "MAX(version)" in sql:
+            if self.conn.versions is None:
+                raise psycopg2.errors.UndefinedTable("relation \"schema_migrations\" does not exist")
+            self._result = [{"version": max(self.conn.versions, default=None)}]
+        elif sql.strip().startswith("CREATE TABLE IF NOT EXISTS schema_migrations"):
+            if self.conn.versions is None:
+                self.conn.versions = set()
+        elif sql.startswith("SELECT version FROM schema_migrations"):
+            self._result = [{"version": v} for v in sorted(self.conn.versions)]
+        elif sql.startswith("INSERT INTO schema_migrations"):
+            self.conn.versions.add(params[0])
+    
+    def fetchone(self):
+        return self._result[0] if self._result else None
+    
+    def fetchall(self):
+        return list(self._result)
+
+
+class FakeConnection:
+    """Соединение с поддельным курсором."""
+    
+    def __init__(self, versions=None):
+        self.versions = versions
+        self.executed = []
+        self.commit = MagicMock()
+        self.rollback = MagicMock()
+    
+    def cursor(self):
+        return FakeCursor(self)
+
+
+class TestMigrations(unittest.TestCase):
+    """Тесты для модуля миграций."""
+    
+    def test_schema_version_without_table(self):
+        """Тест версии схемы до первой миграции."""
+        conn = FakeConnection()
+        
+        self.assertEqual(get_schema_version(conn), 0)
+        conn.rollback.assert_called_once()
+    
+    def test_migrate_fresh_database(self):
+        """Тест применения всех миграций на пустой БД."""
+        conn = FakeConnection()
+        
+        applied = migrate(conn)
+        
+        self.assertEqual(applied, [m[0] for m in MIGRATIONS])
+        self.assertEqual(get_schema_version(conn), SCHEMA_VERSION)
+        self.assertIn("SELECT pg_advisory_xact_lock(%s)", conn.executed)
+        conn.commit.assert_called_once()
+    
+    def test_up_to_date_runs_only_version_check(self):
+        """Тест: актуальная схема проверяется одним запросом без DDL."""
+        conn = FakeConnection(versions={m[0] for m in MIGRATIONS})
+        
+        self.assertEqual(migrate(conn), [])
+        self.assertEqual(len(conn.executed), 1)
+        conn.commit.assert_not_called()
+    
+    def test_applies_only_missing_in_order(self):
+        """Тест применения только недостающих миграций по возрастанию версии."""
+        migrations = [(3, "c", "SELECT 3"), (1, "a", "SELECT 1"), (2, "b", "SELECT 2")]
+        conn = FakeConnection(versions={1})
+        
+        self.assertEqual(apply_migrations(conn, migrations), [2, 3])
+        ddl = [sql for sql in conn.executed if sql in ("SELECT 1", "SELECT 2", "SELECT 3")]
+        self.assertEqual(ddl, ["SELECT 2", "SELECT 3"])
+    
+    def test_versions_are_unique_and_increasing(self):
+        """Тест: версии миграций уникальны и идут по порядку."""
+        versions = [m[0] for m in MIGRATIONS]
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertNotEqual(MIGRATION_LOCK_ID, 0)
+
+
+class TestInitDb(unittest.TestCase):
+    """Тесты для WeatherDatabase.init_db."""
+    
+    @patch('weather.database.migrate', return_value=[])
+    @patch('weather.database.pg_pool.ThreadedConnectionPool')
+    def test_version_checked_once_per_process(self, mock_pool, mock_migrate):
+        """Тест: схема проверяется один раз за время жизни процесса."""
+        mock_pool.return_value.getconn.return_value = MagicMock(closed=0)
+        db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+        
+        db.init_db()
+        db.init_db()
+        
+        mock_migrate.assert_called_once()
+    
+    @patch('weather.database.migrate', side_effect=psycopg2.OperationalError("connection refused"))
+    @patch('weather.database.pg_pool.ThreadedConnectionPool')
+    def test_retry_after_failure(self, mock_pool, mock_migrate):
+        """Тест: после ошибки проверка схемы повторяется при следующем вызове."""
+        mock_pool.return_value.getconn.return_value = MagicMock(closed=0)
+        db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+        
+        db.init_db()
+        db.init_db()
+        
+        self.assertEqual(mock_migrate.call_count, 2)
+    
+    @patch('weather.database.migrate', side_effect=psycopg2.errors.InsufficientPrivilege("must be owner of table locations"))
+    @patch('weather.database.pg_pool.ThreadedConnectionPool')
+    def test_not_ready_when_not_owner(self, mock_pool, mock_migrate):
+        """Тест: если таблицы принадлежат другому пользователю, схема не считается готовой."""
+        mock_pool.return_value.getconn.return_value = MagicMock(closed=0)
+        db = WeatherDatabase(DatabaseConfig(pool_pre_ping=False))
+        
+        with self.assertLogs('weather.database', level='ERROR') as logs:
+            db.init_db()
+        db.init_db()
+        
+        self.assertFalse(db._schema_ready)
+        self.assertEqual(mock_migrate.call_count, 2)
+        self.assertIn("OWNER TO", logs.output[0])
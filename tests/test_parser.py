@@ -44,4 +44,67 @@ class TestParser(unittest.TestCase):
         self.assertIsNone(args.city)
         self.assertIsNone(args.lat)
         self.assertIsNone(args.lon)
-        self.assertFalse(args.refresh)
\ No newline at end of file
+        self.assertFalse(args.refresh)
+    
+    def test_parser_batch_arguments(self):
+        """Тест парсера с аргументами пакетного режима."""
+        args = self.parser.parse_args(["--batch", "Moscow", "55.75,37.61", "--workers", "4"])
+        self.assertIsNone(args.city)
+        self.assertEqual(args.batch, ["Moscow", "55.75,37.61"])
+        self.assertIsNone(args.batch_file)
+        self.assertEqual(args.workers, 4)
+    
+    def test_parser_write_behind_flag(self):
+        """Тест флага отложенной записи в БД."""
+        self.assertTrue(self.parser.parse_args(["--write-behind"]).write_behind)
+        self.assertFalse(self.parser.parse_args([]).write_behind)
+    
+    def test_parser_export(self):
+        """Тест аргументов выгрузки истории."""
+        args = self.parser.parse_args(["Moscow", "--export", "history.csv", "--export-format", "ndjson"])
+        self.assertEqual(args.city, "Moscow")
+        self.assertEqual(args.export, "history.csv")
+        self.assertEqual(args.export_format, "ndjson")
+        self.assertIsNone(self.parser.parse_args([]).export)
+        self.assertEqual(self.parser.parse_args(["--import-history", "archive"]).import_history, "archive")
+    
+    def test_parser_forecast(self):
+        """Тест аргументов режима прогноза."""
+        self.assertIsNone(self.parser.parse_args([]).forecast)
+        self.assertEqual(self.parser.parse_args(["Moscow", "--forecast"]).forecast, 7)
+        args = self.parser.parse_args(["Moscow", "--forecast", "3", "--hours", "12"])
+        self.assertEqual(args.forecast, 3)
+        self.assertEqual(args.hours, 12)
+    
+    def test_parser_stats_analytics(self):
+        """Тест параметров расширенной статистики."""
+        args = self.parser.parse_args([
+            "Moscow", "--stats", "--days", "30", "--compare", "Paris", "Rome",
+            "--percentiles", "5,95", "--base-temp", "15.5", "--rolling", "3",
+        ])
+        self.assertEqual(args.days, 30)
+        self.assertEqual(args.compare, ["Paris", "Rome"])
+        self.assertEqual(args.percentiles, "5,95")
+        self.assertEqual(args.base_temp, 15.5)
+        self.assertEqual(args.rolling, 3)
+        
+        args = self.parser.parse_args(["Moscow", "--stats"])
+        self.assertEqual(args.days, 7)
+        self.assertIsNone(args.compare)
+    
+    def test_parser_per_request(self):
+        """Тест числа координат в одном запросе пакетного режима."""
+        self.assertEqual(self.parser.parse_args(["--batch", "Moscow", "--per-request", "100"]).per_request, 100)
+        # По умолчанию HTTP_BATCH_LOCATIONS подставляется в commands (кроме --async)
+        self.assertIsNone(self.parser.parse_args([]).per_request)
+    
+    def test_parser_prune_history_flag(self):
+        """Тест парсера с флагом удаления старой истории."""
+        self.assertTrue(self.parser.parse_args(["--prune-history"]).prune_history)
+        self.assertFalse(self.parser.parse_args([]).prune_history)
+    
+    def test_parser_refresh_rollups(self):
+        """Тест парсера с пересчетом дневных агрегатов."""
+        self.assertIsNone(self.parser.parse_args([]).refresh_rollups)
+        self.assertEqual(self.parser.parse_args(["--refresh-rollups"]).refresh_rollups, 0)
+        self.assertEqual(self.parser.parse_args(["--refresh-rollups", "30"]).refresh_rollups, 30)
@@ -0,0 +1,164 @@
+"""
+Тесты для отложенной записи в БД (write-behind).
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from weather.config import WriteBehindConfig
+from weather.writebehind import WriteBehindQueue
+
+
+class FakeDatabase:
+    """БД, которая запоминает пакеты и может быть недоступна."""
+    
+    def __init__(self):
+        self.batches = []
+        self.available = True
+        self.block = None  # threading.Event: запись ждет, пока событие не установлено
+        self.entered = threading.Event()  # устанавливается, когда поток начал запись
+    
+    def init_db(self):
+        pass
+    
+    def write_weather_batch(self, payloads):
+        self.entered.set()
+        if self.block is not None:
+            self.block.wait()
+        if not self.available:
+            raise ConnectionError("connection refused")
+        self.batches.append(list(payloads))
+        return len(payloads)
+    
+    @property
+    def written(self):
+        return [payload for batch in self.batches for payload in batch]
+
+
+class TestWriteBehind(unittest.TestCase):
+    """Тесты очереди отложенной записи."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.spool = os.path.join(self.tmp.name, "spool.jsonl")
+        self.db = FakeDatabase()
+    
+    def make_queue(self, **kwargs):
+        options = dict(batch_size=100, flush_interval=0.05, max_queue=100, exit_timeout=1,
+                       spool_file=self.spool, spool_max_bytes=1024 * 1024)
+        options.update(kwargs)
+        wb = WriteBehindQueue(self.db, WriteBehindConfig(**options))
+        self.addCleanup(wb.close)
+        return wb
+    
+    def read_spool(self):
+        with open(self.spool, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    
+    def test_writes_in_batches(self):
+        """Тест: показания пишутся пакетами не больше batch_size."""
+        wb = self.make_queue(batch_size=2)
+        for i in range(5):
+            wb.put({"i": i})
+        
+        self.assertTrue(wb.flush(timeout=5))
+        
+        self.assertEqual(self.db.written, [{"i": i} for i in range(5)])
+        self.assertTrue(all(len(batch) <= 2 for batch in self.db.batches))
+    
+    def test_put_does_not_wait_for_database(self):
+        """Тест: постановка в очередь не ждет медленную БД."""
+        self.db.block = threading.Event()
+        wb = self.make_queue()
+        
+        wb.put({"i": 1})
+        self.assertFalse(wb.flush(timeout=0.1))
+        
+        self.db.block.set()
+        self.assertTrue(wb.flush(timeout=5))
+        self.assertEqual(self.db.written, [{"i": 1}])
+    
+    def test_spool_when_database_down_and_replay(self):
+        """Тест: при недоступной БД показания уходят в файл и досылаются позже."""
+        self.db.available = False
+        wb = self.make_queue()
+        wb.put({"i": 1})
+        wb.flush(timeout=5)
+        
+        self.assertEqual(self.read_spool(), [{"i": 1}])
+        
+        self.db.available = True
+        wb.put({"i": 2})
+        wb.flush(timeout=5)
+        
+        self.assertEqual(sorted(p["i"] for p in self.db.written), [1, 2])
+        self.assertFalse(os.path.exists(self.spool))
+    
+    def test_spool_is_bounded(self):
+        """Тест: резервный файл не растет больше spool_max_bytes."""
+        self.db.available = False
+        wb = self.make_queue(spool_max_bytes=30)
+        wb.put({"i": 1, "pad": "x"})
+        wb.flush(timeout=5)
+        wb.put({"i": 2, "pad": "x"})
+        wb.flush(timeout=5)
+        
+        self.assertEqual(self.read_spool(), [{"i": 1, "pad": "x"}])
+    
+    def test_queue_full_goes_to_spool(self):
+        """Тест: переполненная очередь не блокирует вызывающего."""
+        self.db.block = threading.Event()
+        wb = self.make_queue(max_queue=1, batch_size=1)
+        wb.put({"i": 1})
+        # Первое показание забрал поток, второе заняло очередь, третье — в файл
+        self.assertTrue(self.db.entered.wait(5))
+        wb.put({"i": 2})
+        wb.put({"i": 3})
+        
+        self.assertEqual(self.read_spool(), [{"i": 3}])
+        self.db.block.set()
+    
+    def test_close_spools_unwritten(self):
+        """Тест: при выходе недописанные показания сохраняются в файл."""
+        self.db.block = threading.Event()
+        wb = self.make_queue(batch_size=1)
+        for i in range(3):
+            wb.put({"i": i})
+        self.assertTrue(self.db.entered.wait(5))
+        worker = wb._thread
+        
+        wb.close(timeout=0.2)
+        spooled = self.read_spool()
+        self.db.block.set()
+        worker.join(5)
+        
+        # Пакет, который поток не успел записать, тоже сохраняется
+        self.assertEqual(spooled, [{"i": 0}, {"i": 1}, {"i": 2}])
+    
+    def test_close_spools_batch_of_hanging_database(self):
+        """Тест: пакет не теряется, если подключение к БД зависло до выхода."""
+        hang = threading.Event()
+        entered = threading.Event()
+        
+        def init_db():
+            entered.set()
+            hang.wait(5)
+        
+        self.db.init_db = init_db
+        wb = self.make_queue()
+        wb.put({"i": 1})
+        self.assertTrue(entered.wait(5))
+        worker = wb._thread
+        
+        wb.close(timeout=0.2)
+        spooled = self.read_spool()
+        hang.set()
+        worker.join(5)
+        
+        self.assertEqual(spooled, [{"i": 1}])
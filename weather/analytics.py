@@ -0,0 +1,264 @@
+"""
+Модуль аналитики истории погоды на NumPy.
+История одного или нескольких городов загружается из БД порциями
+в плоские массивы (город, время, температура, ветер), после чего
+перцентили, скользящие средние, градусо-дни и векторное среднее
+направления ветра считаются векторно для каждого города без циклов по записям.
+
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy — необязательная зависимость, нужна только для аналитики
+    np = None
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+DEFAULT_BASE_TEMP = 18.0   # базовая температура градусо-дней, °C
+DEFAULT_ROLLING_DAYS = 7   # окно скользящего среднего, дней
+
+
+def _require_numpy() -> None:
+    """Проверяет, что numpy установлен."""
+    if np is None:
+        raise RuntimeError("Для аналитики установите пакет numpy.")
+
+
+class History:
+    """
+    История нескольких городов в плоских массивах одинаковой длины:
+    codes[i] — индекс города в cities, остальные массивы — значения i-й записи.
+    """
+
+    def __init__(self, cities: List[str], codes, times, temperature, wind_speed, wind_direction):
+        self.cities = cities
+        self.codes = codes
+        self.times = times
+        self.temperature = temperature
+        self.wind_speed = wind_speed
+        self.wind_direction = wind_direction
+
+    def __len__(self) -> int:
+        return int(self.codes.size)
+
+    def groups(self) -> Iterable[Tuple[str, "np.ndarray"]]:
+        """
+        Индексы записей каждого города (в порядке времени).
+        Записи группируются одной стабильной сортировкой по коду города.
+        """
+        codes = self.codes
+        if len(self.cities) <= np.iinfo(np.int16).max:
+            # Для 16-битных ключей стабильная сортировка NumPy — поразрядная, O(n)
+            codes = codes.astype(np.int16)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(self.codes[order])) + 1
+        for part in np.split(order, bounds):
+            if part.size:
+                yield self.cities[int(self.codes[part[0]])], part
+
+
+def history_from_chunks(chunks: Iterable[Sequence[Tuple]]) -> History:
+    """
+    Собирает History из порций кортежей
+    (город, время, температура, скорость ветра, направление ветра).
+    Время — секунды эпохи (как из БД) или datetime.
+
+    Args:
+        chunks: Порции строк (WeatherDatabase.iter_history_columns)
+    """
+    _require_numpy()
+    index: Dict[str, int] = {}
+    parts: Dict[str, list] = {"codes": [], "times": [], "temperature": [], "wind_speed": [], "wind_direction": []}
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        names, times, temperature, wind_speed, wind_direction = zip(*chunk)
+        # Новые города порции получают следующие коды, затем коды берутся через map без цикла Python
+        for name in dict.fromkeys(names):
+            if name not in index:
+                index[name] = len(index)
+        parts["codes"].append(np.fromiter(map(index.__getitem__, names), dtype=np.int32, count=len(names)))
+        if isinstance(times[0], int):
+            parts["times"].append(np.array(times, dtype=np.int64).astype("datetime64[s]"))
+        else:
+            parts["times"].append(np.array(times, dtype="datetime64[s]"))
+        # None (нет данных) становится NaN
+        parts["temperature"].append(np.array(temperature, dtype=np.float64))
+        parts["wind_speed"].append(np.array(wind_speed, dtype=np.float64))
+        parts["wind_direction"].append(np.array(wind_direction, dtype=np.float64))
+
+    empty = {"codes": np.int32, "times": "datetime64[s]", "temperature": np.float64,
+             "wind_speed": np.float64, "wind_direction": np.float64}
+    arrays = {
+        name: np.concatenate(values) if values else np.array([], dtype=empty[name])
+        for name, values in parts.items()
+    }
+    return History(list(index), **arrays)
+
+
+def load_history(database, cities: Sequence[str], days: int = 7) -> History:
+    """
+    Загружает историю городов за период одним проходом серверного курсора.
+
+    Args:
+        database: WeatherDatabase
+        cities: Названия городов
+        days: Количество последних дней
+    """
+    return history_from_chunks(database.iter_history_columns(list(cities), days))
+
+
+def percentiles(values, qs: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[float, Optional[float]]:
+    """Перцентили без учета NaN; None, если значений нет."""
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return {q: None for q in qs}
+    return {q: float(v) for q, v in zip(qs, np.percentile(values, qs))}
+
+
+def daily_means(times, values) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Средние значения по календарным дням (NaN не учитываются).
+
+    Returns:
+        Tuple: Массив дней (datetime64[D]) и массив средних
+    """
+    valid = ~np.isnan(values)
+    days = times[valid].astype("datetime64[D]")
+    values = values[valid]
+    if not days.size:
+        return days, values
+
+    if (days[1:] < days[:-1]).any():
+        order = np.argsort(days, kind="stable")
+        days, values = days[order], values[order]
+
+    # Записи упорядочены по времени: дни — непрерывные отрезки, суммы — reduceat
+    starts = np.concatenate(([0], np.flatnonzero(days[1:] != days[:-1]) + 1))
+    sums = np.add.reduceat(values, starts)
+    counts = np.diff(np.append(starts, values.size))
+    return days[starts], sums / counts
+
+
+def rolling_mean(values, window: int = DEFAULT_ROLLING_DAYS) -> "np.ndarray":
+    """
+    Скользящее среднее по окну из window значений через накопленные суммы.
+    NaN пропускаются; первые window - 1 значений — NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.size, np.nan)
+    if window <= 0 or values.size < window:
+        return result
+
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result[window - 1:] = np.where(window_counts > 0, window_sums / window_counts, np.nan)
+    return result
+
+
+def degree_days(times, temperature, base: float = DEFAULT_BASE_TEMP) -> Dict[str, float]:
+    """
+    Градусо-дни отопления и охлаждения по средним дневным температурам.
+
+    Returns:
+        Dict[str, float]: 'heating' — сумма (base - t) по холодным дням,
+            'cooling' — сумма (t - base) по теплым дням
+    """
+    _, means = daily_means(times, temperature)
+    return _degree_days(means, base)
+
+
+def _degree_days(means, base: float) -> Dict[str, float]:
+    """Градусо-дни по уже посчитанным средним дневным температурам."""
+    return {
+        "heating": float(np.clip(base - means, 0, None).sum()),
+        "cooling": float(np.clip(means - base, 0, None).sum()),
+    }
+
+
+def circular_mean(directions, weights=None) -> Tuple[Optional[float], float]:
+    """
+    Векторное среднее направлений в градусах: среднее единичных векторов,
+    а не арифметическое (среднее 350° и 10° — 0°, а не 180°).
+
+    Args:
+        directions: Направления в градусах
+        weights: Веса (например, скорость ветра); по умолчанию равные
+
+    Returns:
+        Tuple: Среднее направление 0–360° (None, если данных нет)
+            и длина среднего вектора 0–1 (1 — ветер всегда с одной стороны)
+    """
+    directions = np.asarray(directions, dtype=np.float64)
+    weights = np.ones_like(directions) if weights is None else np.asarray(weights, dtype=np.float64)
+    valid = ~(np.isnan(directions) | np.isnan(weights))
+    total = weights[valid].sum()
+    if not valid.any() or total <= 0:
+        return None, 0.0
+
+    radians = np.deg2rad(directions[valid])
+    x = np.sum(weights[valid] * np.cos(radians)) / total
+    y = np.sum(weights[valid] * np.sin(radians)) / total
+    # Округление убирает 360.0 из-за -0.0 и погрешности арктангенса
+    return round(float(np.rad2deg(np.arctan2(y, x))), 6) % 360, float(np.hypot(x, y))
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def summarize(
+    history: History,
+    qs: Sequence[float] = DEFAULT_PERCENTILES,
+    base: float = DEFAULT_BASE_TEMP,
+    window: int = DEFAULT_ROLLING_DAYS
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Сводная статистика по каждому городу истории.
+
+    Args:
+        history: Загруженная история
+        qs: Перцентили температуры
+        base: Базовая температура градусо-дней
+        window: Окно скользящего среднего дневных температур, дней
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Для каждого города словарь с ключами
+            'count', 'days', 'temp_mean', 'temp_min', 'temp_max', 'percentiles',
+            'rolling_mean', 'heating_degree_days', 'cooling_degree_days',
+            'wind_mean', 'wind_direction_mean', 'wind_steadiness'
+    """
+    _require_numpy()
+    result = {}
+    for city, part in history.groups():
+        times = history.times[part]
+        temperature = history.temperature[part]
+        wind = history.wind_speed[part]
+
+        days, means = daily_means(times, temperature)
+        rolling = rolling_mean(means, window)
+        hdd = _degree_days(means, base)
+        direction, steadiness = circular_mean(history.wind_direction[part], wind)
+        has_temp = bool((~np.isnan(temperature)).any())
+
+        result[city] = {
+            "count": int(part.size),
+            "days": int(days.size),
+            "temp_mean": _round(np.nanmean(temperature)) if has_temp else None,
+            "temp_min": _round(np.nanmin(temperature)) if has_temp else None,
+            "temp_max": _round(np.nanmax(temperature)) if has_temp else None,
+            "percentiles": {q: _round(v) for q, v in percentiles(temperature, qs).items()},
+            "rolling_mean": _round(rolling[-1]) if rolling.size else None,
+            "heating_degree_days": _round(hdd["heating"], 1),
+            "cooling_degree_days": _round(hdd["cooling"], 1),
+            "wind_mean": _round(np.nanmean(wind)) if (~np.isnan(wind)).any() else None,
+            "wind_direction_mean": _round(direction, 0),
+            "wind_steadiness": _round(steadiness),
+        }
+    return result
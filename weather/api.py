@@ -1,14 +1,195 @@
 """
 Модуль для работы с Open-Meteo API и OpenStreetMap Reverse Geocoding с помощью requests.
+Запросы выполняются через общую сессию с пулом соединений (weather.http).
 
 """
 
-import requests
-
-from typing import Dict, Any, Optional
+import logging
+from typing import Dict, Any, List, Optional
 
 from colorama import Fore, Style
 
+from .cache import (
+    read_geo_cache, write_geo_cache, make_geo_key,
+    read_negative_cache, write_negative_cache,
+)
+from .config import HTTP_CONFIG
+from .forecast import HOURLY_VARIABLES, DAILY_VARIABLES, FORECAST_DAYS
+from .http import http_get
+
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+REVERSE_GEOCODING_URL = "https://nominatim.openstreetmap.org/reverse"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidLocationError(ConnectionError):
+    """API отклонил запрос погоды из-за недопустимых координат (HTTP 400)."""
+
+
+REQUEST_TIMEOUT = HTTP_CONFIG.timeout  # таймаут HTTP-запроса в секундах
+OSM_HEADERS = {"User-Agent": "WeatherCLI/1.0 (by OpenAI)"} # Обязательный заголовок для OSM API
+
+
+def _geocoding_params(city: str) -> Dict[str, Any]:
+    """Параметры запроса к Open-Meteo Geocoding API."""
+    return {"name": city, "count": 1, "language": "ru"}
+
+
+def _reverse_geocoding_params(lat: float, lon: float) -> Dict[str, Any]:
+    """Параметры запроса к OpenStreetMap Reverse Geocoding."""
+    return {"lat": lat, "lon": lon, "format": "json", "accept-language": "ru"}
+
+
+def _forecast_params(lat: float, lon: float) -> Dict[str, Any]:
+    """Параметры запроса текущей погоды к Open-Meteo."""
+    return {"latitude": lat, "longitude": lon, "current_weather": "true"}
+
+
+def _multi_forecast_params(locations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Параметры одного запроса текущей погоды сразу для нескольких координат (списки через запятую)."""
+    return {
+        "latitude": ",".join(str(loc["lat"]) for loc in locations),
+        "longitude": ",".join(str(loc["lon"]) for loc in locations),
+        "current_weather": "true",
+    }
+
+
+def _hourly_forecast_params(lat: float, lon: float, days: int = FORECAST_DAYS) -> Dict[str, Any]:
+    """Параметры запроса почасового и дневного прогноза к Open-Meteo (один запрос на все переменные)."""
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": ",".join(HOURLY_VARIABLES.values()),
+        "daily": ",".join(DAILY_VARIABLES.values()),
+        "forecast_days": days,
+        "timezone": "auto",
+    }
+
+
+def _parse_location(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Извлекает самый релевантный (первый) результат геокодирования.
+    
+    Returns:
+        Dict[str, Any]: Словарь с ключами 'city', 'lat', 'lon' или None, если ничего не найдено
+    """
+    if "results" in data and len(data["results"]) > 0:
+        loc = data["results"][0]
+        return {
+            "city": loc.get("name"),
+            "lat": loc.get("latitude"),
+            "lon": loc.get("longitude"),
+        }
+    return None
+
+
+def _parse_reverse_location(data: Dict[str, Any], lat: float, lon: float) -> Dict[str, Any]:
+    """
+    Извлекает название населенного пункта из ответа OSM.
+    
+    Returns:
+        Dict[str, Any]: Словарь с ключами 'city', 'lat', 'lon'
+    """
+    # Ищем название населенного пункта в ответе с приоритетом по типам
+    address = data.get("address", {})
+    city_name = (
+        address.get("city")
+        or address.get("town")
+        or address.get("village")
+        or address.get("state")
+        or "Неизвестно"
+    )
+
+    #флоат для единости 
+    return {
+        "city": city_name,
+        "lat": float(lat),
+        "lon": float(lon),
+    }
+
+
+def _cached_location(
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Ищет местоположение в кэше геокодирования до любого сетевого запроса.
+    
+    Returns:
+        Dict[str, Any]: Словарь с ключами 'city', 'lat', 'lon' или None, если в кэше нет
+    """
+    if city and not lat and not lon:
+        return read_geo_cache(make_geo_key(city=city))
+
+    if lat and lon:
+        cached = read_geo_cache(make_geo_key(lat=lat, lon=lon))
+        if cached:
+            # Из кэша берем только название, координаты оставляем исходные
+            return {"city": cached["city"], "lat": float(lat), "lon": float(lon)}
+
+    return None
+
+
+def _remember_location(
+    loc: Dict[str, Any],
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> None:
+    """
+    Сохраняет результат геокодирования в долгоживущий кэш.
+    Ошибка записи в кэш не делает успешное геокодирование неудачным.
+    """
+    try:
+        if city:
+            write_geo_cache(make_geo_key(city=city), loc)
+        else:
+            write_geo_cache(make_geo_key(lat=lat, lon=lon), {"city": loc["city"]})
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить местоположение в кэш геокодирования: {e}")
+
+
+def _cached_failure(
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Ищет недавнюю неудачу геокодирования, чтобы не повторять запрос к API.
+    
+    Returns:
+        Dict[str, Any]: Словарь с ключами 'reason' и 'message' или None
+    """
+    if city and not lat and not lon:
+        return read_negative_cache(make_geo_key(city=city))
+
+    if lat and lon:
+        return read_negative_cache(make_geo_key(lat=lat, lon=lon))
+
+    return None
+
+
+def _remember_failure(
+    reason: str,
+    message: str,
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> None:
+    """
+    Запоминает неудачу геокодирования с коротким сроком жизни.
+    Ошибка записи в кэш не должна мешать обработке исходной ошибки.
+    """
+    key = make_geo_key(city=city) if city else make_geo_key(lat=lat, lon=lon)
+    try:
+        write_negative_cache(key, reason, message)
+    except Exception:
+        pass
+
+
 def get_coordinates(city: str) -> tuple[float, float]:
     """
     Получает координаты города через Open-Meteo Geocoding API.
@@ -23,25 +204,31 @@ def get_coordinates(city: str) -> tuple[float, float]:
         ValueError: Если город не найден
         requests.RequestException: При ошибках сетевого запроса    
     """
+    # Сначала смотрим в кэш геокодирования, в том числе в кэш «не найдено»
+    cached = _cached_location(city=city)
+    if cached:
+        return cached["lat"], cached["lon"]
+
+    failure = _cached_failure(city=city)
+    if failure and failure["reason"] == "not_found":
+        raise ValueError(failure["message"])
       
-    # Формируем URL для запроса к API
-    
-    url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&count=1&language=ru"
-    
     #  HTTP-запрос с таймаутом 10 секунд
-    resp = requests.get(url, timeout=10)
+    resp = http_get(GEOCODING_URL, params=_geocoding_params(city), timeout=REQUEST_TIMEOUT)
     resp.raise_for_status() #проверка статуса ответа
     data = resp.json()     #парсинг полученного ответа json
 
     #проврека на наличие результата в ответе 
     
     if not data.get("results"):
-        raise ValueError(f"Город '{city}' не найден.")
+        message = f"Город '{city}' не найден."
+        _remember_failure("not_found", message, city=city)
+        raise ValueError(message)
 
     #из первого результата извлекаем координаты
-    lat = data["results"][0]["latitude"]
-    lon = data["results"][0]["longitude"]
-    return lat, lon
+    loc = _parse_location(data)
+    _remember_location(loc, city=city)
+    return loc["lat"], loc["lon"]
 
 
 def get_location_info(
@@ -51,6 +238,8 @@ def get_location_info(
 ) -> Optional[Dict[str, Any]]:
     """
     Определяет координаты и название города.
+    Сначала проверяется долгоживущий кэш геокодирования,
+    затем кэш недавних неудач (город не найден, ошибка запроса).
     Если указан город — используется Open-Meteo Geocoding API.
     Если указаны координаты — используется OpenStreetMap Reverse Geocoding.
     
@@ -63,60 +252,62 @@ def get_location_info(
         Dict[str, Any]: Словарь с ключами 'city', 'lat', 'lon' или None при ошибке
     """
     
+    # Координаты города не меняются — сначала смотрим в кэш геокодирования
+    cached = _cached_location(city=city, lat=lat, lon=lon)
+    if cached:
+        return cached
+
+    # Неудачные запросы не повторяем, пока не истечет их короткий срок жизни
+    failure = _cached_failure(city=city, lat=lat, lon=lon)
+    if failure:
+        print(f"{Fore.RED} {failure['message']} (из кэша){Style.RESET_ALL}")
+        return None
 
     # Вариант 1: пользователь ввёл город — ищем координаты через Open-Meteo
     
     if city and not lat and not lon:
-        url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&language=ru&count=1" 
         try:
-            response = requests.get(url, timeout=10) #запрос к апи
+            response = http_get(GEOCODING_URL, params=_geocoding_params(city), timeout=REQUEST_TIMEOUT) #запрос к апи
             response.raise_for_status()         #смотрим статус запроса
             data = response.json()
 
             #проверяем наличие ответа и берем самый релевантный (первый)
-            if "results" in data and len(data["results"]) > 0:
-                loc = data["results"][0]
-                return {
-                    "city": loc.get("name"),
-                    "lat": loc.get("latitude"),
-                    "lon": loc.get("longitude"),
-                }
+            loc = _parse_location(data)
+            if loc:
+                _remember_location(loc, city=city)
+                return loc
             else:
-                print(f"{Fore.RED} Город '{city}' не найден.{Style.RESET_ALL}")
+                message = f"Город '{city}' не найден."
+                _remember_failure("not_found", message, city=city)
+                print(f"{Fore.RED} {message}{Style.RESET_ALL}")
                 return None
         except Exception as e:
-            print(f"{Fore.RED}⚠ Ошибка геокодирования Open-Meteo: {e}{Style.RESET_ALL}")
+            message = f"Ошибка геокодирования Open-Meteo: {e}"
+            _remember_failure("error", message, city=city)
+            print(f"{Fore.RED}⚠ {message}{Style.RESET_ALL}")
             return None
 
     # Вариант 2: пользователь ввёл координаты — ищем город через OpenStreetMap
     elif lat and lon:
-        # Формируем URL для обратного геокодирования (координаты -> адрес)
-        url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json&accept-language=ru"
-        
-        headers = {"User-Agent": "WeatherCLI/1.0 (by OpenAI)"} # Обязательный заголовок для OSM API
+        # Обратное геокодирование (координаты -> адрес)
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_get(
+                REVERSE_GEOCODING_URL,
+                params=_reverse_geocoding_params(lat, lon),
+                headers=OSM_HEADERS,
+                timeout=REQUEST_TIMEOUT,
+            )
             response.raise_for_status()
             data = response.json()
 
-             # Ищем название населенного пункта в ответе с приоритетом по типам
-            city_name = (
-                data.get("address", {}).get("city")
-                or data.get("address", {}).get("town")
-                or data.get("address", {}).get("village")
-                or data.get("address", {}).get("state")
-                or "Неизвестно"
-            )
-
-            #флоат для единости 
-            return {
-                "city": city_name,
-                "lat": float(lat),
-                "lon": float(lon),
-            }
+            loc = _parse_reverse_location(data, lat, lon)
+            _remember_location(loc, lat=lat, lon=lon)
+            return loc
 
         except Exception as e:
-            print(f"{Fore.RED} Ошибка обратного геокодирования OSM: {e}{Style.RESET_ALL}")
+            message = f"Ошибка обратного геокодирования OSM: {e}"
+            _remember_failure("error", message, lat=lat, lon=lon)
+            print(f"{Fore.RED} {message}{Style.RESET_ALL}")
             return None
 
     else:
@@ -159,16 +350,102 @@ def get_weather(
     lat, lon = loc["lat"], loc["lon"]
     city_name = loc["city"]
     
-    #url для запроса погоды
+    #запрос погоды
     
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
     try:
-        resp = requests.get(url, timeout=10)
+        resp = http_get(FORECAST_URL, params=_forecast_params(lat, lon), timeout=REQUEST_TIMEOUT)
         resp.raise_for_status()
         data = resp.json()
         data["city"] = city_name
         return data
     except Exception as e:
         raise ConnectionError(f"Ошибка получения данных погоды: {e}")
+
+
+def get_weather_for_locations(locations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Получает текущую погоду для нескольких уже известных местоположений одним запросом.
+    
+    Args:
+        locations (List[Dict[str, Any]]): Местоположения с ключами 'city', 'lat', 'lon'
+            (результаты get_location_info)
+        
+    Returns:
+        List[Dict[str, Any]]: Данные о погоде в том же формате, что у get_weather,
+            в порядке входных местоположений
+        
+    Raises:
+        InvalidLocationError: Если API отклонил запрос из-за координат (HTTP 400)
+        ConnectionError: При остальных ошибках получения данных о погоде
+    """
+    if not locations:
+        return []
+
+    try:
+        resp = http_get(FORECAST_URL, params=_multi_forecast_params(locations), timeout=REQUEST_TIMEOUT)
+    except Exception as e:
+        raise ConnectionError(f"Ошибка получения данных погоды: {e}")
+
+    # 400 — ошибка в самом запросе (например, широта вне диапазона), а не сбой сети или API
+    if resp.status_code == 400:
+        try:
+            reason = resp.json().get("reason")
+        except Exception:
+            reason = None
+        raise InvalidLocationError(f"Ошибка получения данных погоды: {reason or resp.text}")
+
+    try:
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception as e:
+        raise ConnectionError(f"Ошибка получения данных погоды: {e}")
+
+    # Для нескольких координат API возвращает список, для одной — объект
+    results = data if isinstance(data, list) else [data]
+    if len(results) != len(locations):
+        raise ConnectionError(
+            f"Ошибка получения данных погоды: ожидалось {len(locations)} местоположений, получено {len(results)}"
+        )
+
+    for loc, weather in zip(locations, results):
+        weather["city"] = loc["city"]
+    return results
+
+def get_forecast(
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    days: int = FORECAST_DAYS
+) -> Dict[str, Any]:
+    """
+    Получает почасовой и дневной прогноз одним запросом.
     
+    Args:
+        city (str, optional): Название города
+        lat (float, optional): Широта
+        lon (float, optional): Долгота
+        days (int): Число дней прогноза
+        
+    Returns:
+        Dict[str, Any]: Ответ Open-Meteo с блоками hourly и daily и ключом city
+        
+    Raises:
+        ValueError: Если не удалось определить местоположение
+        ConnectionError: При ошибках получения прогноза
+    """
+    loc = get_location_info(city=city, lat=lat, lon=lon)
+    if not loc:
+        raise ValueError("Не удалось определить местоположение.")
 
+    try:
+        resp = http_get(
+            FORECAST_URL,
+            params=_hourly_forecast_params(loc["lat"], loc["lon"], days),
+            timeout=REQUEST_TIMEOUT,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        data["city"] = loc["city"]
+        return data
+    except Exception as e:
+        raise ConnectionError(f"Ошибка получения прогноза: {e}")
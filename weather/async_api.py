@@ -0,0 +1,269 @@
+"""
+Асинхронная версия модуля работы с Open-Meteo API и OpenStreetMap на asyncio и aiohttp.
+Один цикл событий держит в полёте сотни запросов вместо одного запроса на поток.
+
+"""
+
+import asyncio
+
+from typing import Dict, Any, List, Optional
+
+from colorama import Fore, Style
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp — необязательная зависимость, нужна только для async-движка
+    aiohttp = None
+
+from .api import (
+    GEOCODING_URL,
+    REVERSE_GEOCODING_URL,
+    FORECAST_URL,
+    REQUEST_TIMEOUT,
+    OSM_HEADERS,
+    _geocoding_params,
+    _reverse_geocoding_params,
+    _forecast_params,
+    _parse_location,
+    _parse_reverse_location,
+    _cached_location,
+    _remember_location,
+    _cached_failure,
+    _remember_failure,
+)
+
+DEFAULT_CONCURRENCY = 100  # максимум одновременных HTTP-запросов
+
+
+class AsyncWeatherClient:
+    """
+    Асинхронный клиент с общей HTTP-сессией и ограничением числа одновременных запросов.
+    Кэш геокодирования (SQLite, запись может ждать блокировку) читается и пишется
+    в потоках, чтобы не останавливать цикл событий.
+
+    Пример:
+        async with AsyncWeatherClient(concurrency=50) as client:
+            data = await client.get_weather(city="Moscow")
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = REQUEST_TIMEOUT,
+        session: Optional[Any] = None
+    ):
+        """
+        Args:
+            concurrency (int): Максимальное число одновременных запросов
+            timeout (float): Таймаут одного запроса в секундах
+            session (optional): Готовая сессия aiohttp; если не передана — создается своя
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self) -> "AsyncWeatherClient":
+        if self._session is None:
+            if aiohttp is None:
+                raise RuntimeError("Для асинхронного режима установите пакет aiohttp.")
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+            )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Закрывает сессию, если она была создана клиентом."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_json(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Выполняет GET-запрос с учетом лимита одновременных запросов и возвращает JSON."""
+        if self._session is None:
+            raise RuntimeError("Клиент не открыт: используйте 'async with AsyncWeatherClient()'.")
+
+        async with self._semaphore:
+            async with self._session.get(url, params=params, headers=headers) as resp:
+                resp.raise_for_status()
+                return await resp.json(content_type=None)
+
+    async def get_coordinates(self, city: str) -> tuple[float, float]:
+        """
+        Асинхронно получает координаты города через Open-Meteo Geocoding API.
+
+        Raises:
+            ValueError: Если город не найден
+        """
+        cached = await asyncio.to_thread(_cached_location, city=city)
+        if cached:
+            return cached["lat"], cached["lon"]
+
+        failure = await asyncio.to_thread(_cached_failure, city=city)
+        if failure and failure["reason"] == "not_found":
+            raise ValueError(failure["message"])
+
+        data = await self._get_json(GEOCODING_URL, _geocoding_params(city))
+        loc = _parse_location(data)
+        if not loc:
+            message = f"Город '{city}' не найден."
+            await asyncio.to_thread(_remember_failure, "not_found", message, city=city)
+            raise ValueError(message)
+        await asyncio.to_thread(_remember_location, loc, city=city)
+        return loc["lat"], loc["lon"]
+
+    async def get_location_info(
+        self,
+        city: Optional[str] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Асинхронно определяет координаты и название города.
+        Поведение совпадает с weather.api.get_location_info, включая кэш геокодирования.
+
+        Returns:
+            Dict[str, Any]: Словарь с ключами 'city', 'lat', 'lon' или None при ошибке
+        """
+        cached = await asyncio.to_thread(_cached_location, city=city, lat=lat, lon=lon)
+        if cached:
+            return cached
+
+        failure = await asyncio.to_thread(_cached_failure, city=city, lat=lat, lon=lon)
+        if failure:
+            print(f"{Fore.RED} {failure['message']} (из кэша){Style.RESET_ALL}")
+            return None
+
+        if city and not lat and not lon:
+            try:
+                data = await self._get_json(GEOCODING_URL, _geocoding_params(city))
+                loc = _parse_location(data)
+                if not loc:
+                    message = f"Город '{city}' не найден."
+                    await asyncio.to_thread(_remember_failure, "not_found", message, city=city)
+                    print(f"{Fore.RED} {message}{Style.RESET_ALL}")
+                    return None
+                await asyncio.to_thread(_remember_location, loc, city=city)
+                return loc
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                message = f"Ошибка геокодирования Open-Meteo: {e}"
+                await asyncio.to_thread(_remember_failure, "error", message, city=city)
+                print(f"{Fore.RED}⚠ {message}{Style.RESET_ALL}")
+                return None
+
+        elif lat and lon:
+            try:
+                data = await self._get_json(
+                    REVERSE_GEOCODING_URL, _reverse_geocoding_params(lat, lon), headers=OSM_HEADERS
+                )
+                loc = _parse_reverse_location(data, lat, lon)
+                await asyncio.to_thread(_remember_location, loc, lat=lat, lon=lon)
+                return loc
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                message = f"Ошибка обратного геокодирования OSM: {e}"
+                await asyncio.to_thread(_remember_failure, "error", message, lat=lat, lon=lon)
+                print(f"{Fore.RED} {message}{Style.RESET_ALL}")
+                return None
+
+        else:
+            print(f"{Fore.YELLOW} Укажите город или координаты.{Style.RESET_ALL}")
+            return None
+
+    async def get_weather(
+        self,
+        city: Optional[str] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Асинхронно получает текущую погоду по названию города или координатам.
+
+        Raises:
+            ValueError: Если не удалось определить местоположение
+            ConnectionError: При ошибках получения данных о погоде
+        """
+        loc = await self.get_location_info(city=city, lat=lat, lon=lon)
+        if not loc:
+            raise ValueError("Не удалось определить местоположение.")
+
+        try:
+            data = await self._get_json(FORECAST_URL, _forecast_params(loc["lat"], loc["lon"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            raise ConnectionError(f"Ошибка получения данных погоды: {e}")
+
+        data["city"] = loc["city"]
+        return data
+
+    async def get_weather_many(
+        self,
+        items: List[Dict[str, Any]],
+        return_exceptions: bool = True
+    ) -> List[Any]:
+        """
+        Получает погоду для нескольких элементов одновременно.
+
+        Args:
+            items (List[Dict[str, Any]]): Элементы с ключами 'city', 'lat', 'lon'
+            return_exceptions (bool): Возвращать исключения в списке результатов
+                вместо того, чтобы прерывать весь пакет на первой ошибке
+
+        Returns:
+            List[Any]: Данные о погоде (или исключения) в порядке входных элементов
+
+        Note:
+            При отмене или первой ошибке (если return_exceptions=False)
+            все незавершенные запросы отменяются.
+        """
+        tasks = [
+            asyncio.ensure_future(self.get_weather(city=it["city"], lat=it["lat"], lon=it["lon"]))
+            for it in items
+        ]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+
+async def get_location_info_async(
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """Асинхронный аналог weather.api.get_location_info с собственной сессией."""
+    async with AsyncWeatherClient() as client:
+        return await client.get_location_info(city=city, lat=lat, lon=lon)
+
+
+async def get_coordinates_async(city: str) -> tuple[float, float]:
+    """Асинхронный аналог weather.api.get_coordinates с собственной сессией."""
+    async with AsyncWeatherClient() as client:
+        return await client.get_coordinates(city)
+
+
+async def get_weather_async(
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> Dict[str, Any]:
+    """Асинхронный аналог weather.api.get_weather с собственной сессией."""
+    async with AsyncWeatherClient() as client:
+        return await client.get_weather(city=city, lat=lat, lon=lon)
@@ -0,0 +1,326 @@
+"""
+Модуль пакетного получения погоды для нескольких городов и координат.
+Запросы выполняются параллельно через ограниченный пул потоков,
+поэтому общее время близко к самому медленному запросу, а не к сумме.
+Промахи кэша можно запрашивать группами: Open-Meteo принимает
+списки координат через запятую, и одна группа — один HTTP-запрос.
+
+"""
+
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from .api import get_weather, get_location_info, get_weather_for_locations, InvalidLocationError
+from .async_api import AsyncWeatherClient
+from .cache import read_cache, write_cache, make_cache_key
+from .geo import quantize
+
+DEFAULT_WORKERS = 8  # размер пула потоков по умолчанию
+
+
+def parse_batch_item(item: str) -> Dict[str, Any]:
+    """
+    Разбирает элемент пакета: название города или пару координат "lat,lon".
+    Координаты квантуются (weather.geo), поэтому близкие точки совпадают.
+
+    Args:
+        item (str): Строка из аргументов или файла
+
+    Returns:
+        Dict[str, Any]: Словарь с ключами 'city', 'lat', 'lon'
+
+    Raises:
+        ValueError: Если строка пустая или координаты вне допустимого диапазона
+    """
+    item = item.strip()
+    if not item:
+        raise ValueError("Пустой элемент пакета.")
+
+    # Пара координат: "55.75,37.61" (название вида "Paris, France" остаётся городом)
+    parts = item.split(",")
+    if len(parts) == 2:
+        try:
+            lat, lon = float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+        else:
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ValueError(f"Координаты вне диапазона (широта -90..90, долгота -180..180): '{item}'")
+            lat, lon = quantize(lat, lon)
+            return {"city": None, "lat": lat, "lon": lon}
+
+    return {"city": item, "lat": None, "lon": None}
+
+
+def read_batch_items(path: str) -> List[str]:
+    """
+    Читает элементы пакета из файла (по одному на строку).
+    Пустые строки и строки, начинающиеся с '#', пропускаются.
+
+    Args:
+        path (str): Путь к файлу или '-' для чтения из stdin
+
+    Returns:
+        List[str]: Список элементов пакета
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def fetch_one(item: Dict[str, Any], refresh: bool = False) -> Dict[str, Any]:
+    """
+    Получает погоду для одного элемента пакета: из кэша или через API.
+    Исключения не пробрасываются, а возвращаются в поле 'error'.
+
+    Args:
+        item (Dict[str, Any]): Элемент пакета с ключами 'city', 'lat', 'lon'
+        refresh (bool): Игнорировать кэш
+
+    Returns:
+        Dict[str, Any]: Результат с ключами:
+            - key: ключ кэша
+            - data: данные о погоде или None
+            - cached: данные взяты из кэша
+            - error: текст ошибки или None
+    """
+    key = make_cache_key(item["city"], item["lat"], item["lon"])
+    result: Dict[str, Any] = {"key": key, "data": None, "cached": False, "error": None}
+
+    try:
+        if not refresh:
+            cached = read_cache(key)
+            if cached:
+                result["data"] = cached
+                result["cached"] = True
+                return result
+
+        data = get_weather(city=item["city"], lat=item["lat"], lon=item["lon"])
+        write_cache(key, data)
+        result["data"] = data
+    except Exception as e:
+        result["error"] = str(e)
+
+    return result
+
+
+def _unique_items(items: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Убирает повторяющиеся элементы, сохраняя порядок первого появления."""
+    unique: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        unique.setdefault(make_cache_key(item["city"], item["lat"], item["lon"]), item)
+    return unique
+
+
+def _rejected_items(unique: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Убирает из unique элементы, которые не удалось разобрать (поле 'error'),
+    и возвращает для них готовые результаты с ошибкой — без запросов к API.
+    """
+    rejected: Dict[str, Dict[str, Any]] = {}
+    for key in [key for key, item in unique.items() if item.get("error")]:
+        rejected[key] = {"key": key, "data": None, "cached": False, "error": unique.pop(key)["error"]}
+    return rejected
+
+
+def _fetch_group(group: List[tuple]) -> List[Any]:
+    """
+    Запрашивает погоду для группы (ключ, местоположение).
+    API отклоняет весь запрос из-за одной плохой точки, поэтому при такой
+    ошибке группа делится пополам и запрашивается заново, пока ошибка
+    не останется только у своего элемента. Сбой сети или API (таймаут, 5xx)
+    повторно не запрашивается и отмечается у всей группы.
+
+    Returns:
+        List[Any]: Для каждого элемента группы данные о погоде или исключение
+    """
+    try:
+        return get_weather_for_locations([loc for _, loc in group])
+    except InvalidLocationError as e:
+        if len(group) == 1:
+            return [e]
+        middle = len(group) // 2
+        return _fetch_group(group[:middle]) + _fetch_group(group[middle:])
+    except Exception as e:
+        return [e] * len(group)
+
+
+def _fetch_grouped(
+    unique: Dict[str, Dict[str, Any]],
+    workers: int,
+    refresh: bool,
+    group_size: int
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Получает погоду для уникальных элементов: из кэша или группами
+    по group_size координат в одном запросе к API.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[str, Dict[str, Any]] = {}
+
+    for key, item in unique.items():
+        results[key] = {"key": key, "data": None, "cached": False, "error": None}
+        cached = None if refresh else read_cache(key)
+        if cached:
+            results[key]["data"] = cached
+            results[key]["cached"] = True
+        else:
+            pending[key] = item
+
+    if not pending:
+        return results
+
+    max_workers = max(1, min(workers, len(pending)))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Координаты нужны до запроса погоды; кэш геокодирования избавляет от повторных запросов
+        locations = pool.map(
+            lambda it: get_location_info(city=it["city"], lat=it["lat"], lon=it["lon"]),
+            pending.values()
+        )
+        resolved = []
+        for key, loc in zip(pending, locations):
+            if loc:
+                resolved.append((key, loc))
+            else:
+                results[key]["error"] = "Не удалось определить местоположение."
+
+        groups = [resolved[i:i + group_size] for i in range(0, len(resolved), group_size)]
+        for group, outcomes in zip(groups, pool.map(_fetch_group, groups)):
+            for (key, _), outcome in zip(group, outcomes):
+                if isinstance(outcome, Exception):
+                    results[key]["error"] = str(outcome)
+                    continue
+                write_cache(key, outcome)
+                results[key]["data"] = outcome
+
+    return results
+
+
+def fetch_many(
+    items: List[Dict[str, Any]],
+    workers: int = DEFAULT_WORKERS,
+    refresh: bool = False,
+    group_size: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Параллельно получает погоду для списка элементов пакета.
+    Одинаковые элементы запрашиваются один раз.
+
+    Args:
+        items (List[Dict[str, Any]]): Элементы, полученные из parse_batch_item
+        workers (int): Максимальное число одновременных запросов
+        refresh (bool): Игнорировать кэш
+        group_size (int): Координат в одном запросе погоды; 1 — запрос на каждый элемент
+
+    Returns:
+        List[Dict[str, Any]]: Результаты fetch_one в порядке входных элементов
+    """
+    if not items:
+        return []
+
+    unique = _unique_items(items)
+    results = _rejected_items(unique)
+    if group_size > 1:
+        results.update(_fetch_grouped(unique, workers, refresh, group_size))
+    elif unique:
+        max_workers = max(1, min(workers, len(unique)))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results.update(zip(unique, pool.map(lambda it: fetch_one(it, refresh), unique.values())))
+
+    return [results[make_cache_key(item["city"], item["lat"], item["lon"])] for item in items]
+
+
+async def _fetch_many_async(
+    unique: Dict[str, Dict[str, Any]],
+    concurrency: int,
+    refresh: bool
+) -> Dict[str, Dict[str, Any]]:
+    """Получает погоду для уникальных элементов в одном цикле событий."""
+    results: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[str, Dict[str, Any]] = {}
+
+    for key, item in unique.items():
+        results[key] = {"key": key, "data": None, "cached": False, "error": None}
+        cached = None if refresh else read_cache(key)
+        if cached:
+            results[key]["data"] = cached
+            results[key]["cached"] = True
+        else:
+            pending[key] = item
+
+    if pending:
+        async with AsyncWeatherClient(concurrency=concurrency) as client:
+            outcomes = await client.get_weather_many(list(pending.values()))
+
+        for key, outcome in zip(pending, outcomes):
+            if isinstance(outcome, BaseException):
+                results[key]["error"] = str(outcome)
+                continue
+            write_cache(key, outcome)
+            results[key]["data"] = outcome
+
+    return results
+
+
+def fetch_many_async(
+    items: List[Dict[str, Any]],
+    concurrency: int = DEFAULT_WORKERS,
+    refresh: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    То же, что fetch_many, но запросы выполняются asyncio-движком
+    (weather.async_api) вместо пула потоков.
+
+    Args:
+        items (List[Dict[str, Any]]): Элементы, полученные из parse_batch_item
+        concurrency (int): Максимальное число одновременных запросов
+        refresh (bool): Игнорировать кэш
+
+    Returns:
+        List[Dict[str, Any]]: Результаты в том же формате, что у fetch_one
+    """
+    if not items:
+        return []
+
+    unique = _unique_items(items)
+    results = _rejected_items(unique)
+    if unique:
+        results.update(asyncio.run(_fetch_many_async(unique, max(1, concurrency), refresh)))
+    return [results[make_cache_key(item["city"], item["lat"], item["lon"])] for item in items]
+
+
+def collect_batch_items(
+    batch: Optional[List[str]] = None,
+    batch_file: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Собирает элементы пакета из аргументов командной строки и файла.
+
+    Args:
+        batch (List[str], optional): Элементы из аргумента --batch
+        batch_file (str, optional): Путь из аргумента --batch-file
+
+    Returns:
+        List[Dict[str, Any]]: Разобранные элементы пакета. Элемент, который не удалось
+            разобрать, получает поле 'error' и в fetch_many сразу дает результат
+            с ошибкой, не прерывая остальной пакет.
+    """
+    raw = list(batch or [])
+    if batch_file:
+        raw.extend(read_batch_items(batch_file))
+
+    items = []
+    for item in raw:
+        if not item.strip():
+            continue
+        try:
+            items.append(parse_batch_item(item))
+        except ValueError as e:
+            items.append({"city": item.strip(), "lat": None, "lon": None, "error": str(e)})
+    return items
@@ -1,56 +1,490 @@
 """
-Модуль для простого кэширования ответов API в JSON-файл.
+Модуль для кэширования ответов API во встроенную базу SQLite.
+Каждая запись хранится отдельной строкой с ключом (namespace, key),
+поэтому чтение и запись одной записи не зависят от размера кэша.
+Отдельное пространство имен хранит результаты геокодирования:
+координаты города не меняются, поэтому повторно их не запрашиваем.
+
+Перед базой стоит ограниченный LRU-кэш в памяти процесса: повторные
+обращения к популярным городам не касаются файловой системы,
+запись идет сквозь память в базу.
+
+Несколько процессов могут работать с одной базой одновременно:
+база открывается в режиме WAL (читатели не блокируют писателя),
+каждая запись — отдельная транзакция BEGIN IMMEDIATE, а при занятой
+базе процесс ждет до CACHE_BUSY_TIMEOUT секунд вместо ошибки.
+
+Старые JSON-файлы кэша (CACHE_FILE, GEO_CACHE_FILE) автоматически
+переносятся в базу при первом обращении и удаляются.
 
 """
 
 import json
 import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
 
-CACHE_FILE = "weather_cache.json"
+CACHE_DB_FILE = "weather_cache.db"
 CACHE_TTL = timedelta(minutes=30)  # срок жизни кэша
+CACHE_MAX_STALE = timedelta(hours=6)  # сколько после CACHE_TTL запись еще можно отдать как устаревшую
 
-def read_cache(city: str) -> Optional[Dict[str, Any]]:
+GEO_CACHE_TTL: Optional[timedelta] = timedelta(days=30)  # срок жизни кэша геокодирования, None — бессрочно
+GEO_COORD_PRECISION = 4  # знаков после запятой в ключе обратного геокодирования (~11 м)
+
+FORECAST_CACHE_TTL = timedelta(hours=1)  # срок жизни кэша прогноза (Open-Meteo обновляет его раз в час)
+
+NEGATIVE_CACHE_TTL = timedelta(hours=6)    # сколько помнить, что город не найден
+NEGATIVE_ERROR_TTL = timedelta(minutes=1)  # сколько не повторять геокодирование после сетевой ошибки
+
+MEMORY_CACHE_SIZE = 1024  # максимум записей в памяти процесса, 0 — отключить
+
+CACHE_MAX_ENTRIES: Optional[int] = 50_000           # максимум записей в базе, None — без ограничения
+CACHE_MAX_BYTES: Optional[int] = 64 * 1024 * 1024   # максимум суммарного размера значений, None — без ограничения
+COMPACT_EVERY_WRITES = 500  # ленивая компакция после стольких записей, 0 — только вручную
+
+CACHE_BUSY_TIMEOUT = 10.0  # сколько секунд ждать освобождения базы другим процессом
+
+# Устаревшие JSON-файлы кэша, переносятся в CACHE_DB_FILE
+CACHE_FILE = "weather_cache.json"
+GEO_CACHE_FILE = "geocoding_cache.json"
+
+WEATHER_NAMESPACE = "weather"
+GEO_NAMESPACE = "geo"
+NEGATIVE_NAMESPACE = "geo_negative"
+FORECAST_NAMESPACE = "forecast"
+
+_SCHEMA_SQL = (
+    # WAL сохраняется в файле базы: читатели не ждут писателя и наоборот
+    "PRAGMA journal_mode=WAL",
     """
-    Читает кэшированные данные для указанного города, если они актуальны.
+    CREATE TABLE IF NOT EXISTS cache (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        timestamp REAL NOT NULL,
+        expires_at REAL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (namespace, key)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_cache_timestamp ON cache(timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache(expires_at)",
+    "CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('writes_since_compact', 0)",
+)
+
+# Пути баз, для которых схема уже создана в этом процессе
+_schema_ready: set = set()
+
+_UPSERT_SQL = """
+INSERT INTO cache (namespace, key, timestamp, expires_at, value)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (namespace, key) DO UPDATE SET
+    timestamp = excluded.timestamp,
+    expires_at = excluded.expires_at,
+    value = excluded.value
+WHERE excluded.timestamp >= cache.timestamp
+"""
+
+
+class MemoryCache:
+    """
+    Потокобезопасный LRU-кэш в памяти процесса со счетчиками попаданий.
+    Хранит запись в сериализованном виде, чтобы вызывающий код
+    получал независимую копию данных, как и при чтении из базы.
+    """
+
+    def __init__(self, max_size: int = MEMORY_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str, ttl: Optional[timedelta]) -> Optional[str]:
+        """Возвращает сериализованное значение, если оно есть и не устарело."""
+        entry = self.get_entry(namespace, key, ttl)
+        return entry[1] if entry else None
+
+    def get_entry(self, namespace: str, key: str, ttl: Optional[timedelta]) -> Optional[Tuple[float, str]]:
+        """Возвращает метку времени и сериализованное значение, если запись не устарела."""
+        with self._lock:
+            entry = self._data.get((namespace, key))
+            if entry is None or _is_expired(entry[0], ttl):
+                self.misses += 1
+                return None
+            self._data.move_to_end((namespace, key))
+            self.hits += 1
+            return entry
+
+    def put(self, namespace: str, key: str, timestamp: float, value: str) -> None:
+        """Сохраняет значение, вытесняя давно не использованные записи."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[(namespace, key)] = (timestamp, value)
+            self._data.move_to_end((namespace, key))
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def discard(self, keys: Iterable[Tuple[str, str]]) -> None:
+        """Удаляет записи (пространство имен, ключ), если они есть."""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Очищает кэш и сбрасывает счетчики."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает счетчики попаданий/промахов и текущий размер."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+_memory = MemoryCache()
+
+
+def cache_stats() -> Dict[str, int]:
+    """
+    Статистика кэша в памяти процесса.
+
+    Returns:
+        Dict[str, int]: Словарь с ключами 'hits', 'misses', 'size'
+    """
+    return _memory.stats()
+
+
+def clear_memory_cache() -> None:
+    """Очищает кэш в памяти процесса (база на диске не меняется)."""
+    _memory.clear()
+
+
+def make_cache_key(
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> str:
+    """
+    Формирует ключ кэша по названию города или координатам.
     
     Args:
-        city (str): Ключ для поиска в кэше (название города или координаты)
+        city (str, optional): Название города
+        lat (float, optional): Широта
+        lon (float, optional): Долгота
         
     Returns:
-        Optional[Dict[str, Any]]: Данные о погоде из кэша или None, если:
-            - файл кэша не существует
-            - запись для города не найдена
-            - запись устарела (превышен TTL)
-            - произошла ошибка чтения
+        str: Название города или строка вида "lat,lon"
     """
-    #существет ли кеш
-    if not os.path.exists(CACHE_FILE):
-        return None
+    return city or f"{lat},{lon}"
+
+
+def make_geo_key(
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None
+) -> str:
+    """
+    Формирует ключ кэша геокодирования.
+    Для прямого поиска — название города без учета регистра,
+    для обратного — координаты, округленные до GEO_COORD_PRECISION знаков.
 
+    Args:
+        city (str, optional): Название города
+        lat (float, optional): Широта
+        lon (float, optional): Долгота
+
+    Returns:
+        str: Ключ вида "city:москва" или "coords:55.7558,37.6173"
+    """
+    if city:
+        return f"city:{city.strip().lower()}"
+    return f"coords:{round(float(lat), GEO_COORD_PRECISION)},{round(float(lon), GEO_COORD_PRECISION)}"
+
+
+def _is_expired(timestamp: float, ttl: Optional[timedelta]) -> bool:
+    """Проверяет, превышен ли срок жизни записи."""
+    return ttl is not None and datetime.now().timestamp() - timestamp > ttl.total_seconds()
+
+
+def _expires_at(timestamp: float, ttl: Optional[timedelta]) -> Optional[float]:
+    """Момент, после которого запись можно удалить; None — бессрочно."""
+    return None if ttl is None else timestamp + ttl.total_seconds()
+
+
+def _migrate_legacy(conn: sqlite3.Connection) -> None:
+    """
+    Переносит записи из старых JSON-файлов кэша в базу и удаляет файлы.
+    Поврежденный файл пропускается и тоже удаляется.
+    """
+    legacy = (
+        (CACHE_FILE, WEATHER_NAMESPACE, "weather", CACHE_TTL + CACHE_MAX_STALE),
+        (GEO_CACHE_FILE, GEO_NAMESPACE, "location", GEO_CACHE_TTL),
+    )
+    for path, namespace, field, ttl in legacy:
+        if not os.path.exists(path):
+            continue
+
+        # Блокировка записи в базе не дает двум процессам перенести файл дважды
+        with _transaction(conn):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    records = json.load(f)
+            except FileNotFoundError:
+                # Файл уже перенес другой процесс
+                continue
+            except Exception:
+                records = {}
+
+            _import_legacy_records(conn, records, namespace, field, ttl)
+            os.remove(path)
+
+
+def _import_legacy_records(
+    conn: sqlite3.Connection,
+    records: Any,
+    namespace: str,
+    field: str,
+    ttl: Optional[timedelta]
+) -> None:
+    """Записывает в базу записи одного старого JSON-файла, пропуская поврежденные."""
+    rows = []
+    for key, record in records.items() if isinstance(records, dict) else ():
+        try:
+            timestamp = datetime.fromisoformat(record["timestamp"]).timestamp()
+            value = json.dumps(record[field], ensure_ascii=False)
+        except Exception:
+            continue
+        rows.append((namespace, key, timestamp, _expires_at(timestamp, ttl), value))
+
+    conn.executemany(_UPSERT_SQL, rows)
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection) -> Iterator[None]:
+    """
+    Транзакция записи, сразу берущая блокировку базы (BEGIN IMMEDIATE).
+    Чтение и запись внутри нее атомарны относительно других процессов,
+    а ожидание блокировки ограничено CACHE_BUSY_TIMEOUT.
+    """
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        #читаем и парсим кеш .json
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    """Открывает базу кэша, создает таблицы и переносит старые JSON-файлы."""
+    # Схему создаем один раз на процесс, пока файл базы существует
+    if not os.path.exists(CACHE_DB_FILE):
+        _schema_ready.discard(CACHE_DB_FILE)
+
+    # isolation_level=None: транзакции открываем явно через _transaction
+    conn = sqlite3.connect(CACHE_DB_FILE, timeout=CACHE_BUSY_TIMEOUT, isolation_level=None)
+    try:
+        # В режиме WAL этого достаточно для целостности после сбоя процесса
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if CACHE_DB_FILE not in _schema_ready:
+            conn.execute(_SCHEMA_SQL[0])
+            with _transaction(conn):
+                for statement in _SCHEMA_SQL[1:]:
+                    conn.execute(statement)
+            _schema_ready.add(CACHE_DB_FILE)
+        _migrate_legacy(conn)
+        yield conn
+    finally:
+        conn.close()
+
+
+def _read_record(namespace: str, key: str, ttl: Optional[timedelta]) -> Optional[Dict[str, Any]]:
+    """
+    Читает запись из кэша, если она не устарела.
+
+    Args:
+        namespace (str): Пространство имен (погода, геокодирование)
+        key (str): Ключ записи
+        ttl (timedelta, optional): Срок жизни записи, None — бессрочно
+    """
+    entry = _read_entry(namespace, key, ttl)
+    return entry[1] if entry else None
+
+
+def _read_entry(namespace: str, key: str, ttl: Optional[timedelta]) -> Optional[Tuple[float, Dict[str, Any]]]:
+    """
+    Читает запись вместе с меткой времени, если она не старше ttl.
+    Сначала проверяется память процесса, затем база на диске.
+
+    Returns:
+        Tuple[float, Dict[str, Any]]: Метка времени (unix) и данные, либо None
+    """
+    cached = _memory.get_entry(namespace, key, ttl)
+    if cached is not None:
+        return cached[0], json.loads(cached[1])
+
+    try:
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT timestamp, value FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+
         #ищем нужную запись
-        record = data.get(city)
-        if not record:
+        if not row:
             return None
-        
-        # Преобразуем строку времени обратно в объект datetime
-        timestamp = datetime.fromisoformat(record["timestamp"])
-        if datetime.now() - timestamp > CACHE_TTL:
+
+        timestamp, value = row
+        if _is_expired(timestamp, ttl):
             return None
-        
-        # Возвращаем актуальные данные о погоде
-        return record["weather"]
-    
+
+        # Возвращаем актуальные данные и запоминаем их в памяти
+        data = json.loads(value)
+        _memory.put(namespace, key, timestamp, value)
+        return timestamp, data
+
     except Exception:
         return None
 
 
+def _write_record(namespace: str, key: str, value: Dict[str, Any], retention: Optional[timedelta]) -> None:
+    """
+    Добавляет или обновляет запись в кэше с текущей меткой времени.
+    Запись идет сквозь память процесса в базу на диске.
+
+    Args:
+        namespace (str): Пространство имен (погода, геокодирование)
+        key (str): Ключ записи
+        value (Dict[str, Any]): Данные для сохранения
+        retention (timedelta, optional): Сколько хранить запись до удаления компакцией, None — бессрочно
+    """
+    timestamp = datetime.now().timestamp()
+    serialized = json.dumps(value, ensure_ascii=False)
+    _memory.put(namespace, key, timestamp, serialized)
+
+    with _connect() as conn:
+        with _transaction(conn):
+            conn.execute(_UPSERT_SQL, (
+                namespace,
+                key,
+                timestamp,
+                _expires_at(timestamp, retention),
+                serialized,
+            ))
+            due = _count_write(conn)
+
+        # Ленивая компакция: раз в COMPACT_EVERY_WRITES записей
+        if due:
+            _compact(conn)
+
+
+def _count_write(conn: sqlite3.Connection) -> bool:
+    """Увеличивает счетчик записей и возвращает True, если пора сжимать кэш."""
+    if COMPACT_EVERY_WRITES <= 0:
+        return False
+
+    conn.execute("UPDATE cache_meta SET value = value + 1 WHERE name = 'writes_since_compact'")
+    (writes,) = conn.execute("SELECT value FROM cache_meta WHERE name = 'writes_since_compact'").fetchone()
+    if writes < COMPACT_EVERY_WRITES:
+        return False
+
+    conn.execute("UPDATE cache_meta SET value = 0 WHERE name = 'writes_since_compact'")
+    return True
+
+
+def _compact(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Удаляет устаревшие записи и вытесняет сверх лимитов те, чей срок хранения
+    истекает раньше (короткоживущая погода раньше долгоживущего геокодирования,
+    бессрочные — последними). Вытесненные записи удаляются и из памяти процесса.
+
+    Returns:
+        Dict[str, int]: Число удаленных устаревших ('expired') и вытесненных ('evicted')
+            записей, а также оставшихся записей ('entries') и байт ('bytes')
+    """
+    with _transaction(conn):
+        # Записи, срок хранения которых истек, больше никогда не будут прочитаны
+        expired = conn.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?",
+            (datetime.now().timestamp(),),
+        ).rowcount
+
+        evicted = 0
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(value AS BLOB))), 0) FROM cache").fetchone()
+
+        # Вытесняем записи с ближайшим сроком хранения, пока не уложимся в лимиты
+        victims = []
+        over_entries = max(0, entries - CACHE_MAX_ENTRIES) if CACHE_MAX_ENTRIES is not None else 0
+        over_bytes = max(0, size - CACHE_MAX_BYTES) if CACHE_MAX_BYTES is not None else 0
+        if over_entries or over_bytes:
+            freed = 0
+            rows = conn.execute(
+                "SELECT namespace, key, LENGTH(CAST(value AS BLOB)) FROM cache "
+                "ORDER BY expires_at IS NULL, expires_at, timestamp"
+            )
+            for namespace, key, length in rows:
+                if len(victims) >= over_entries and freed >= over_bytes:
+                    break
+                victims.append((namespace, key))
+                freed += length
+            rows.close()
+
+            conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", victims)
+            evicted = len(victims)
+            entries -= evicted
+            size -= freed
+
+    _memory.discard(victims)
+    return {"expired": expired, "evicted": evicted, "entries": entries, "bytes": size}
+
+
+def compact_cache(vacuum: bool = True) -> Dict[str, int]:
+    """
+    Сжимает кэш: удаляет устаревшие записи и применяет лимиты
+    CACHE_MAX_ENTRIES и CACHE_MAX_BYTES, вытесняя записи с ближайшим сроком хранения.
+
+    Args:
+        vacuum (bool): Вернуть освободившееся место файловой системе
+
+    Returns:
+        Dict[str, int]: Словарь с ключами 'expired', 'evicted', 'entries', 'bytes'
+    """
+    with _connect() as conn:
+        result = _compact(conn)
+        conn.execute("UPDATE cache_meta SET value = 0 WHERE name = 'writes_since_compact'")
+        if vacuum:
+            conn.execute("VACUUM")
+
+    # Вытесненные записи не должны оставаться и в памяти процесса
+    _memory.clear()
+    return result
+
+
+def read_cache(city: str) -> Optional[Dict[str, Any]]:
+    """
+    Читает кэшированные данные для указанного города, если они актуальны.
+    
+    Args:
+        city (str): Ключ для поиска в кэше (название города или координаты)
+        
+    Returns:
+        Optional[Dict[str, Any]]: Данные о погоде из кэша или None, если:
+            - запись для города не найдена
+            - запись устарела (превышен TTL)
+            - произошла ошибка чтения
+    """
+    return _read_record(WEATHER_NAMESPACE, city, CACHE_TTL)
+
+
 def write_cache(city: str, data: Dict[str, Any]) -> None:
     """
     Сохраняет данные в кэш с текущей меткой времени.
@@ -60,28 +494,118 @@ def write_cache(city: str, data: Dict[str, Any]) -> None:
         data (Dict[str, Any]): Данные о погоде для кэширования
         
     Note:
-        Если файл кэша не существует - создается новый.
-        Если файл существует - данные обновляются/добавляются.
-        Существующие записи для других городов сохраняются.
+        Если база кэша не существует - создается новая.
+        Обновляется/добавляется только одна строка, остальные
+        записи не перечитываются и не перезаписываются.
     """
-    #создаем пустой словарь для кэша
-    
-    cache: Dict[str, Any] = {}
-    
-    # Если файл кэша существует, пытаемся загрузить существующие данные
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                cache = json.load(f)
-        except Exception:
-            cache = {}
+    # Храним дольше TTL, чтобы запись можно было отдать как устаревшую
+    _write_record(WEATHER_NAMESPACE, city, data, CACHE_TTL + CACHE_MAX_STALE)
+
 
-    # Обновляем/добавляем запись для текущего города
-    cache[city] = {
-        "timestamp": datetime.now().isoformat(),
-        "weather": data
-    }
+def read_cache_entry(city: str, max_stale: Optional[timedelta] = None) -> Optional[Dict[str, Any]]:
+    """
+    Читает запись кэша, допуская устаревшие данные (stale-while-revalidate).
 
-    # Сохраняем обновленный кэш обратно в файл
-    with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
+    Args:
+        city (str): Ключ для поиска в кэше (название города или координаты)
+        max_stale (timedelta, optional): Насколько запись может быть старше CACHE_TTL;
+            по умолчанию CACHE_MAX_STALE
+
+    Returns:
+        Optional[Dict[str, Any]]: Словарь с ключами:
+            - weather: данные о погоде
+            - stale: запись старше CACHE_TTL и ее нужно обновить
+            - age: возраст записи в секундах
+        или None, если записи нет или она старше CACHE_TTL + max_stale
+    """
+    max_stale = CACHE_MAX_STALE if max_stale is None else max_stale
+    entry = _read_entry(WEATHER_NAMESPACE, city, CACHE_TTL + max_stale)
+    if not entry:
+        return None
+
+    timestamp, data = entry
+    age = datetime.now().timestamp() - timestamp
+    return {"weather": data, "stale": age > CACHE_TTL.total_seconds(), "age": age}
+
+
+def read_geo_cache(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Читает результат геокодирования из долгоживущего кэша.
+
+    Args:
+        key (str): Ключ из make_geo_key
+
+    Returns:
+        Optional[Dict[str, Any]]: Для прямого поиска — словарь 'city', 'lat', 'lon',
+            для обратного — словарь 'city'; None, если записи нет или она устарела
+    """
+    return _read_record(GEO_NAMESPACE, key, GEO_CACHE_TTL)
+
+
+def write_geo_cache(key: str, location: Dict[str, Any]) -> None:
+    """
+    Сохраняет результат геокодирования в долгоживущий кэш.
+
+    Args:
+        key (str): Ключ из make_geo_key
+        location (Dict[str, Any]): Найденное местоположение
+    """
+    _write_record(GEO_NAMESPACE, key, location, GEO_CACHE_TTL)
+
+
+def read_negative_cache(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Проверяет, не завершалось ли недавно геокодирование по ключу неудачей.
+
+    Args:
+        key (str): Ключ из make_geo_key
+
+    Returns:
+        Optional[Dict[str, Any]]: Словарь с ключами 'reason' ('not_found' или 'error')
+            и 'message', либо None, если неудачи не было или запись устарела
+    """
+    entry = _read_entry(NEGATIVE_NAMESPACE, key, NEGATIVE_CACHE_TTL)
+    if not entry:
+        return None
+
+    timestamp, failure = entry
+    # Сетевые ошибки помним меньше, чем «город не найден»
+    if failure.get("reason") == "error" and _is_expired(timestamp, NEGATIVE_ERROR_TTL):
+        return None
+    return failure
+
+
+def write_negative_cache(key: str, reason: str, message: str = "") -> None:
+    """
+    Запоминает неудачное геокодирование, чтобы не повторять запрос к API.
+    Хранится отдельно от данных о погоде и результатов геокодирования.
+
+    Args:
+        key (str): Ключ из make_geo_key
+        reason (str): 'not_found' — город не найден, 'error' — ошибка запроса
+        message (str): Текст ошибки для вывода пользователю
+    """
+    retention = NEGATIVE_ERROR_TTL if reason == "error" else NEGATIVE_CACHE_TTL
+    _write_record(NEGATIVE_NAMESPACE, key, {"reason": reason, "message": message}, retention)
+
+
+def read_forecast_cache(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Читает прогноз из кэша (представление Forecast.to_dict), если он не старше FORECAST_CACHE_TTL.
+
+    Args:
+        key (str): Ключ кэша прогноза (город или координаты и число дней)
+    """
+    return _read_record(FORECAST_NAMESPACE, key, FORECAST_CACHE_TTL)
+
+
+def write_forecast_cache(key: str, forecast: Dict[str, Any]) -> None:
+    """
+    Сохраняет прогноз в кэш. Массивы в Forecast.to_dict закодированы
+    в base64, поэтому запись в несколько раз меньше исходного JSON API.
+
+    Args:
+        key (str): Ключ кэша прогноза
+        forecast (Dict[str, Any]): Представление Forecast.to_dict
+    """
+    _write_record(FORECAST_NAMESPACE, key, forecast, FORECAST_CACHE_TTL)
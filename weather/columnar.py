@@ -0,0 +1,213 @@
+"""
+Модуль колоночной выгрузки и загрузки истории погоды (Parquet / Arrow IPC).
+История читается из БД серверным курсором порциями, каждая порция
+становится RecordBatch и дописывается в набор файлов, разбитый по дням
+и местоположениям (day=YYYY-MM-DD/location_id=N/). Загрузка читает такой
+набор порциями и пишет его в БД пакетными транзакциями.
+
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_ds
+except ImportError:  # pyarrow — необязательная зависимость, нужна только для колоночных форматов
+    pa = None
+    pa_ds = None
+
+COLUMNAR_FORMATS = {"parquet": "parquet", "arrow": "ipc"}  # формат CLI -> формат pyarrow.dataset
+COLUMNAR_CHUNK_SIZE = 50000  # строк в одном RecordBatch
+PARTITION_FIELDS = ("day", "location_id")
+
+
+def _require_pyarrow() -> None:
+    """Проверяет, что pyarrow установлен."""
+    if pa is None:
+        raise RuntimeError("Для выгрузки в Parquet/Arrow установите пакет pyarrow.")
+
+
+def _dataset_format(fmt: str) -> str:
+    """Формат pyarrow.dataset для формата CLI ('parquet' или 'arrow')."""
+    try:
+        return COLUMNAR_FORMATS[fmt]
+    except KeyError:
+        raise ValueError(f"Неизвестный колоночный формат: {fmt}") from None
+
+
+def history_schema() -> "pa.Schema":
+    """Схема колоночной истории: числа DECIMAL хранятся как float64 для быстрого сканирования."""
+    _require_pyarrow()
+    return pa.schema([
+        ("city_name", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("weather_time", pa.timestamp("us")),
+        ("temperature", pa.float64()),
+        ("wind_speed", pa.float64()),
+        ("wind_direction", pa.int32()),
+        ("recorded_at", pa.timestamp("us")),
+        ("day", pa.date32()),
+        ("location_id", pa.int32()),
+    ])
+
+
+def _float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _record_batch(rows: List[Dict[str, Any]], schema: "pa.Schema") -> "pa.RecordBatch":
+    """Собирает RecordBatch из строк БД (Decimal приводятся к float)."""
+    columns = {
+        "city_name": [row["city_name"] for row in rows],
+        "latitude": [_float(row["latitude"]) for row in rows],
+        "longitude": [_float(row["longitude"]) for row in rows],
+        "weather_time": [row["weather_time"] for row in rows],
+        "temperature": [_float(row["temperature"]) for row in rows],
+        "wind_speed": [_float(row["wind_speed"]) for row in rows],
+        "wind_direction": [row["wind_direction"] for row in rows],
+        "recorded_at": [row.get("recorded_at") for row in rows],
+        "day": [row["weather_time"].date() for row in rows],
+        "location_id": [row["location_id"] for row in rows],
+    }
+    return pa.RecordBatch.from_arrays(
+        [pa.array(columns[field.name], type=field.type) for field in schema],
+        schema=schema
+    )
+
+
+def _batches(rows: Iterable[Dict[str, Any]], schema: "pa.Schema", chunk_size: int,
+             counter: List[int]) -> Iterator["pa.RecordBatch"]:
+    """Группирует поток строк в RecordBatch по chunk_size строк."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            counter[0] += len(chunk)
+            yield _record_batch(chunk, schema)
+            chunk = []
+    if chunk:
+        counter[0] += len(chunk)
+        yield _record_batch(chunk, schema)
+
+
+def export_columnar(
+    rows: Iterable[Dict[str, Any]],
+    base_dir: str,
+    fmt: str = "parquet",
+    chunk_size: int = COLUMNAR_CHUNK_SIZE
+) -> int:
+    """
+    Выгружает строки истории в набор Parquet/Arrow-файлов,
+    разбитый по дням и местоположениям (hive: day=.../location_id=...).
+    Секции, в которые пишет выгрузка, перезаписываются.
+
+    Args:
+        rows: Итератор записей (WeatherDatabase.iter_weather_history)
+        base_dir (str): Каталог набора данных
+        fmt (str): 'parquet' или 'arrow' (Arrow IPC)
+        chunk_size (int): Строк в одном RecordBatch
+
+    Returns:
+        int: Количество выгруженных строк
+
+    Raises:
+        RuntimeError: Если pyarrow не установлен
+        ValueError: Если формат не поддерживается
+    """
+    _require_pyarrow()
+    dataset_format = _dataset_format(fmt)
+    schema = history_schema()
+    counter = [0]
+
+    pa_ds.write_dataset(
+        _batches(rows, schema, chunk_size, counter),
+        base_dir,
+        schema=schema,
+        format=dataset_format,
+        partitioning=pa_ds.partitioning(
+            pa.schema([schema.field(name) for name in PARTITION_FIELDS]), flavor="hive"
+        ),
+        # В одной порции не может быть больше секций, чем строк
+        max_partitions=max(1024, chunk_size),
+        existing_data_behavior="delete_matching",
+    )
+    return counter[0]
+
+
+def iter_columnar(
+    base_dir: str,
+    fmt: str = "parquet",
+    chunk_size: int = COLUMNAR_CHUNK_SIZE,
+    city: Optional[str] = None
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Читает набор Parquet/Arrow-файлов порциями.
+
+    Args:
+        base_dir (str): Каталог набора данных
+        fmt (str): 'parquet' или 'arrow'
+        chunk_size (int): Строк в одной порции
+        city (str, optional): Читать только этот город
+
+    Yields:
+        List[Dict[str, Any]]: Порция строк истории
+    """
+    _require_pyarrow()
+    dataset = pa_ds.dataset(base_dir, format=_dataset_format(fmt), partitioning="hive")
+    columns = ["city_name", "latitude", "longitude", "weather_time",
+               "temperature", "wind_speed", "wind_direction", "recorded_at"]
+    scan_filter = pa_ds.field("city_name") == city if city else None
+
+    for batch in dataset.to_batches(columns=columns, filter=scan_filter, batch_size=chunk_size):
+        if batch.num_rows:
+            yield batch.to_pylist()
+
+
+def to_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Приводит строку колоночной истории к формату ответа API для записи в БД.
+    Исходное время записи recorded_at сохраняется.
+    """
+    recorded_at = row.get("recorded_at")
+    return {
+        "city": row["city_name"],
+        "latitude": row["latitude"],
+        "longitude": row["longitude"],
+        "recorded_at": recorded_at.isoformat() if recorded_at else None,
+        "current_weather": {
+            "temperature": row["temperature"],
+            "windspeed": row["wind_speed"],
+            "winddirection": row["wind_direction"],
+            "time": row["weather_time"].isoformat(),
+        },
+    }
+
+
+def import_columnar(
+    database,
+    base_dir: str,
+    fmt: str = "parquet",
+    chunk_size: int = COLUMNAR_CHUNK_SIZE,
+    city: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Загружает набор Parquet/Arrow-файлов в БД: по транзакции на порцию.
+    Повторная загрузка того же архива не создает дубликатов; время записи
+    (recorded_at) берется из архива.
+
+    Args:
+        database: WeatherDatabase (нужен write_weather_batch)
+        base_dir (str): Каталог набора данных
+        fmt (str): 'parquet' или 'arrow'
+        chunk_size (int): Строк в одной транзакции
+        city (str, optional): Загружать только этот город
+
+    Returns:
+        Dict[str, int]: 'rows' — прочитано строк, 'written' — вставлено или изменено
+    """
+    rows = written = 0
+    for chunk in iter_columnar(base_dir, fmt, chunk_size, city):
+        rows += len(chunk)
+        written += database.write_weather_batch([to_payload(row) for row in chunk])
+    return {"rows": rows, "written": written}
@@ -4,14 +4,34 @@
 Добавлена БД.
 """
 
+import sys
+import threading
+
 from colorama import Fore, Style, init
-from .api import get_weather
-from .cache import read_cache, write_cache
+from .api import get_weather, get_forecast
+from .cache import (
+    read_cache, read_cache_entry, write_cache, make_cache_key, compact_cache,
+    read_forecast_cache, write_forecast_cache,
+)
+from .forecast import Forecast, parse_forecast, FORECAST_HOURS
+from .analytics import (
+    load_history, summarize, DEFAULT_PERCENTILES, DEFAULT_BASE_TEMP, DEFAULT_ROLLING_DAYS,
+)
+from .geo import quantize
+from .batch import collect_batch_items, fetch_many, fetch_many_async, DEFAULT_WORKERS
 from .database import db
+from .config import WRITE_BEHIND_CONFIG, HTTP_CONFIG
+from .writebehind import get_write_behind
+from .export import detect_format, write_history
+from .columnar import COLUMNAR_FORMATS, export_columnar, import_columnar
 
 # Инициализация colorama 
 init(autoreset=True)
 
+# Ключи, которые уже обновляются в фоне этим процессом
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
 
 def handle_command(args) -> None:
     """
@@ -25,6 +45,22 @@ def handle_command(args) -> None:
             - refresh: флаг принудительного обновления кэша
             - history: показать историю запросов
             - stats: показать статистику
+            - batch, batch_file: элементы пакетного режима
+            - workers: число параллельных запросов в пакетном режиме
+            - use_async: использовать asyncio-движок в пакетном режиме
+            - compact_cache: сжать кэш
+            - allow_stale: отдавать устаревший кэш и обновлять его в фоне
+            - prune_history: удалить старые секции истории в БД
+            - refresh_rollups: пересчитать дневные агрегаты (число дней, 0 — вся история)
+            - write_behind: сохранять в БД в фоне, не задерживая вывод
+            - export: файл для выгрузки истории ('-' — stdout)
+            - export_format: формат выгрузки и загрузки (csv, ndjson, parquet, arrow)
+            - import_history: каталог Parquet/Arrow для загрузки в БД
+            - forecast: прогноз на указанное число дней
+            - hours: окно ближайших часов в сводке прогноза
+            - days: период статистики в днях
+            - per_request: координат в одном запросе погоды в пакетном режиме
+            - compare, percentiles, base_temp, rolling: расширенная аналитика к --stats
     """
     
     # Извлекаем аргументы из командной строки
@@ -35,12 +71,59 @@ def handle_command(args) -> None:
     refresh = args.refresh
     history = getattr(args, 'history', False)
     stats = getattr(args, 'stats', False)
+    batch = getattr(args, 'batch', None)
+    batch_file = getattr(args, 'batch_file', None)
+    workers = getattr(args, 'workers', DEFAULT_WORKERS)
+    use_async = getattr(args, 'use_async', False)
+    compact = getattr(args, 'compact_cache', False)
+    allow_stale = getattr(args, 'allow_stale', False)
+    prune = getattr(args, 'prune_history', False)
+    refresh_rollups = getattr(args, 'refresh_rollups', None)
+    write_behind = getattr(args, 'write_behind', False) or WRITE_BEHIND_CONFIG.enabled
+    export = getattr(args, 'export', None)
+    export_format = getattr(args, 'export_format', None)
+    import_history = getattr(args, 'import_history', None)
+    forecast_days = getattr(args, 'forecast', None)
+    hours = getattr(args, 'hours', FORECAST_HOURS)
+    days = getattr(args, 'days', 7)
+    per_request = getattr(args, 'per_request', None)
+    compare = getattr(args, 'compare', None)
+    qs = getattr(args, 'percentiles', None)
+    base_temp = getattr(args, 'base_temp', None)
+    rolling = getattr(args, 'rolling', None)
+    
+    # Сжатие кэша не требует ни БД, ни запросов к API
+    if compact:
+        handle_compact_cache()
+        return
     
      # Инициализируем базу данных при первом запуске
-    try:
-        db.init_db()
-    except Exception as e:
-        print(f"{Fore.YELLOW}⚠ Предупреждение: Не удалось инициализировать БД: {e}{Style.RESET_ALL}")
+     # (при отложенной записи схему проверяет фоновый поток, если БД нужна только для записи)
+    if not write_behind or history or stats or prune or refresh_rollups is not None or export or import_history:
+        try:
+            db.init_db()
+        except Exception as e:
+            print(f"{Fore.YELLOW}⚠ Предупреждение: Не удалось инициализировать БД: {e}{Style.RESET_ALL}")
+
+    # Удаление старой истории по сроку хранения
+    if prune:
+        handle_prune_history()
+        return
+
+    # Полный пересчет дневных агрегатов (например, из cron)
+    if refresh_rollups is not None:
+        handle_refresh_rollups(refresh_rollups or None)
+        return
+
+    # Загрузка архива истории в БД
+    if import_history:
+        handle_import_history(import_history, city=city, fmt=export_format)
+        return
+
+    # Выгрузка всей истории (города или всех городов)
+    if export:
+        handle_export(export, city=city, fmt=export_format)
+        return
 
     # Обработка команды истории
     if history and city:
@@ -49,7 +132,34 @@ def handle_command(args) -> None:
     
     # Обработка команды статистики
     if stats and city:
-        show_weather_stats(city)
+        # Дополнительные параметры включают аналитику по сырой истории на NumPy
+        if compare or qs or base_temp is not None or rolling:
+            show_weather_analytics(
+                [city] + list(compare or []),
+                days=days,
+                qs=qs,
+                base=DEFAULT_BASE_TEMP if base_temp is None else base_temp,
+                window=rolling or DEFAULT_ROLLING_DAYS,
+            )
+        else:
+            show_weather_stats(city, days)
+        return
+    
+    # Пакетный режим: много городов/координат за один запуск
+    if batch or batch_file:
+        # asyncio-движок запрашивает каждый город отдельно и группировку не поддерживает
+        if use_async and per_request is not None:
+            print(f"{Fore.RED} Ошибка: --per-request не поддерживается вместе с --async{Style.RESET_ALL}")
+            return
+        if per_request is None:
+            per_request = HTTP_CONFIG.batch_locations
+        try:
+            items = collect_batch_items(batch, batch_file)
+        except Exception as e:
+            print(f"{Fore.RED}⚠ Ошибка чтения пакета: {e}{Style.RESET_ALL}")
+            return
+        handle_batch(items, refresh=refresh, workers=workers, use_async=use_async,
+                     write_behind=write_behind, per_request=per_request)
         return
     
     # проверяем ввод
@@ -58,8 +168,28 @@ def handle_command(args) -> None:
         print(f"{Fore.RED} Ошибка: нужно указать либо название города, либо координаты (--lat и --lon){Style.RESET_ALL}")
         return
 
+    # Близкие координаты приводим к одной точке: общий кэш, запрос и запись в БД
+    if not city:
+        lat, lon = quantize(lat, lon)
+
     # Создаём ключ для кэша (по городу или координатам)
-    cache_key = city or f"{lat},{lon}"
+    cache_key = make_cache_key(city, lat, lon)
+
+    # Прогноз на несколько дней одним запросом вместо опроса текущей погоды
+    if forecast_days is not None:
+        handle_forecast(cache_key, city=city, lat=lat, lon=lon, days=forecast_days, hours=hours, refresh=refresh,
+                        write_behind=write_behind)
+        return
+
+    # Устаревшие данные показываем сразу, а обновляем в фоне
+    if not refresh and allow_stale:
+        entry = read_cache_entry(cache_key)
+        if entry and entry["stale"]:
+            minutes = int(entry["age"] // 60)
+            print(f"{Fore.YELLOW}✅ Погода для {cache_key} (из кэша, {minutes} мин назад, обновляется):{Style.RESET_ALL}")
+            print_weather(entry["weather"])
+            refresh_in_background(cache_key, city=city, lat=lat, lon=lon, write_behind=write_behind)
+            return
 
     # Проверяем кэш, если не нужно обновление
     if not refresh:
@@ -74,15 +204,265 @@ def handle_command(args) -> None:
         data = get_weather(city=city, lat=lat, lon=lon)
         write_cache(cache_key, data)
         
-        # Сохраняем в базу данных
-        try:
+        save_weather(data, write_behind)
+        print_weather(data)
+    except Exception as e:
+        print(f"{Fore.RED}⚠ Ошибка: {e}{Style.RESET_ALL}")
+
+
+def save_weather(data, write_behind: bool = False) -> None:
+    """
+    Сохраняет показание в БД: сразу или через очередь отложенной записи.
+    Ошибка БД не прерывает вывод погоды, а выводится предупреждением.
+    
+    Args:
+        data: Данные о погоде из API
+        write_behind: Сохранять в фоне через очередь отложенной записи
+    """
+    try:
+        if write_behind:
+            get_write_behind().put(data)
+        else:
             db.save_weather_data(data)
+    except Exception as e:
+        print(f"{Fore.YELLOW}⚠ Не удалось сохранить в БД: {e}{Style.RESET_ALL}")
+
+
+def refresh_in_background(cache_key: str, city=None, lat=None, lon=None, write_behind: bool = False):
+    """
+    Обновляет запись кэша и БД в фоновом потоке.
+    Поток не демонический: процесс дождется обновления перед выходом,
+    но пользователь уже увидел данные.
+    
+    Args:
+        cache_key: Ключ кэша
+        city, lat, lon: Параметры запроса погоды
+        write_behind: Сохранять в БД через очередь отложенной записи
+        
+    Returns:
+        threading.Thread: Запущенный поток или None, если ключ уже обновляется
+    """
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return None
+        _refreshing.add(cache_key)
+
+    def _refresh() -> None:
+        try:
+            data = get_weather(city=city, lat=lat, lon=lon)
+            write_cache(cache_key, data)
+            save_weather(data, write_behind)
         except Exception as e:
-            print(f"{Fore.YELLOW}⚠ Не удалось сохранить в БД: {e}{Style.RESET_ALL}")
+            print(f"{Fore.YELLOW}⚠ Не удалось обновить {cache_key} в фоне: {e}{Style.RESET_ALL}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(cache_key)
+
+    thread = threading.Thread(target=_refresh, name=f"refresh-{cache_key}")
+    thread.start()
+    return thread
+
+
+def handle_forecast(cache_key: str, city=None, lat=None, lon=None, days=None, hours=FORECAST_HOURS, refresh=False,
+                    write_behind: bool = False) -> None:
+    """
+    Показывает почасовой и дневной прогноз. Прогноз кэшируется в компактном
+    виде (массивы float32 в base64) и после вывода сохраняется в БД одной строкой.
+    
+    Args:
+        cache_key: Ключ кэша местоположения
+        city, lat, lon: Параметры запроса
+        days: Число дней прогноза
+        hours: Окно ближайших часов в сводке
+        refresh: Игнорировать кэш
+        write_behind: Сохранять в БД в фоновом потоке, не задерживая вывод
+    """
+    forecast_key = f"{cache_key}:{days}"
+    
+    try:
+        cached = None if refresh else read_forecast_cache(forecast_key)
+        if cached:
+            forecast = Forecast.from_dict(cached)
+            source = " (из кэша)"
+        else:
+            forecast = parse_forecast(get_forecast(city=city, lat=lat, lon=lon, days=days))
+            write_forecast_cache(forecast_key, forecast.to_dict())
+            source = ""
+    except Exception as e:
+        print(f"{Fore.RED}⚠ Ошибка прогноза: {e}{Style.RESET_ALL}")
+        return
+    
+    print(f"{Fore.GREEN}✅ Прогноз для {forecast.city} на {days} дн.{source}:{Style.RESET_ALL}")
+    print_forecast(forecast, hours)
+    
+    # В БД сохраняем только свежий прогноз из API
+    if not cached:
+        save_forecast(forecast, write_behind)
+
+
+def save_forecast(forecast: Forecast, write_behind: bool = False):
+    """
+    Сохраняет прогноз в БД: сразу или в фоновом потоке.
+    Фоновый поток не демонический — процесс дождется записи перед выходом,
+    но пользователь уже увидел прогноз.
+    
+    Args:
+        forecast: Прогноз
+        write_behind: Сохранять в фоне (схему БД проверяет сам поток)
         
-        print_weather(data)
+    Returns:
+        threading.Thread: Запущенный поток или None при записи сразу
+    """
+    if not write_behind:
+        db.save_forecast(forecast)
+        return None
+
+    def _save() -> None:
+        try:
+            db.init_db()
+            db.save_forecast(forecast)
+        except Exception as e:
+            print(f"{Fore.YELLOW}⚠ Не удалось сохранить прогноз в БД: {e}{Style.RESET_ALL}")
+
+    thread = threading.Thread(target=_save, name="save-forecast")
+    thread.start()
+    return thread
+
+
+def print_forecast(forecast: Forecast, hours: int = FORECAST_HOURS) -> None:
+    """
+    Печатает сводку прогноза на ближайшие часы и по дням.
+    
+    Args:
+        forecast: Прогноз
+        hours: Окно ближайших часов
+    """
+    summary = forecast.summary(hours)
+    
+    print(f"{Fore.GREEN}Координаты:{Style.RESET_ALL} {forecast.latitude}°, {forecast.longitude}°")
+    
+    print(f"{Fore.YELLOW}────────────────────────────{Style.RESET_ALL}")
+    
+    if summary["hours"]:
+        print(f"{Fore.MAGENTA}Ближайшие {summary['hours']} ч:{Style.RESET_ALL} {summary['start']} — {summary['end']}")
+        
+        print(f"{Fore.BLUE}Температура:{Style.RESET_ALL} {summary['temp_min']}…{summary['temp_max']} °C (средняя {summary['temp_mean']} °C)")
+        
+        print(f"{Fore.BLUE}Осадки:{Style.RESET_ALL} {summary['precipitation_total']} мм, часов с осадками: {summary['precipitation_hours']}")
+        
+        print(f"{Fore.BLUE}Ветер до:{Style.RESET_ALL} {summary['wind_max']} км/ч")
+        
+        print(f"{Fore.YELLOW}────────────────────────────{Style.RESET_ALL}")
+    
+    for day in forecast.daily_summary():
+        print(f"{Fore.MAGENTA}{day['day']}:{Style.RESET_ALL} {day['temp_min']}…{day['temp_max']} °C, "
+              f"осадки {day['precipitation_sum']} мм, ветер до {day['wind_max']} км/ч")
+
+
+def handle_compact_cache() -> None:
+    """Сжимает кэш и выводит, сколько записей удалено и осталось."""
+    try:
+        result = compact_cache()
     except Exception as e:
-        print(f"{Fore.RED}⚠ Ошибка: {e}{Style.RESET_ALL}")
+        print(f"{Fore.RED}⚠ Ошибка сжатия кэша: {e}{Style.RESET_ALL}")
+        return
+
+    print(f"{Fore.GREEN}✅ Кэш сжат:{Style.RESET_ALL} удалено устаревших {result['expired']}, "
+          f"вытеснено {result['evicted']}, осталось {result['entries']} записей ({result['bytes']} байт)")
+
+
+def handle_prune_history() -> None:
+    """Удаляет из БД секции истории старше срока хранения (DB_RETENTION_MONTHS)."""
+    if db.config.retention_months <= 0:
+        print(f"{Fore.YELLOW}Срок хранения не задан (DB_RETENTION_MONTHS=0), история хранится бессрочно{Style.RESET_ALL}")
+        return
+
+    try:
+        dropped = db.drop_old_partitions()
+    except Exception as e:
+        print(f"{Fore.RED}⚠ Ошибка удаления истории: {e}{Style.RESET_ALL}")
+        return
+
+    print(f"{Fore.GREEN}✅ Удалено секций истории: {len(dropped)}{Style.RESET_ALL} "
+          f"(хранится {db.config.retention_months} мес.)")
+
+
+def handle_refresh_rollups(days=None) -> None:
+    """
+    Пересчитывает дневные агрегаты статистики из сырых записей.
+    
+    Args:
+        days: Число последних дней; None — вся история
+    """
+    try:
+        count = db.refresh_rollups(days)
+    except Exception as e:
+        print(f"{Fore.RED}⚠ Ошибка пересчета агрегатов: {e}{Style.RESET_ALL}")
+        return
+
+    period = f"за последние {days} дней" if days else "за всю историю"
+    print(f"{Fore.GREEN}✅ Дневные агрегаты пересчитаны {period}:{Style.RESET_ALL} {count}")
+
+
+def handle_batch(
+    items,
+    refresh: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    use_async: bool = False,
+    write_behind: bool = False,
+    per_request: int = 1
+) -> None:
+    """
+    Получает погоду для нескольких городов/координат параллельно
+    и выводит результат по каждому элементу.
+    
+    Args:
+        items: Элементы пакета (словари с ключами 'city', 'lat', 'lon')
+        refresh: Игнорировать кэш
+        workers: Максимальное число одновременных запросов
+        use_async: Использовать asyncio-движок вместо пула потоков
+        write_behind: Сохранять в БД в фоне через очередь отложенной записи
+        per_request: Координат в одном запросе погоды (промахи кэша группируются);
+            с use_async не используется — asyncio-движок запрашивает каждый город отдельно
+    """
+    if not items:
+        print(f"{Fore.RED} Ошибка: пакет пуст{Style.RESET_ALL}")
+        return
+
+    if use_async:
+        results = fetch_many_async(items, concurrency=workers, refresh=refresh)
+    else:
+        results = fetch_many(items, workers=workers, refresh=refresh, group_size=per_request)
+    failed = 0
+    fresh = []
+
+    for result in results:
+        if result["error"]:
+            failed += 1
+            print(f"{Fore.RED}⚠ {result['key']}: {result['error']}{Style.RESET_ALL}")
+            continue
+
+        source = " (из кэша)" if result["cached"] else ""
+        print(f"{Fore.GREEN}✅ Погода для {result['key']}{source}:{Style.RESET_ALL}")
+        print_weather(result["data"])
+
+        # В БД сохраняем только свежие данные из API
+        if not result["cached"]:
+            fresh.append(result["data"])
+
+    # Все свежие данные — одной транзакцией
+    if fresh:
+        try:
+            if write_behind:
+                queue = get_write_behind()
+                for data in fresh:
+                    queue.put(data)
+            else:
+                db.save_weather_batch(fresh)
+        except Exception as e:
+            print(f"{Fore.YELLOW}⚠ Не удалось сохранить в БД: {e}{Style.RESET_ALL}")
+
+    print(f"{Fore.CYAN}Готово: {len(results) - failed} успешно, {failed} с ошибками{Style.RESET_ALL}")
 
 
 def print_weather(weather_data) -> None:
@@ -170,4 +550,126 @@ def show_weather_stats(city: str, days: int = 7) -> None:
         print(f"{Fore.YELLOW}────────────────────────────{Style.RESET_ALL}")
         
     except Exception as e:
-        print(f"{Fore.RED}Ошибка при получении статистики: {e}{Style.RESET_ALL}")
\ No newline at end of file
+        print(f"{Fore.RED}Ошибка при получении статистики: {e}{Style.RESET_ALL}")
+
+
+def show_weather_analytics(cities, days: int = 7, qs=None, base: float = DEFAULT_BASE_TEMP,
+                           window: int = DEFAULT_ROLLING_DAYS) -> None:
+    """
+    Показывает расширенную статистику одного или нескольких городов:
+    перцентили, скользящее среднее, градусо-дни и среднее направление ветра.
+    
+    Args:
+        cities: Названия городов; несколько — для сравнения
+        days: Количество дней для анализа
+        qs: Перцентили строкой через запятую ('10,50,90'); по умолчанию DEFAULT_PERCENTILES
+        base: Базовая температура градусо-дней
+        window: Окно скользящего среднего, дней
+    """
+    try:
+        percentiles = [float(q) for q in qs.split(",")] if qs else list(DEFAULT_PERCENTILES)
+    except ValueError:
+        print(f"{Fore.RED} Ошибка: перцентили задаются числами через запятую, например 10,50,90{Style.RESET_ALL}")
+        return
+    
+    try:
+        summary = summarize(load_history(db, cities, days), percentiles, base, window)
+    except Exception as e:
+        print(f"{Fore.RED}Ошибка при расчете статистики: {e}{Style.RESET_ALL}")
+        return
+    
+    for city in cities:
+        stats = summary.get(city)
+        if not stats:
+            print(f"{Fore.YELLOW}Статистика для города '{city}' за последние {days} дней не найдена.{Style.RESET_ALL}")
+            continue
+        
+        print(f"{Fore.CYAN} Статистика погоды для {city} за последние {days} дней:{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}────────────────────────────{Style.RESET_ALL}")
+        print(f"Количество записей: {stats['count']} (дней: {stats['days']})")
+        print(f"Температура: средняя {stats['temp_mean']} °C, от {stats['temp_min']} до {stats['temp_max']} °C")
+        print("Перцентили температуры: " + ", ".join(
+            f"p{q:g} = {value} °C" for q, value in stats['percentiles'].items()
+        ))
+        print(f"Скользящее среднее за {window} дн.: {stats['rolling_mean']} °C")
+        print(f"Градусо-дни (база {base:g} °C): отопления {stats['heating_degree_days']}, "
+              f"охлаждения {stats['cooling_degree_days']}")
+        print(f"Ветер: средняя скорость {stats['wind_mean']} км/ч, среднее направление "
+              f"{stats['wind_direction_mean']}° (устойчивость {stats['wind_steadiness']})")
+        print(f"{Fore.YELLOW}────────────────────────────{Style.RESET_ALL}")
+    
+    # Сравнение: отклонение от первого города
+    found = [city for city in cities if city in summary]
+    if len(found) > 1 and summary[found[0]]['temp_mean'] is not None:
+        reference = summary[found[0]]
+        print(f"{Fore.CYAN} Сравнение с {found[0]}:{Style.RESET_ALL}")
+        for city in found[1:]:
+            stats = summary[city]
+            if stats['temp_mean'] is None:
+                continue
+            print(f"  {city}: температура {stats['temp_mean'] - reference['temp_mean']:+.1f} °C, "
+                  f"градусо-дни отопления {stats['heating_degree_days'] - reference['heating_degree_days']:+.1f}")
+
+
+def handle_export(path: str, city=None, fmt=None) -> None:
+    """
+    Выгружает историю погоды из БД в CSV, NDJSON, Parquet или Arrow потоково:
+    строки читаются серверным курсором и сразу пишутся в файл.
+    
+    Args:
+        path: Путь к файлу ('-' — stdout) или каталог для parquet/arrow
+        city: Название города; None — все города
+        fmt: Формат; по умолчанию по расширению файла
+    """
+    fmt = detect_format(path, fmt)
+    # При выводе в stdout сообщения идут в stderr, чтобы не смешиваться с данными
+    status = sys.stderr if path == "-" else sys.stdout
+    
+    if fmt in COLUMNAR_FORMATS and path == "-":
+        print(f"{Fore.RED} Ошибка: формат {fmt} выгружается только в каталог{Style.RESET_ALL}", file=status)
+        return
+    
+    try:
+        if fmt in COLUMNAR_FORMATS:
+            # Набор файлов, разбитый по дням и местоположениям
+            count = export_columnar(db.iter_weather_history(city), path, fmt)
+        elif path == "-":
+            count = write_history(db.iter_weather_history(city), sys.stdout, fmt)
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as out:
+                count = write_history(db.iter_weather_history(city), out, fmt)
+    except Exception as e:
+        print(f"{Fore.RED}⚠ Ошибка выгрузки истории: {e}{Style.RESET_ALL}", file=status)
+        return
+    
+    source = f"для {city}" if city else "всех городов"
+    target = "stdout" if path == "-" else path
+    print(f"{Fore.GREEN}✅ Выгружено записей {source}: {count}{Style.RESET_ALL} ({fmt}, {target})", file=status)
+
+
+def handle_import_history(path: str, city=None, fmt=None) -> None:
+    """
+    Загружает в БД историю из каталога Parquet/Arrow, созданного --export.
+    Повторная загрузка не создает дубликатов.
+    
+    Args:
+        path: Каталог набора данных
+        city: Загрузить только этот город; None — все
+        fmt: 'parquet' или 'arrow'; по умолчанию по расширению, иначе parquet
+    """
+    if fmt is None:
+        fmt = detect_format(path)
+        if fmt not in COLUMNAR_FORMATS:
+            fmt = "parquet"
+    elif fmt not in COLUMNAR_FORMATS:
+        print(f"{Fore.RED} Ошибка: загрузка поддерживает только форматы parquet и arrow{Style.RESET_ALL}")
+        return
+    
+    try:
+        result = import_columnar(db, path, fmt, city=city)
+    except Exception as e:
+        print(f"{Fore.RED}⚠ Ошибка загрузки истории: {e}{Style.RESET_ALL}")
+        return
+    
+    print(f"{Fore.GREEN}✅ Загружено записей: {result['rows']}{Style.RESET_ALL} "
+          f"(новых или измененных {result['written']}, {fmt}, {path})")
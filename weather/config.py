@@ -1,6 +1,6 @@
 # config.py
 """
-Конфигурация базы данных PostgreSQL
+Конфигурация базы данных PostgreSQL, отложенной записи, HTTP-клиента и квантования координат
 """
 
 import os
@@ -13,10 +13,52 @@ class DatabaseConfig:
     name: str = os.getenv("DB_NAME", "weather_db")
     user: str = os.getenv("DB_USER", "weather_user")
     password: str = os.getenv("DB_PASSWORD", "weather_pass")
+    pool_min: int = int(os.getenv("DB_POOL_MIN", "1"))                       # соединений держим открытыми в простое
+    pool_max: int = int(os.getenv("DB_POOL_MAX", "5"))                       # максимум одновременных соединений
+    pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))          # ожидание свободного соединения, с
+    pool_max_lifetime: float = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))  # пересоздавать соединение старше, с; 0 — без ограничения
+    connect_timeout: int = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))         # ожидание подключения к серверу, с
+    pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "1") == "1"          # проверять соединение перед выдачей
+    retention_months: int = int(os.getenv("DB_RETENTION_MONTHS", "0"))      # хранить историю, месяцев; 0 — бессрочно
+
+@dataclass
+class WriteBehindConfig:
+    enabled: bool = os.getenv("DB_WRITE_BEHIND", "0") == "1"                       # писать в БД в фоне
+    batch_size: int = int(os.getenv("DB_WRITE_BEHIND_BATCH", "100"))              # записей в одной транзакции
+    flush_interval: float = float(os.getenv("DB_WRITE_BEHIND_INTERVAL", "1"))     # ожидание добора пакета, с
+    max_queue: int = int(os.getenv("DB_WRITE_BEHIND_QUEUE", "10000"))             # записей в очереди в памяти
+    exit_timeout: float = float(os.getenv("DB_WRITE_BEHIND_EXIT_TIMEOUT", "5"))   # ожидание записи при выходе, с
+    spool_file: str = os.getenv("DB_WRITE_BEHIND_SPOOL", "weather_spool.jsonl")  # файл для записей, если БД недоступна
+    spool_max_bytes: int = int(os.getenv("DB_WRITE_BEHIND_SPOOL_MAX_BYTES", str(10 * 1024 * 1024)))
+
+@dataclass
+class HttpConfig:
+    pool_connections: int = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))   # число пулов (по одному на хост)
+    pool_maxsize: int = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))          # keep-alive соединений на хост
+    pool_block: bool = os.getenv("HTTP_POOL_BLOCK", "0") == "1"            # ждать свободное соединение вместо нового
+    max_retries: int = int(os.getenv("HTTP_MAX_RETRIES", "0"))             # повторы при сетевых ошибках
+    timeout: float = float(os.getenv("HTTP_TIMEOUT", "10"))                # таймаут запроса в секундах
+    batch_locations: int = int(os.getenv("HTTP_BATCH_LOCATIONS", "50"))    # координат в одном запросе погоды в пакетном режиме; 1 — по одной
+
+@dataclass
+class SpatialConfig:
+    scheme: str = os.getenv("COORD_SCHEME", "grid")                          # grid, geohash или none
+    grid_step: float = float(os.getenv("COORD_GRID_STEP", "0.01"))          # шаг сетки в градусах (~1 км)
+    geohash_precision: int = int(os.getenv("COORD_GEOHASH_PRECISION", "6")) # символов geohash (~1.2 x 0.6 км)
+
+    def __post_init__(self):
+        if not self.grid_step > 0:
+            raise ValueError(f"COORD_GRID_STEP должен быть больше нуля: {self.grid_step}")
+        if self.geohash_precision < 1:
+            raise ValueError(f"COORD_GEOHASH_PRECISION должен быть не меньше 1: {self.geohash_precision}")
 
 # Конфигурация по умолчанию
 DB_CONFIG = DatabaseConfig()
+WRITE_BEHIND_CONFIG = WriteBehindConfig()
+HTTP_CONFIG = HttpConfig()
+SPATIAL_CONFIG = SpatialConfig()
 
-def get_connection_string() -> str:
+def get_connection_string(config: DatabaseConfig = None) -> str:
     """Возвращает строку подключения к PostgreSQL"""
-    return f"postgresql://{DB_CONFIG.user}:{DB_CONFIG.password}@{DB_CONFIG.host}:{DB_CONFIG.port}/{DB_CONFIG.name}"
\ No newline at end of file
+    config = config or DB_CONFIG
+    return f"postgresql://{config.user}:{config.password}@{config.host}:{config.port}/{config.name}"
\ No newline at end of file
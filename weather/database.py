@@ -4,69 +4,320 @@
 """
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from psycopg2 import pool as pg_pool
+from psycopg2 import sql
+from psycopg2.extras import RealDictCursor, execute_values
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+from datetime import datetime, date
+from contextlib import contextmanager
+import atexit
 import logging
+import re
+import threading
+import time
 
-from .config import get_connection_string
+from .config import DB_CONFIG, DatabaseConfig, get_connection_string
+from .migrations import migrate, SCHEMA_VERSION
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BATCH_PAGE_SIZE = 1000  # строк в одном многострочном INSERT
+LOCATION_CACHE_SIZE = 10000  # максимум местоположений в кэше ID процесса
+# Запись о погоде: одна строка на (location_id, weather_time); повтор с теми же
+# значениями ничего не пишет и не возвращается в RETURNING.
+# recorded_at — время записи, если передано (загрузка архива), иначе текущее
+UPSERT_WEATHER_TEMPLATE = "(%s, %s, %s, %s, %s, COALESCE(%s::TIMESTAMP, CURRENT_TIMESTAMP))"
+UPSERT_WEATHER_SQL = """
+INSERT INTO weather_records 
+(location_id, temperature, wind_speed, wind_direction, weather_time, recorded_at)
+VALUES %s
+ON CONFLICT (location_id, weather_time) DO UPDATE SET
+    temperature = EXCLUDED.temperature,
+    wind_speed = EXCLUDED.wind_speed,
+    wind_direction = EXCLUDED.wind_direction,
+    recorded_at = EXCLUDED.recorded_at
+WHERE (weather_records.temperature, weather_records.wind_speed, weather_records.wind_direction)
+    IS DISTINCT FROM (EXCLUDED.temperature, EXCLUDED.wind_speed, EXCLUDED.wind_direction)
+RETURNING location_id, weather_time
+"""
+
+# Блокировки пересчета агрегатов: (ROLLUP_LOCK_ID, location_id) на время транзакции.
+# Без них два писателя одного местоположения и дня (READ COMMITTED) пересчитывают
+# агрегат, не видя незафиксированной записи друг друга, и последний затирает его неполным
+ROLLUP_LOCK_ID = 724_515_017
+LOCK_ROLLUPS_SQL = """
+SELECT pg_advisory_xact_lock(%s, id)
+FROM (SELECT DISTINCT unnest(%s::INT[]) AS id ORDER BY id) AS ids
+"""
+
+# Пересчет дневных агрегатов для пар (location_id, day) из сырых записей
+REFRESH_ROLLUPS_SQL = """
+INSERT INTO weather_daily_rollups
+    (location_id, day, records_count, temp_sum, temp_min, temp_max, wind_sum, wind_min, wind_max)
+SELECT wr.location_id, wr.weather_time::DATE, COUNT(*),
+       SUM(wr.temperature), MIN(wr.temperature), MAX(wr.temperature),
+       SUM(wr.wind_speed), MIN(wr.wind_speed), MAX(wr.wind_speed)
+FROM weather_records wr
+JOIN (VALUES %s) AS t(location_id, day)
+  ON wr.location_id = t.location_id
+ AND wr.weather_time >= t.day
+ AND wr.weather_time < t.day + 1
+GROUP BY wr.location_id, wr.weather_time::DATE
+ON CONFLICT (location_id, day) DO UPDATE SET
+    records_count = EXCLUDED.records_count,
+    temp_sum = EXCLUDED.temp_sum,
+    temp_min = EXCLUDED.temp_min,
+    temp_max = EXCLUDED.temp_max,
+    wind_sum = EXCLUDED.wind_sum,
+    wind_min = EXCLUDED.wind_min,
+    wind_max = EXCLUDED.wind_max,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+# Последние записи города: для каждого его местоположения берем top-N
+# по индексу (location_id, weather_time DESC) без сортировки всей истории
+RECENT_WEATHER_SQL = """
+SELECT 
+    wr.temperature,
+    wr.wind_speed,
+    wr.wind_direction,
+    wr.weather_time,
+    wr.recorded_at,
+    l.city_name,
+    l.latitude,
+    l.longitude
+FROM locations l
+CROSS JOIN LATERAL (
+    SELECT temperature, wind_speed, wind_direction, weather_time, recorded_at
+    FROM weather_records
+    WHERE location_id = l.id
+    ORDER BY weather_time DESC
+    LIMIT %s
+) wr
+WHERE l.city_name = %s
+ORDER BY wr.weather_time DESC
+LIMIT %s
+"""
+
+# Полная история для выгрузки: порядок совпадает с индексом (location_id, weather_time DESC)
+EXPORT_HISTORY_SQL = """
+SELECT 
+    wr.location_id,
+    l.city_name,
+    l.latitude,
+    l.longitude,
+    wr.weather_time,
+    wr.temperature,
+    wr.wind_speed,
+    wr.wind_direction,
+    wr.recorded_at
+FROM weather_records wr
+JOIN locations l ON l.id = wr.location_id
+{where}
+ORDER BY wr.location_id, wr.weather_time DESC
+"""
+EXPORT_CHUNK_SIZE = 5000  # строк, которые серверный курсор передает за один раз
+
+# История для аналитики: только нужные столбцы, числа сразу float8 (без Decimal),
+# время — секунды эпохи (без создания объектов datetime)
+HISTORY_COLUMNS_SQL = """
+SELECT 
+    l.city_name,
+    EXTRACT(EPOCH FROM wr.weather_time)::BIGINT,
+    wr.temperature::FLOAT8,
+    wr.wind_speed::FLOAT8,
+    wr.wind_direction::FLOAT8
+FROM weather_records wr
+JOIN locations l ON l.id = wr.location_id
+WHERE l.city_name = ANY(%s)
+  AND wr.weather_time >= CURRENT_DATE - %s
+ORDER BY wr.weather_time
+"""
+ANALYTICS_CHUNK_SIZE = 100000  # строк в одной порции загрузки для аналитики
+
+# Прогноз: повторный запрос с тем же началом ряда заменяет массивы
+UPSERT_FORECAST_SQL = """
+INSERT INTO weather_forecasts (
+    location_id, hourly_start, step_minutes, utc_offset_seconds,
+    temperature, precipitation, wind_speed, wind_direction,
+    daily_start, temp_max, temp_min, precipitation_sum, wind_max
+)
+VALUES (
+    %(location_id)s, %(hourly_start)s, %(step_minutes)s, %(utc_offset_seconds)s,
+    %(temperature)s::REAL[], %(precipitation)s::REAL[], %(wind_speed)s::REAL[], %(wind_direction)s::REAL[],
+    %(daily_start)s, %(temp_max)s::REAL[], %(temp_min)s::REAL[], %(precipitation_sum)s::REAL[], %(wind_max)s::REAL[]
+)
+ON CONFLICT (location_id, hourly_start) DO UPDATE SET
+    step_minutes = EXCLUDED.step_minutes,
+    utc_offset_seconds = EXCLUDED.utc_offset_seconds,
+    temperature = EXCLUDED.temperature,
+    precipitation = EXCLUDED.precipitation,
+    wind_speed = EXCLUDED.wind_speed,
+    wind_direction = EXCLUDED.wind_direction,
+    daily_start = EXCLUDED.daily_start,
+    temp_max = EXCLUDED.temp_max,
+    temp_min = EXCLUDED.temp_min,
+    precipitation_sum = EXCLUDED.precipitation_sum,
+    wind_max = EXCLUDED.wind_max,
+    fetched_at = CURRENT_TIMESTAMP
+"""
+
+PARTITION_NAME_RE = re.compile(r"^weather_records_(\d{4})_(\d{2})$")  # помесячные секции weather_records
+
+# Атомарная вставка местоположения: при конфликте возвращается ID существующей строки
+UPSERT_LOCATION_SQL = """
+INSERT INTO locations (city_name, latitude, longitude) 
+VALUES %s 
+ON CONFLICT (city_name, latitude, longitude) DO UPDATE SET city_name = EXCLUDED.city_name
+RETURNING id, city_name, latitude, longitude
+"""
+
 class WeatherDatabase:
     """Класс для работы с базой данных погоды"""
     
-    def __init__(self):
-        self.connection_string = get_connection_string()
+    def __init__(self, config: Optional[DatabaseConfig] = None):
+        self.config = config or DB_CONFIG
+        self.connection_string = get_connection_string(self.config)
+        
+        # Пул создается при первом обращении, чтобы импорт модуля не требовал БД
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, self.config.pool_max))
+        self._created: Dict[int, float] = {}
+        
+        # Схема проверяется один раз за время жизни процесса
+        self._schema_ready = False
+        
+        # ID местоположений, уже сохраненных в БД: (город, широта, долгота) -> id
+        self._location_ids: Dict[Tuple[str, float, float], int] = {}
+        
+        # Месяцы, секции weather_records для которых уже существуют
+        self._partitions: Set[datetime] = set()
+    
+    def _get_pool(self) -> pg_pool.ThreadedConnectionPool:
+        """Создает пул соединений при первом обращении"""
+        with self._pool_lock:
+            if self._pool is None:
+                maxconn = max(1, self.config.pool_max)
+                self._pool = pg_pool.ThreadedConnectionPool(
+                    min(max(0, self.config.pool_min), maxconn),
+                    maxconn,
+                    self.connection_string,
+                    cursor_factory=RealDictCursor,
+                    connect_timeout=self.config.connect_timeout,
+                )
+            return self._pool
+    
+    def _is_usable(self, conn) -> bool:
+        """Проверяет, что соединение живо и не превысило максимальный срок жизни"""
+        if conn.closed:
+            return False
+        
+        lifetime = self.config.pool_max_lifetime
+        if lifetime and time.monotonic() - self._created.get(id(conn), time.monotonic()) > lifetime:
+            return False
+        
+        if self.config.pool_pre_ping:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+    
+    def _discard(self, conn) -> None:
+        """Закрывает соединение и убирает его из пула"""
+        self._created.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+    
+    def _acquire(self):
+        """Берет из пула рабочее соединение, пересоздавая устаревшие и оборванные"""
+        pool = self._get_pool()
+        for _ in range(max(1, self.config.pool_max) + 1):
+            conn = pool.getconn()
+            self._created.setdefault(id(conn), time.monotonic())
+            if self._is_usable(conn):
+                return conn
+            self._discard(conn)
+        raise psycopg2.OperationalError("Не удалось получить рабочее соединение из пула")
     
+    @contextmanager
     def get_connection(self):
-        """Создает и возвращает соединение с базой данных"""
+        """
+        Выдает соединение из пула и возвращает его обратно после использования.
+        Как и `with psycopg2.connect(...)`, фиксирует транзакцию при успешном
+        выходе и откатывает при исключении.
+        
+        Raises:
+            psycopg2.pool.PoolError: Если свободное соединение не появилось за pool_timeout
+        """
+        if not self._slots.acquire(timeout=self.config.pool_timeout):
+            raise pg_pool.PoolError("Нет свободных соединений в пуле БД")
         try:
-            conn = psycopg2.connect(self.connection_string, cursor_factory=RealDictCursor)
-            return conn
-        except Exception as e:
-            logger.error(f"Ошибка подключения к БД: {e}")
-            raise
+            try:
+                conn = self._acquire()
+            except Exception as e:
+                logger.error(f"Ошибка подключения к БД: {e}")
+                raise
+            
+            broken = False
+            try:
+                yield conn
+                conn.commit()
+            except BaseException as e:
+                broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+                try:
+                    if not conn.closed:
+                        conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+                raise
+            finally:
+                if broken or conn.closed:
+                    self._discard(conn)
+                else:
+                    self._pool.putconn(conn)
+                    # Лишние сверх pool_min соединения пул закрывает сам
+                    if conn.closed:
+                        self._created.pop(id(conn), None)
+        finally:
+            self._slots.release()
+    
+    def close(self) -> None:
+        """Закрывает все соединения пула"""
+        with self._pool_lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+            self._created.clear()
     
     def init_db(self) -> None:
-        """Инициализирует базу данных: создает таблицы если они не существуют"""
-        create_tables_sql = """
-        CREATE TABLE IF NOT EXISTS locations (
-            id SERIAL PRIMARY KEY,
-            city_name VARCHAR(100) NOT NULL,
-            latitude DECIMAL(9,6) NOT NULL,
-            longitude DECIMAL(9,6) NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        CREATE TABLE IF NOT EXISTS weather_records (
-            id SERIAL PRIMARY KEY,
-            location_id INTEGER REFERENCES locations(id),
-            temperature DECIMAL(5,2) NOT NULL,
-            wind_speed DECIMAL(5,2) NOT NULL,
-            wind_direction INTEGER,
-            weather_time TIMESTAMP NOT NULL,
-            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        CREATE INDEX IF NOT EXISTS idx_locations_city ON locations(city_name);
-        CREATE INDEX IF NOT EXISTS idx_weather_records_time ON weather_records(weather_time);
-        CREATE INDEX IF NOT EXISTS idx_weather_records_location ON weather_records(location_id);
         """
+        Приводит схему БД к последней версии (weather.migrations).
+        Версия проверяется один раз за процесс; DDL выполняется, только если
+        есть непримененные миграции.
+        """
+        if self._schema_ready:
+            return
         
         try:
-            
             with self.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(create_tables_sql)
-                    conn.commit()
-            logger.info("База данных успешно инициализирована")
+                applied = migrate(conn)
+            self._schema_ready = True
+            if applied:
+                logger.info(f"База данных обновлена до версии {SCHEMA_VERSION}")
         except Exception as e:
-            # Если ошибка прав доступа, просто логируем и продолжаем
+            # Таблицы старой схемы принадлежат другому пользователю: миграция
+            # откатилась целиком, и схема не готова — нужен перенос владельца
             if "must be owner" in str(e):
-                logger.warning("Таблицы уже созданы другим пользователем, продолжаем работу...")
+                logger.error(
+                    f"Миграция схемы не применена: таблицы принадлежат другому пользователю ({e}). "
+                    f"Выполните от имени суперпользователя блок обновления из weather_init.sql "
+                    f"(ALTER TABLE ... OWNER TO {self.config.user}) и перезапустите приложение."
+                )
             else:
                 logger.error(f"Ошибка инициализации БД: {e}")
                 # Не поднимаем исключение, чтобы приложение могло продолжить работу
@@ -91,53 +342,322 @@ class WeatherDatabase:
             
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    # Сохраняем или получаем location
+                    # Сохраняем или получаем location (повторно — из кэша процесса)
                     location_id = self._get_or_create_location(cursor, city, lat, lon)
+                    months = self._ensure_partitions(cursor, [current.get('time')])
                     
-                    # Сохраняем запись о погоде
-                    insert_weather_sql = """
-                    INSERT INTO weather_records 
-                    (location_id, temperature, wind_speed, wind_direction, weather_time)
-                    VALUES (%s, %s, %s, %s, %s)
-                    """
-                    
-                    cursor.execute(insert_weather_sql, (
+                    # Сохраняем запись о погоде (повтор того же времени не создает дубликат)
+                    changed = self._upsert_records(cursor, [(
                         location_id,
                         current.get('temperature'),
                         current.get('windspeed'),
                         current.get('winddirection'),
-                        current.get('time')
-                    ))
+                        current.get('time'),
+                        weather_data.get('recorded_at'),
+                    )])
+                    
+                    # Обновляем дневной агрегат в той же транзакции
+                    self._refresh_rollups(cursor, changed)
                     
                     conn.commit()
+                    self._remember_locations({_location_key(city, lat, lon): location_id})
+                    self._partitions.update(months)
                     logger.info(f"Данные о погоде для {city} сохранены в БД")
                     
         except Exception as e:
+            # ID и секции из кэша могли устареть (например, удалены)
+            self._location_ids.clear()
+            self._partitions.clear()
             logger.error(f"Ошибка сохранения данных в БД: {e}")
     
+    def save_weather_batch(self, payloads: Iterable[Dict[str, Any]]) -> int:
+        """
+        Сохраняет много записей о погоде за одну транзакцию.
+        Местоположения разрешаются пакетно, записи вставляются
+        многострочными INSERT по BATCH_PAGE_SIZE строк.
+        
+        Args:
+            payloads: Словари с данными о погоде из API (как в save_weather_data)
+            
+        Returns:
+            int: Количество вставленных или измененных записей
+                (повторы с теми же значениями не учитываются)
+        """
+        try:
+            return self.write_weather_batch(payloads)
+        except Exception as e:
+            logger.error(f"Ошибка пакетного сохранения данных в БД: {e}")
+            return 0
+    
+    def write_weather_batch(self, payloads: Iterable[Dict[str, Any]]) -> int:
+        """
+        То же, что save_weather_batch, но ошибки БД пробрасываются —
+        для вызывающих, которым нужно повторить запись (weather.writebehind).
+        
+        Returns:
+            int: Количество вставленных или измененных записей
+        """
+        rows = []
+        for weather_data in payloads:
+            city = weather_data.get('city', 'Unknown')
+            lat = weather_data.get('latitude')
+            lon = weather_data.get('longitude')
+            current = weather_data.get('current_weather', {})
+            
+            if not all([city, lat, lon, current]):
+                logger.warning("Неполные данные для сохранения в БД")
+                continue
+            rows.append((_location_key(city, lat, lon), current, weather_data.get('recorded_at')))
+        
+        if not rows:
+            return 0
+        
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    location_ids = self._resolve_locations(cursor, {key for key, _, _ in rows})
+                    months = self._ensure_partitions(cursor, [current.get('time') for _, current, _ in rows])
+                    
+                    changed = self._upsert_records(cursor, [
+                        (
+                            location_ids[key],
+                            current.get('temperature'),
+                            current.get('windspeed'),
+                            current.get('winddirection'),
+                            current.get('time'),
+                            recorded_at,
+                        )
+                        for key, current, recorded_at in rows
+                    ])
+                    
+                    self._refresh_rollups(cursor, changed)
+                    
+                    conn.commit()
+                    self._remember_locations(location_ids)
+                    self._partitions.update(months)
+                    logger.info(
+                        f"Сохранено записей о погоде в БД: {len(changed)}, без изменений: {len(rows) - len(changed)}"
+                    )
+                    return len(changed)
+                    
+        except Exception:
+            # ID и секции из кэша могли устареть (например, удалены)
+            self._location_ids.clear()
+            self._partitions.clear()
+            raise
+    
+    def save_forecast(self, forecast) -> None:
+        """
+        Сохраняет прогноз одной строкой: каждая переменная — массив REAL[].
+        
+        Args:
+            forecast: weather.forecast.Forecast
+        """
+        try:
+            series = forecast.to_lists()
+            key = _location_key(forecast.city, forecast.latitude, forecast.longitude)
+            
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    location_ids = self._resolve_locations(cursor, [key])
+                    cursor.execute(UPSERT_FORECAST_SQL, {
+                        "location_id": location_ids[key],
+                        "hourly_start": forecast.hourly_start,
+                        "step_minutes": forecast.step_minutes,
+                        "utc_offset_seconds": forecast.utc_offset_seconds,
+                        "daily_start": forecast.daily_start.date() if forecast.daily_start else None,
+                        **{name: series.get(name) for name in (
+                            "temperature", "precipitation", "wind_speed", "wind_direction",
+                            "temp_max", "temp_min", "precipitation_sum", "wind_max",
+                        )},
+                    })
+                    conn.commit()
+                    self._remember_locations(location_ids)
+                    logger.info(f"Прогноз для {forecast.city} сохранен в БД ({forecast.hours} ч)")
+                    
+        except Exception as e:
+            self._location_ids.clear()
+            logger.error(f"Ошибка сохранения прогноза в БД: {e}")
+    
+    def _resolve_locations(self, cursor, keys) -> Dict[Tuple[str, float, float], int]:
+        """
+        Находит или создает местоположения для набора ключей (город, широта, долгота).
+        Известные процессу ID берутся из кэша, остальные — одним многострочным upsert.
+        
+        Returns:
+            Dict: ID местоположения по ключу
+        """
+        location_ids = {}
+        missing = []
+        for key in sorted(keys):
+            location_id = self._location_ids.get(key)
+            if location_id is None:
+                missing.append(key)
+            else:
+                location_ids[key] = location_id
+        
+        if missing:
+            rows = execute_values(
+                cursor,
+                UPSERT_LOCATION_SQL,
+                missing,
+                template="(%s, %s::DECIMAL(9,6), %s::DECIMAL(9,6))",
+                page_size=BATCH_PAGE_SIZE,
+                fetch=True
+            )
+            for row in rows:
+                location_ids[_location_key(row['city_name'], row['latitude'], row['longitude'])] = row['id']
+        
+        return location_ids
+    
     def _get_or_create_location(self, cursor, city: str, lat: float, lon: float) -> int:
         """
-        Находит или создает запись о местоположении
+        Находит или создает запись о местоположении за один запрос
+        (INSERT ... ON CONFLICT ... RETURNING); повторно — без запроса, из кэша процесса
         
         Returns:
             int: ID местоположения
         """
-        # Пытаемся найти существующее местоположение
-        find_sql = "SELECT id FROM locations WHERE city_name = %s AND latitude = %s AND longitude = %s"
-        cursor.execute(find_sql, (city, lat, lon))
-        result = cursor.fetchone()
+        key = _location_key(city, lat, lon)
+        return self._resolve_locations(cursor, [key])[key]
+    
+    def _remember_locations(self, location_ids: Dict[Tuple[str, float, float], int]) -> None:
+        """Запоминает ID местоположений после успешной фиксации транзакции"""
+        if len(self._location_ids) + len(location_ids) > LOCATION_CACHE_SIZE:
+            self._location_ids.clear()
+        self._location_ids.update(location_ids)
+    
+    def _ensure_partitions(self, cursor, times) -> Set[datetime]:
+        """
+        Создает недостающие помесячные секции weather_records для меток времени.
+        Месяцы, уже известные процессу, не проверяются.
         
-        if result:
-            return result['id']
+        Returns:
+            Set[datetime]: Начала месяцев, в которые попадают записи
+        """
+        months = {_month_start(t) for t in times}
+        for month in sorted(months - self._partitions):
+            cursor.execute("SELECT ensure_weather_partition(%s)", (month,))
+        return months
+    
+    def _upsert_records(self, cursor, records) -> List[Tuple[int, date]]:
+        """
+        Вставляет записи о погоде; запись на то же (location_id, weather_time)
+        обновляется, только если значения изменились.
         
-        # Создаем новое местоположение
-        insert_sql = """
-        INSERT INTO locations (city_name, latitude, longitude) 
-        VALUES (%s, %s, %s) 
-        RETURNING id
+        Args:
+            records: Кортежи (location_id, temperature, wind_speed, wind_direction, weather_time, recorded_at);
+                recorded_at None — текущее время
+            
+        Returns:
+            List: Пары (location_id, day) по одной на вставленную или измененную запись
         """
-        cursor.execute(insert_sql, (city, lat, lon))
-        return cursor.fetchone()['id']
+        # В одной команде ON CONFLICT строка не может меняться дважды — оставляем последнюю
+        unique = {(record[0], str(record[4])): record for record in records}
+        if not unique:
+            return []
+        
+        written = execute_values(
+            cursor, UPSERT_WEATHER_SQL, list(unique.values()),
+            template=UPSERT_WEATHER_TEMPLATE, page_size=BATCH_PAGE_SIZE, fetch=True
+        )
+        return [(row['location_id'], _day(row['weather_time'])) for row in written]
+    
+    def _refresh_rollups(self, cursor, pairs) -> None:
+        """Пересчитывает дневные агрегаты для затронутых пар (location_id, day)"""
+        pairs = sorted(set(pairs))
+        if pairs:
+            # Блокировки берутся по возрастанию ID, чтобы писатели не ждали друг друга по кругу
+            cursor.execute(LOCK_ROLLUPS_SQL, (ROLLUP_LOCK_ID, sorted({pair[0] for pair in pairs})))
+            execute_values(
+                cursor, REFRESH_ROLLUPS_SQL, pairs,
+                template="(%s, %s::DATE)", page_size=BATCH_PAGE_SIZE
+            )
+    
+    def refresh_rollups(self, days: Optional[int] = None) -> int:
+        """
+        Полностью пересчитывает дневные агрегаты из сырых записей
+        (например, по расписанию или после ручной правки weather_records).
+        
+        Args:
+            days: Пересчитать только последние days дней; None — всю историю
+            
+        Returns:
+            int: Количество агрегатов после пересчета
+        """
+        since = "CURRENT_DATE - %(days)s" if days is not None else "'-infinity'::DATE"
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DELETE FROM weather_daily_rollups WHERE day >= {since}", {"days": days})
+                cursor.execute(f"""
+                INSERT INTO weather_daily_rollups
+                    (location_id, day, records_count, temp_sum, temp_min, temp_max, wind_sum, wind_min, wind_max)
+                SELECT location_id, weather_time::DATE, COUNT(*),
+                       SUM(temperature), MIN(temperature), MAX(temperature),
+                       SUM(wind_speed), MIN(wind_speed), MAX(wind_speed)
+                FROM weather_records
+                WHERE location_id IS NOT NULL AND weather_time >= {since}
+                GROUP BY location_id, weather_time::DATE
+                ON CONFLICT (location_id, day) DO UPDATE SET
+                    records_count = EXCLUDED.records_count,
+                    temp_sum = EXCLUDED.temp_sum,
+                    temp_min = EXCLUDED.temp_min,
+                    temp_max = EXCLUDED.temp_max,
+                    wind_sum = EXCLUDED.wind_sum,
+                    wind_min = EXCLUDED.wind_min,
+                    wind_max = EXCLUDED.wind_max,
+                    updated_at = CURRENT_TIMESTAMP
+                """, {"days": days})
+                count = cursor.rowcount
+        logger.info(f"Дневные агрегаты пересчитаны: {count}")
+        return count
+    
+    def drop_old_partitions(self, retention_months: Optional[int] = None) -> List[str]:
+        """
+        Удаляет секции weather_records старше срока хранения целиком,
+        без DELETE и разрастания таблицы.
+        
+        Args:
+            retention_months: Сколько полных месяцев истории хранить
+                (по умолчанию DB_RETENTION_MONTHS; 0 — хранить бессрочно)
+            
+        Returns:
+            List[str]: Имена удаленных секций
+        """
+        months = self.config.retention_months if retention_months is None else retention_months
+        if months <= 0:
+            return []
+        
+        # Граница: начало месяца, отстоящего от текущего на months месяцев
+        today = date.today()
+        total = today.year * 12 + today.month - 1 - months
+        cutoff = datetime(total // 12, total % 12 + 1, 1)
+        
+        dropped = []
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                SELECT c.relname AS name
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'weather_records'::regclass
+                ORDER BY c.relname
+                """)
+                for row in cursor.fetchall():
+                    match = PARTITION_NAME_RE.match(row['name'])
+                    if not match or datetime(int(match.group(1)), int(match.group(2)), 1) >= cutoff:
+                        continue
+                    cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(row['name'])))
+                    dropped.append(row['name'])
+                
+                # Агрегаты удаленных дней больше не соответствуют сырым данным
+                if dropped:
+                    cursor.execute("DELETE FROM weather_daily_rollups WHERE day < %s", (cutoff.date(),))
+        
+        self._partitions.clear()
+        if dropped:
+            logger.info(f"Удалены секции истории: {', '.join(dropped)}")
+        return dropped
     
     def get_recent_weather(self, city: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -151,26 +671,11 @@ class WeatherDatabase:
             Список записей о погоде
         """
         try:
-            sql = """
-            SELECT 
-                wr.temperature,
-                wr.wind_speed,
-                wr.wind_direction,
-                wr.weather_time,
-                wr.recorded_at,
-                l.city_name,
-                l.latitude,
-                l.longitude
-            FROM weather_records wr
-            JOIN locations l ON wr.location_id = l.id
-            WHERE l.city_name = %s
-            ORDER BY wr.weather_time DESC
-            LIMIT %s
-            """
+            sql = RECENT_WEATHER_SQL
             
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(sql, (city, limit))
+                    cursor.execute(sql, (limit, city, limit))
                     results = cursor.fetchall()
                     
                     # Конвертируем в обычные словари
@@ -180,6 +685,69 @@ class WeatherDatabase:
             logger.error(f"Ошибка получения данных из БД: {e}")
             return []
     
+    def iter_weather_history(
+        self,
+        city: Optional[str] = None,
+        chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Построчно выдает всю историю погоды через именованный (серверный) курсор.
+        Сервер передает строки порциями по chunk_size, поэтому память
+        не зависит от размера истории. Соединение занято, пока итерация не закончена.
+        
+        Args:
+            city: Название города; None — все города
+            chunk_size: Строк в одной порции
+            
+        Yields:
+            Dict[str, Any]: Запись о погоде вместе с городом и координатами
+        """
+        where = "WHERE l.city_name = %s" if city else ""
+        params = (city,) if city else ()
+        
+        with self.get_connection() as conn:
+            # Именованный курсор живет только внутри транзакции
+            with conn.cursor(name="weather_history_export") as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(EXPORT_HISTORY_SQL.format(where=where), params)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row)
+    
+    def iter_history_columns(
+        self,
+        cities: List[str],
+        days: int = 7,
+        chunk_size: int = ANALYTICS_CHUNK_SIZE
+    ) -> Iterator[List[Tuple]]:
+        """
+        Порциями выдает историю нескольких городов за период для аналитики.
+        Строки — кортежи (город, время в секундах эпохи, температура,
+        скорость ветра, направление ветра)
+        из серверного курсора без словарей и Decimal, чтобы их можно было
+        быстро сложить в массивы NumPy.
+        
+        Args:
+            cities: Названия городов
+            days: Количество последних дней
+            chunk_size: Строк в одной порции
+            
+        Yields:
+            List[Tuple]: Порция строк, упорядоченных по времени
+        """
+        with self.get_connection() as conn:
+            with conn.cursor(name="weather_history_columns", cursor_factory=psycopg2.extensions.cursor) as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(HISTORY_COLUMNS_SQL, (list(cities), days))
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+    
     def get_weather_stats(self, city: str, days: int = 7) -> Dict[str, Any]:
         """
         Получает статистику по погоде за указанный период
@@ -192,17 +760,18 @@ class WeatherDatabase:
             Словарь со статистикой
         """
         try:
+            # Читаем по строке дневного агрегата на день вместо сырых записей
             sql = """
             SELECT 
-                AVG(temperature) as avg_temp,
-                MAX(temperature) as max_temp,
-                MIN(temperature) as min_temp,
-                AVG(wind_speed) as avg_wind,
-                COUNT(*) as records_count
-            FROM weather_records wr
-            JOIN locations l ON wr.location_id = l.id
+                SUM(r.temp_sum) / SUM(r.records_count) as avg_temp,
+                MAX(r.temp_max) as max_temp,
+                MIN(r.temp_min) as min_temp,
+                SUM(r.wind_sum) / SUM(r.records_count) as avg_wind,
+                COALESCE(SUM(r.records_count), 0) as records_count
+            FROM weather_daily_rollups r
+            JOIN locations l ON r.location_id = l.id
             WHERE l.city_name = %s 
-            AND wr.weather_time >= CURRENT_DATE - INTERVAL '%s days'
+            AND r.day >= CURRENT_DATE - %s
             """
             
             with self.get_connection() as conn:
@@ -219,5 +788,24 @@ class WeatherDatabase:
             logger.error(f"Ошибка получения статистики: {e}")
             return {}
 
+
+def _day(value) -> date:
+    """Календарный день метки времени из API ('2023-10-01T12:00') или datetime"""
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return moment.date()
+
+
+def _month_start(value) -> datetime:
+    """Начало месяца для метки времени из API ('2023-10-01T12:00') или datetime"""
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return datetime(moment.year, moment.month, 1)
+
+
+def _location_key(city: str, lat, lon) -> Tuple[str, float, float]:
+    """Ключ местоположения с точностью столбцов DECIMAL(9,6)"""
+    return (city, round(float(lat), 6), round(float(lon), 6))
+
+
 # Глобальный экземпляр базы данных
-db = WeatherDatabase()
\ No newline at end of file
+db = WeatherDatabase()
+atexit.register(db.close)
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Модуль выгрузки истории погоды в CSV и NDJSON.
+Строки пишутся по мере чтения из итератора (серверного курсора БД),
+поэтому в памяти одновременно находится только одна порция строк.
+
+"""
+
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+# Столбцы выгрузки в порядке вывода
+EXPORT_FIELDS = (
+    "city_name",
+    "latitude",
+    "longitude",
+    "weather_time",
+    "temperature",
+    "wind_speed",
+    "wind_direction",
+    "recorded_at",
+)
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    Определяет формат выгрузки: явный или по расширению файла.
+
+    Args:
+        path (str): Путь к файлу ('-' — stdout)
+        fmt (str, optional): Явно заданный формат
+
+    Returns:
+        str: 'csv', 'ndjson', 'parquet' или 'arrow' (по умолчанию 'csv')
+    """
+    if fmt:
+        return fmt
+    lowered = path.rstrip("/\\").lower()
+    if lowered.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    if lowered.endswith(".parquet"):
+        return "parquet"
+    if lowered.endswith((".arrow", ".feather", ".ipc")):
+        return "arrow"
+    return "csv"
+
+
+def _plain(value: Any) -> Any:
+    """Приводит значения из БД (Decimal, datetime) к типам JSON."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def write_csv(rows: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """
+    Пишет строки в CSV с заголовком.
+
+    Returns:
+        int: Количество записанных строк
+    """
+    writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow({field: _plain(row.get(field)) for field in EXPORT_FIELDS})
+        count += 1
+    return count
+
+
+def write_ndjson(rows: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """
+    Пишет строки в NDJSON: один JSON-объект на строку.
+
+    Returns:
+        int: Количество записанных строк
+    """
+    count = 0
+    for row in rows:
+        record = {field: _plain(row.get(field)) for field in EXPORT_FIELDS}
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def write_history(rows: Iterable[Dict[str, Any]], out: TextIO, fmt: str = "csv") -> int:
+    """
+    Пишет строки истории в заданном формате.
+
+    Args:
+        rows: Итератор записей (например, WeatherDatabase.iter_weather_history)
+        out: Открытый текстовый поток
+        fmt (str): 'csv' или 'ndjson'
+
+    Returns:
+        int: Количество записанных строк
+
+    Raises:
+        ValueError: Если формат не поддерживается
+    """
+    if fmt == "csv":
+        return write_csv(rows, out)
+    if fmt == "ndjson":
+        return write_ndjson(rows, out)
+    raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
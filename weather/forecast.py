@@ -0,0 +1,290 @@
+"""
+Модуль почасового и дневного прогноза на типизированных массивах NumPy.
+Один запрос к Open-Meteo возвращает прогноз на несколько дней; каждая
+переменная хранится одним массивом float32, а время — началом ряда и шагом,
+поэтому сводки (минимум, максимум, сумма осадков, окно ближайших часов)
+считаются векторно, без обхода вложенных словарей.
+
+"""
+
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy — необязательная зависимость, нужна только для режима прогноза
+    np = None
+
+FORECAST_DAYS = 7    # дней прогноза по умолчанию
+FORECAST_HOURS = 24  # окно ближайших часов в сводке по умолчанию
+PRECIPITATION_THRESHOLD = 0.1  # мм/ч, с которых час считается дождливым
+
+# Переменные прогноза: имя в модуле -> имя в Open-Meteo
+HOURLY_VARIABLES = {
+    "temperature": "temperature_2m",
+    "precipitation": "precipitation",
+    "wind_speed": "wind_speed_10m",
+    "wind_direction": "wind_direction_10m",
+}
+DAILY_VARIABLES = {
+    "temp_max": "temperature_2m_max",
+    "temp_min": "temperature_2m_min",
+    "precipitation_sum": "precipitation_sum",
+    "wind_max": "wind_speed_10m_max",
+}
+
+
+def _require_numpy() -> None:
+    """Проверяет, что numpy установлен."""
+    if np is None:
+        raise RuntimeError("Для режима прогноза установите пакет numpy.")
+
+
+def _to_array(values) -> "np.ndarray":
+    """Список из ответа API (None — нет данных) в массив float32 с NaN."""
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float32)
+
+
+def _encode(array: "np.ndarray") -> str:
+    """Массив float32 в компактную строку base64 для JSON-кэша."""
+    return base64.b64encode(array.astype("<f4").tobytes()).decode("ascii")
+
+
+def _decode(value: str) -> "np.ndarray":
+    """Строка base64 из кэша обратно в массив float32."""
+    return np.frombuffer(base64.b64decode(value), dtype="<f4")
+
+
+def _stat(func, values: "np.ndarray") -> Optional[float]:
+    """Векторная статистика без NaN; None, если значений нет."""
+    if not values.size or np.isnan(values).all():
+        return None
+    return round(float(func(values)), 2)
+
+
+class Forecast:
+    """
+    Прогноз для одного местоположения: каждая переменная — массив float32,
+    время почасового ряда — hourly_start + i * step_minutes (местное время точки).
+    """
+
+    def __init__(
+        self,
+        city: str,
+        latitude: float,
+        longitude: float,
+        hourly_start: datetime,
+        step_minutes: int,
+        hourly: Dict[str, "np.ndarray"],
+        daily_start: Optional[datetime] = None,
+        daily: Optional[Dict[str, "np.ndarray"]] = None,
+        utc_offset_seconds: int = 0
+    ):
+        """
+        Args:
+            city: Название города
+            latitude, longitude: Координаты
+            hourly_start: Время первого часа прогноза (местное)
+            step_minutes: Шаг почасового ряда в минутах
+            hourly: Массивы почасовых переменных (ключи HOURLY_VARIABLES)
+            daily_start: Первый день дневного ряда
+            daily: Массивы дневных переменных (ключи DAILY_VARIABLES)
+            utc_offset_seconds: Смещение местного времени точки от UTC
+        """
+        _require_numpy()
+        self.city = city
+        self.latitude = latitude
+        self.longitude = longitude
+        self.hourly_start = hourly_start
+        self.step_minutes = step_minutes
+        self.hourly = hourly
+        self.daily_start = daily_start
+        self.daily = daily or {}
+        self.utc_offset_seconds = utc_offset_seconds
+
+    @property
+    def hours(self) -> int:
+        """Длина почасового ряда."""
+        return len(next(iter(self.hourly.values()), ()))
+
+    @property
+    def times(self) -> "np.ndarray":
+        """Метки времени почасового ряда (datetime64[m])."""
+        start = np.datetime64(self.hourly_start, "m")
+        return start + np.arange(self.hours) * np.timedelta64(self.step_minutes, "m")
+
+    @property
+    def days(self) -> "np.ndarray":
+        """Даты дневного ряда (datetime64[D])."""
+        count = len(next(iter(self.daily.values()), ()))
+        if self.daily_start is None or not count:
+            return np.array([], dtype="datetime64[D]")
+        return np.datetime64(self.daily_start, "D") + np.arange(count)
+
+    def local_now(self) -> datetime:
+        """Текущее местное время точки прогноза."""
+        now = datetime.now(timezone.utc) + timedelta(seconds=self.utc_offset_seconds)
+        return now.replace(tzinfo=None)
+
+    def window(self, hours: int = FORECAST_HOURS, now: Optional[datetime] = None) -> slice:
+        """
+        Срез почасового ряда на ближайшие hours часов начиная с текущего часа.
+
+        Args:
+            hours: Длина окна в часах
+            now: Местное время точки; по умолчанию текущее
+        """
+        now = now or self.local_now()
+        times = self.times
+        # Текущий час входит в окно: ищем первый шаг, который еще не закончился
+        current = np.datetime64(now, "m") - np.timedelta64(self.step_minutes - 1, "m")
+        start = int(np.searchsorted(times, current))
+        count = max(0, hours * 60 // max(1, self.step_minutes))
+        return slice(start, min(start + count, self.hours))
+
+    def summary(self, hours: int = FORECAST_HOURS, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Векторная сводка по окну ближайших часов.
+
+        Returns:
+            Dict[str, Any]: Словарь с ключами 'start', 'end', 'hours', 'temp_min',
+                'temp_max', 'temp_mean', 'precipitation_total', 'precipitation_hours', 'wind_max'
+        """
+        part = self.window(hours, now)
+        times = self.times[part]
+        temperature = self.hourly["temperature"][part]
+        precipitation = self.hourly["precipitation"][part]
+        wind = self.hourly["wind_speed"][part]
+
+        return {
+            "start": str(times[0]) if times.size else None,
+            "end": str(times[-1]) if times.size else None,
+            "hours": int(times.size),
+            "temp_min": _stat(np.nanmin, temperature),
+            "temp_max": _stat(np.nanmax, temperature),
+            "temp_mean": _stat(np.nanmean, temperature),
+            "precipitation_total": _stat(np.nansum, precipitation),
+            "precipitation_hours": int(np.count_nonzero(precipitation >= PRECIPITATION_THRESHOLD)),
+            "wind_max": _stat(np.nanmax, wind),
+        }
+
+    def daily_summary(self) -> List[Dict[str, Any]]:
+        """
+        Сводка по дням. Если дневного ряда нет, он считается из почасового
+        одной операцией над матрицей (день x час).
+
+        Returns:
+            List[Dict[str, Any]]: Словари с ключами 'day', 'temp_min', 'temp_max',
+                'precipitation_sum', 'wind_max'
+        """
+        if self.daily:
+            days = self.days
+            columns = {name: self.daily[name] for name in DAILY_VARIABLES if name in self.daily}
+        else:
+            per_day = 24 * 60 // max(1, self.step_minutes)
+            full = self.hours // per_day * per_day
+            if not full:
+                return []
+            matrix = {name: values[:full].reshape(-1, per_day) for name, values in self.hourly.items()}
+            days = self.times[:full:per_day].astype("datetime64[D]")
+            columns = {
+                "temp_max": np.nanmax(matrix["temperature"], axis=1),
+                "temp_min": np.nanmin(matrix["temperature"], axis=1),
+                "precipitation_sum": np.nansum(matrix["precipitation"], axis=1),
+                "wind_max": np.nanmax(matrix["wind_speed"], axis=1),
+            }
+
+        rounded = {name: np.round(values.astype(np.float64), 2) for name, values in columns.items()}
+        return [
+            {"day": str(day), **{
+                name: None if np.isnan(values[i]) else float(values[i])
+                for name, values in rounded.items()
+            }}
+            for i, day in enumerate(days)
+        ]
+
+    def to_lists(self) -> Dict[str, List[Optional[float]]]:
+        """Почасовые и дневные ряды списками (NaN -> None) для записи в БД."""
+        series = dict(self.hourly)
+        series.update(self.daily)
+        return {
+            name: [None if np.isnan(v) else float(v) for v in values.tolist()]
+            for name, values in series.items()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Компактное JSON-представление для кэша: массивы хранятся в base64."""
+        return {
+            "city": self.city,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "hourly_start": self.hourly_start.isoformat(),
+            "step_minutes": self.step_minutes,
+            "utc_offset_seconds": self.utc_offset_seconds,
+            "hourly": {name: _encode(values) for name, values in self.hourly.items()},
+            "daily_start": self.daily_start.isoformat() if self.daily_start else None,
+            "daily": {name: _encode(values) for name, values in self.daily.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Forecast":
+        """Восстанавливает прогноз из представления to_dict."""
+        _require_numpy()
+        return cls(
+            city=data["city"],
+            latitude=data["latitude"],
+            longitude=data["longitude"],
+            hourly_start=datetime.fromisoformat(data["hourly_start"]),
+            step_minutes=data["step_minutes"],
+            hourly={name: _decode(values) for name, values in data["hourly"].items()},
+            daily_start=datetime.fromisoformat(data["daily_start"]) if data.get("daily_start") else None,
+            daily={name: _decode(values) for name, values in data.get("daily", {}).items()},
+            utc_offset_seconds=data.get("utc_offset_seconds", 0),
+        )
+
+
+def parse_forecast(data: Dict[str, Any]) -> Forecast:
+    """
+    Преобразует ответ Open-Meteo с блоками hourly/daily в Forecast.
+
+    Args:
+        data: Ответ API (weather.api.get_forecast)
+
+    Returns:
+        Forecast: Прогноз на массивах float32
+
+    Raises:
+        ValueError: Если в ответе нет почасового ряда или шаг ряда неравномерный
+    """
+    _require_numpy()
+    hourly = data.get("hourly") or {}
+    if not hourly.get("time"):
+        raise ValueError("В ответе нет почасового прогноза.")
+
+    times = np.array(hourly["time"], dtype="datetime64[m]")
+    steps = np.diff(times).astype(np.int64)
+    step = int(steps[0]) if steps.size else 60
+    if steps.size and not (steps == step).all():
+        raise ValueError("Неравномерный шаг почасового прогноза.")
+
+    daily = data.get("daily") or {}
+    daily_times = daily.get("time") or []
+
+    return Forecast(
+        city=data.get("city"),
+        latitude=data.get("latitude"),
+        longitude=data.get("longitude"),
+        hourly_start=times[0].item(),
+        step_minutes=step,
+        hourly={
+            name: _to_array(hourly.get(api_name) or [None] * len(times))
+            for name, api_name in HOURLY_VARIABLES.items()
+        },
+        daily_start=datetime.fromisoformat(daily_times[0]) if daily_times else None,
+        daily={
+            name: _to_array(daily.get(api_name) or [None] * len(daily_times))
+            for name, api_name in DAILY_VARIABLES.items()
+        } if daily_times else {},
+        utc_offset_seconds=data.get("utc_offset_seconds", 0),
+    )
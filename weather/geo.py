@@ -0,0 +1,136 @@
+"""
+Модуль пространственного квантования координат.
+Близкие координаты приводятся к одной точке (центру ячейки сетки
+или geohash), поэтому получают один ключ кэша, один запрос к API
+и одно местоположение в БД.
+
+"""
+
+from decimal import Decimal
+from typing import Optional
+
+from .config import SPATIAL_CONFIG, SpatialConfig
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def snap_to_grid(lat: float, lon: float, step: float) -> tuple[float, float]:
+    """
+    Приводит координаты к центру ячейки регулярной сетки.
+
+    Args:
+        lat (float): Широта
+        lon (float): Долгота
+        step (float): Шаг сетки в градусах
+
+    Returns:
+        tuple[float, float]: Координаты узла сетки
+
+    Raises:
+        ValueError: Если шаг сетки не положительный
+    """
+    if not step > 0:
+        raise ValueError(f"Шаг сетки должен быть больше нуля: {step}")
+    # Округляем до знаков шага, чтобы не получить 55.760000000000005
+    digits = max(0, -Decimal(str(step)).as_tuple().exponent)
+    return round(round(lat / step) * step, digits), round(round(lon / step) * step, digits)
+
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    """
+    Кодирует координаты в geohash заданной длины.
+
+    Args:
+        lat (float): Широта
+        lon (float): Долгота
+        precision (int): Число символов
+
+    Returns:
+        str: Строка geohash
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    result = []
+    bits = 0
+    value = 0
+    even = True
+
+    while len(result) < precision:
+        # Чередуем биты долготы и широты
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+
+        bits += 1
+        if bits == 5:
+            result.append(_GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+
+    return "".join(result)
+
+
+def geohash_decode(geohash: str) -> tuple[float, float]:
+    """
+    Декодирует geohash в координаты центра ячейки.
+
+    Args:
+        geohash (str): Строка geohash
+
+    Returns:
+        tuple[float, float]: Широта и долгота центра ячейки
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = _GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def quantize(lat: float, lon: float, config: Optional[SpatialConfig] = None) -> tuple[float, float]:
+    """
+    Приводит координаты к представительной точке своей ячейки
+    согласно схеме квантования из конфигурации.
+
+    Args:
+        lat (float): Широта
+        lon (float): Долгота
+        config (SpatialConfig, optional): Схема и разрешение; по умолчанию SPATIAL_CONFIG
+
+    Returns:
+        tuple[float, float]: Координаты точки ячейки (для схемы 'none' — исходные)
+
+    Raises:
+        ValueError: Если схема квантования неизвестна
+    """
+    config = config or SPATIAL_CONFIG
+    lat, lon = float(lat), float(lon)
+
+    if config.scheme == "none":
+        return lat, lon
+
+    if config.scheme == "grid":
+        return snap_to_grid(lat, lon, config.grid_step)
+
+    if config.scheme == "geohash":
+        center_lat, center_lon = geohash_decode(geohash_encode(lat, lon, config.geohash_precision))
+        return round(center_lat, 6), round(center_lon, 6)
+
+    raise ValueError(f"Неизвестная схема квантования координат: '{config.scheme}'")
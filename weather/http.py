@@ -0,0 +1,93 @@
+"""
+Модуль общей HTTP-сессии с пулом keep-alive соединений.
+Все запросы к Open-Meteo и OpenStreetMap идут через одну сессию,
+поэтому TCP/TLS-соединение с каждым хостом устанавливается один раз
+и переиспользуется в пакетном режиме и долгоживущих процессах.
+
+"""
+
+import threading
+from typing import Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import HTTP_CONFIG, HttpConfig
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def create_session(config: HttpConfig = HTTP_CONFIG) -> requests.Session:
+    """
+    Создает сессию requests с пулом соединений по хостам.
+    
+    Args:
+        config (HttpConfig): Размеры пулов, повторы и таймауты
+        
+    Returns:
+        requests.Session: Новая сессия с настроенными адаптерами
+    """
+    session = requests.Session()
+    
+    # Адаптер держит по пулу на хост (до pool_connections хостов),
+    # в каждом пуле до pool_maxsize открытых соединений
+    adapter = HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        pool_block=config.pool_block,
+        max_retries=config.max_retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Возвращает общую для процесса сессию, создавая ее при первом обращении.
+    
+    Returns:
+        requests.Session: Общая сессия
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session() -> None:
+    """Закрывает общую сессию и все соединения в ее пулах."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def http_get(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None
+) -> requests.Response:
+    """
+    Выполняет GET-запрос через общую сессию.
+    
+    Args:
+        url (str): Адрес запроса
+        params (Dict[str, Any], optional): Параметры строки запроса
+        headers (Dict[str, str], optional): Дополнительные заголовки
+        timeout (float, optional): Таймаут; по умолчанию из HTTP_CONFIG
+        
+    Returns:
+        requests.Response: Ответ сервера
+    """
+    return get_session().get(
+        url,
+        params=params,
+        headers=headers,
+        timeout=timeout if timeout is not None else HTTP_CONFIG.timeout,
+    )
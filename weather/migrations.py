@@ -0,0 +1,284 @@
+# weather/migrations.py
+"""
+Версионированные миграции схемы PostgreSQL.
+
+Каждая миграция — (версия, название, SQL). Примененные версии хранятся
+в таблице schema_migrations; при запуске выполняются только недостающие,
+по возрастанию версии, в одной транзакции под advisory-блокировкой,
+чтобы параллельные процессы не применяли их дважды.
+"""
+
+import logging
+from typing import List, Tuple
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg_advisory_xact_lock для миграций (произвольное постоянное число)
+MIGRATION_LOCK_ID = 724_515_001
+
+SCHEMA_MIGRATIONS_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Новые миграции добавляются только в конец списка, примененные не меняются
+MIGRATIONS: List[Tuple[int, str, str]] = [
+    (1, "Начальная схема: locations и weather_records", """
+    CREATE TABLE IF NOT EXISTS locations (
+        id SERIAL PRIMARY KEY,
+        city_name VARCHAR(100) NOT NULL,
+        latitude DECIMAL(9,6) NOT NULL,
+        longitude DECIMAL(9,6) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS weather_records (
+        id SERIAL PRIMARY KEY,
+        location_id INTEGER REFERENCES locations(id),
+        temperature DECIMAL(5,2) NOT NULL,
+        wind_speed DECIMAL(5,2) NOT NULL,
+        wind_direction INTEGER,
+        weather_time TIMESTAMP NOT NULL,
+        recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_locations_city ON locations(city_name);
+    CREATE INDEX IF NOT EXISTS idx_weather_records_time ON weather_records(weather_time);
+    CREATE INDEX IF NOT EXISTS idx_weather_records_location ON weather_records(location_id);
+    """),
+    (2, "Уникальность locations (city_name, latitude, longitude)", """
+    -- Записи дубликатов переносим на самое раннее местоположение, дубликаты удаляем
+    UPDATE weather_records wr
+    SET location_id = d.keep_id
+    FROM (
+        SELECT id, MIN(id) OVER (PARTITION BY city_name, latitude, longitude) AS keep_id
+        FROM locations
+    ) d
+    WHERE wr.location_id = d.id AND d.id <> d.keep_id;
+
+    DELETE FROM locations l
+    USING locations k
+    WHERE l.city_name = k.city_name
+      AND l.latitude = k.latitude
+      AND l.longitude = k.longitude
+      AND l.id > k.id;
+
+    ALTER TABLE locations
+        ADD CONSTRAINT uq_locations_city_coords UNIQUE (city_name, latitude, longitude);
+
+    -- Уникальный индекс начинается с city_name и заменяет отдельный индекс по городу
+    DROP INDEX IF EXISTS idx_locations_city;
+    """),
+    (3, "Помесячное секционирование weather_records", """
+    -- Создает секцию weather_records_YYYY_MM для месяца метки времени, если ее нет
+    CREATE OR REPLACE FUNCTION ensure_weather_partition(ts TIMESTAMP) RETURNS TEXT AS $$
+    DECLARE
+        month_start TIMESTAMP := date_trunc('month', ts);
+        partition_name TEXT := 'weather_records_' || to_char(month_start, 'YYYY_MM');
+    BEGIN
+        IF to_regclass(partition_name) IS NULL THEN
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF weather_records FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_start + INTERVAL '1 month'
+                );
+            EXCEPTION WHEN duplicate_table THEN
+                -- Секцию параллельно создал другой процесс
+                NULL;
+            END;
+        END IF;
+        RETURN partition_name;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    -- Старую таблицу переименовываем, последовательность id оставляем новой таблице
+    ALTER TABLE weather_records RENAME TO weather_records_legacy;
+    ALTER SEQUENCE weather_records_id_seq OWNED BY NONE;
+    DROP INDEX IF EXISTS idx_weather_records_time;
+    DROP INDEX IF EXISTS idx_weather_records_location;
+
+    CREATE TABLE weather_records (
+        id INTEGER NOT NULL DEFAULT nextval('weather_records_id_seq'),
+        location_id INTEGER REFERENCES locations(id),
+        temperature DECIMAL(5,2) NOT NULL,
+        wind_speed DECIMAL(5,2) NOT NULL,
+        wind_direction INTEGER,
+        weather_time TIMESTAMP NOT NULL,
+        recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, weather_time)
+    ) PARTITION BY RANGE (weather_time);
+
+    ALTER SEQUENCE weather_records_id_seq OWNED BY weather_records.id;
+
+    -- Индексы секционированной таблицы создаются и во всех ее секциях
+    CREATE INDEX idx_weather_records_time ON weather_records(weather_time);
+    CREATE INDEX idx_weather_records_location ON weather_records(location_id);
+
+    SELECT ensure_weather_partition(month)
+    FROM (
+        SELECT DISTINCT date_trunc('month', weather_time) AS month FROM weather_records_legacy
+        UNION
+        SELECT date_trunc('month', CURRENT_TIMESTAMP)::TIMESTAMP
+    ) months;
+
+    INSERT INTO weather_records
+        (id, location_id, temperature, wind_speed, wind_direction, weather_time, recorded_at)
+    SELECT id, location_id, temperature, wind_speed, wind_direction, weather_time, recorded_at
+    FROM weather_records_legacy;
+
+    DROP TABLE weather_records_legacy;
+    """),
+    (4, "Дневные агрегаты weather_daily_rollups", """
+    CREATE TABLE IF NOT EXISTS weather_daily_rollups (
+        location_id INTEGER NOT NULL REFERENCES locations(id),
+        day DATE NOT NULL,
+        records_count INTEGER NOT NULL,
+        temp_sum DECIMAL(14,2) NOT NULL,
+        temp_min DECIMAL(5,2) NOT NULL,
+        temp_max DECIMAL(5,2) NOT NULL,
+        wind_sum DECIMAL(14,2) NOT NULL,
+        wind_min DECIMAL(5,2) NOT NULL,
+        wind_max DECIMAL(5,2) NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (location_id, day)
+    );
+
+    INSERT INTO weather_daily_rollups
+        (location_id, day, records_count, temp_sum, temp_min, temp_max, wind_sum, wind_min, wind_max)
+    SELECT location_id, weather_time::DATE, COUNT(*),
+           SUM(temperature), MIN(temperature), MAX(temperature),
+           SUM(wind_speed), MIN(wind_speed), MAX(wind_speed)
+    FROM weather_records
+    WHERE location_id IS NOT NULL
+    GROUP BY location_id, weather_time::DATE
+    ON CONFLICT (location_id, day) DO NOTHING;
+    """),
+    (5, "Покрывающий индекс истории (location_id, weather_time DESC)", """
+    -- Последние записи местоположения читаются только из индекса (index-only scan)
+    CREATE INDEX IF NOT EXISTS idx_weather_records_location_time
+        ON weather_records (location_id, weather_time DESC)
+        INCLUDE (temperature, wind_speed, wind_direction, recorded_at);
+
+    -- Ведущий столбец нового индекса заменяет отдельный индекс по location_id
+    DROP INDEX IF EXISTS idx_weather_records_location;
+    """),
+    (6, "Одна запись на (location_id, weather_time)", """
+    -- Из повторов оставляем последнюю сохраненную запись
+    DELETE FROM weather_records wr
+    USING weather_records d
+    WHERE wr.location_id = d.location_id
+      AND wr.weather_time = d.weather_time
+      AND wr.id < d.id;
+
+    -- Покрывающий индекс истории становится уникальным: один индекс вместо двух
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_weather_records_location_time
+        ON weather_records (location_id, weather_time DESC)
+        INCLUDE (temperature, wind_speed, wind_direction, recorded_at);
+    DROP INDEX IF EXISTS idx_weather_records_location_time;
+
+    -- Агрегаты, посчитанные с учетом повторов, пересчитываем
+    DELETE FROM weather_daily_rollups;
+    INSERT INTO weather_daily_rollups
+        (location_id, day, records_count, temp_sum, temp_min, temp_max, wind_sum, wind_min, wind_max)
+    SELECT location_id, weather_time::DATE, COUNT(*),
+           SUM(temperature), MIN(temperature), MAX(temperature),
+           SUM(wind_speed), MIN(wind_speed), MAX(wind_speed)
+    FROM weather_records
+    WHERE location_id IS NOT NULL
+    GROUP BY location_id, weather_time::DATE;
+    """),
+    (7, "Прогнозы weather_forecasts на массивах REAL[]", """
+    -- Один прогноз на (location_id, hourly_start): каждая переменная — массив,
+    -- время i-го элемента — hourly_start + i * step_minutes
+    CREATE TABLE IF NOT EXISTS weather_forecasts (
+        location_id INTEGER NOT NULL REFERENCES locations(id),
+        hourly_start TIMESTAMP NOT NULL,
+        step_minutes SMALLINT NOT NULL,
+        utc_offset_seconds INTEGER NOT NULL DEFAULT 0,
+        temperature REAL[] NOT NULL,
+        precipitation REAL[] NOT NULL,
+        wind_speed REAL[] NOT NULL,
+        wind_direction REAL[] NOT NULL,
+        daily_start DATE,
+        temp_max REAL[],
+        temp_min REAL[],
+        precipitation_sum REAL[],
+        wind_max REAL[],
+        fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (location_id, hourly_start)
+    );
+    """),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
+    """
+    Возвращает последнюю примененную версию схемы одним запросом.
+
+    Returns:
+        int: Версия схемы; 0, если миграции еще не применялись
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT MAX(version) AS version FROM schema_migrations")
+            row = cursor.fetchone()
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        return 0
+
+    return (row and row["version"]) or 0
+
+
+def apply_migrations(conn, migrations: List[Tuple[int, str, str]] = MIGRATIONS) -> List[int]:
+    """
+    Применяет недостающие миграции в одной транзакции.
+
+    Args:
+        conn: Соединение psycopg2 (курсор должен возвращать словари)
+        migrations: Список миграций (версия, название, SQL)
+
+    Returns:
+        List[int]: Версии, примененные этим вызовом
+    """
+    applied_now = []
+    with conn.cursor() as cursor:
+        # Блокировка снимается автоматически в конце транзакции
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+        cursor.execute(SCHEMA_MIGRATIONS_SQL)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row["version"] for row in cursor.fetchall()}
+
+        for version, name, sql in sorted(migrations, key=lambda m: m[0]):
+            if version in applied:
+                continue
+            logger.info(f"Применяется миграция {version}: {name}")
+            cursor.execute(sql)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name)
+            )
+            applied_now.append(version)
+
+    conn.commit()
+    return applied_now
+
+
+def migrate(conn, migrations: List[Tuple[int, str, str]] = MIGRATIONS) -> List[int]:
+    """
+    Приводит схему к последней версии. Если она уже актуальна,
+    выполняется только проверка версии — без DDL и блокировок каталога.
+
+    Returns:
+        List[int]: Версии, примененные этим вызовом
+    """
+    latest = max((m[0] for m in migrations), default=0)
+    if get_schema_version(conn) >= latest:
+        return []
+    return apply_migrations(conn, migrations)
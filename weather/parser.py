@@ -5,6 +5,9 @@
 
 import argparse
 
+from .config import HTTP_CONFIG
+from .forecast import FORECAST_DAYS, FORECAST_HOURS
+
 def create_parser() -> argparse.ArgumentParser:
     """
     Создаёт и возвращает объект парсера аргументов командной строки.
@@ -25,6 +28,46 @@ def create_parser() -> argparse.ArgumentParser:
     
     parser.add_argument("--history", action="store_true", help="Показать историю запросов для города")
     
-    parser.add_argument("--stats", action="store_true", help="Показать статистику погоды за последние 7 дней")
+    parser.add_argument("--stats", action="store_true", help="Показать статистику погоды за последние --days дней")
+    
+    parser.add_argument("--days", type=int, default=7, help="Период статистики в днях")
+    
+    parser.add_argument("--compare", type=str, nargs="+", metavar="CITY", help="Сравнить со статистикой других городов (с --stats, нужен numpy)")
+    
+    parser.add_argument("--percentiles", type=str, metavar="Q", help="Перцентили температуры через запятую, например 10,50,90 (с --stats)")
+    
+    parser.add_argument("--base-temp", type=float, metavar="C", help="Базовая температура градусо-дней отопления/охлаждения (с --stats)")
+    
+    parser.add_argument("--rolling", type=int, metavar="DAYS", help="Окно скользящего среднего дневной температуры (с --stats)")
+    
+    parser.add_argument("--batch", type=str, nargs="+", metavar="ITEM", help="Несколько городов или пар координат 'lat,lon' для пакетного запроса")
+    
+    parser.add_argument("--batch-file", type=str, metavar="FILE", help="Файл со списком городов/координат (по одному на строку), '-' для stdin")
+    
+    parser.add_argument("--workers", type=int, default=8, help="Число параллельных запросов в пакетном режиме")
+    
+    parser.add_argument("--per-request", type=int, metavar="N", help=f"Координат в одном запросе погоды в пакетном режиме (по умолчанию {HTTP_CONFIG.batch_locations}, 1 — запрос на каждый город; не сочетается с --async)")
+    
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Использовать asyncio-движок в пакетном режиме (нужен aiohttp)")
+    
+    parser.add_argument("--allow-stale", action="store_true", help="Сразу показать устаревшие данные из кэша и обновить их в фоне")
+    
+    parser.add_argument("--compact-cache", action="store_true", help="Удалить устаревшие записи кэша и применить лимиты размера")
+    
+    parser.add_argument("--write-behind", action="store_true", help="Сохранять в БД в фоне, не задерживая вывод погоды (то же, что DB_WRITE_BEHIND=1)")
+    
+    parser.add_argument("--forecast", type=int, nargs="?", const=FORECAST_DAYS, default=None, metavar="DAYS", help=f"Почасовой и дневной прогноз на DAYS дней одним запросом (по умолчанию {FORECAST_DAYS}, нужен numpy)")
+    
+    parser.add_argument("--hours", type=int, default=FORECAST_HOURS, help="Окно ближайших часов в сводке прогноза")
+    
+    parser.add_argument("--prune-history", action="store_true", help="Удалить из БД месячные секции истории старше DB_RETENTION_MONTHS")
+    
+    parser.add_argument("--refresh-rollups", type=int, nargs="?", const=0, default=None, metavar="DAYS", help="Пересчитать дневные агрегаты статистики (за последние DAYS дней, без значения — за всю историю)")
+    
+    parser.add_argument("--export", type=str, metavar="PATH", help="Выгрузить всю историю из БД (города или всех городов) в файл, '-' для stdout; для parquet/arrow — в каталог")
+    
+    parser.add_argument("--export-format", choices=["csv", "ndjson", "parquet", "arrow"], default=None, help="Формат выгрузки и загрузки (по умолчанию по расширению, иначе csv; для загрузки — parquet)")
+    
+    parser.add_argument("--import-history", type=str, metavar="DIR", help="Загрузить в БД историю из каталога Parquet/Arrow, созданного --export (нужен pyarrow)")
     
     return parser
@@ -0,0 +1,224 @@
+# weather/writebehind.py
+"""
+Отложенная запись показаний в БД (write-behind).
+
+Показания кладутся в очередь в памяти, фоновый поток пишет их в PostgreSQL
+пакетами (WeatherDatabase.write_weather_batch), поэтому вывод погоды
+пользователю не ждет БД. Если БД недоступна, пакеты дописываются
+в ограниченный по размеру файл (JSONL) и досылаются после следующей
+успешной записи. При выходе из процесса очередь сбрасывается.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import WRITE_BEHIND_CONFIG, WriteBehindConfig
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # сигнал остановки фонового потока
+
+
+class WriteBehindQueue:
+    """Очередь показаний с фоновой пакетной записью в БД и резервным файлом."""
+
+    def __init__(self, database, config: Optional[WriteBehindConfig] = None):
+        """
+        Args:
+            database: Объект с методами init_db() и write_weather_batch(payloads)
+            config: Настройки очереди; по умолчанию WRITE_BEHIND_CONFIG
+        """
+        self.database = database
+        self.config = config or WRITE_BEHIND_CONFIG
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, self.config.max_queue))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._current: Optional[List[Dict[str, Any]]] = None  # пакет, который поток пишет сейчас
+
+    def start(self) -> None:
+        """Запускает фоновый поток записи (повторный вызов ничего не делает)."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="weather-write-behind", daemon=True)
+            self._thread.start()
+
+    def put(self, payload: Dict[str, Any]) -> None:
+        """
+        Ставит показание в очередь без ожидания БД.
+        Если очередь переполнена, показание сразу уходит в резервный файл.
+        """
+        self.start()
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            self._spool([payload])
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Ждет, пока все поставленные показания будут записаны (или отложены в файл).
+
+        Returns:
+            bool: True, если очередь опустела до истечения timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Дописывает очередь и останавливает поток. Показания, которые не успели
+        записаться за timeout, сохраняются в резервный файл.
+        """
+        timeout = self.config.exit_timeout if timeout is None else timeout
+        if self._thread is None:
+            return
+
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=max(0.0, timeout))
+        except queue.Full:
+            pass
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+
+        # Не дождались БД — оставшееся откладываем в файл
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if item is not _STOP:
+                leftover.append(item)
+        if self._thread.is_alive():
+            # Поток завис на БД с текущим пакетом: при выходе процесса он будет
+            # убит, поэтому пакет тоже откладываем (повторная запись — upsert, безопасна)
+            current = self._current
+            if current:
+                leftover = current + leftover
+            # Поток завершится, когда БД ответит на текущий пакет
+            self._queue.put_nowait(_STOP)
+        if leftover:
+            self._spool(leftover)
+        self._thread = None
+
+    def _run(self) -> None:
+        """Фоновый поток: собирает пакеты из очереди и пишет их в БД."""
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.config.flush_interval
+            while len(batch) < self.config.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._current = batch
+            try:
+                self._write(batch)
+            finally:
+                self._current = None
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Пишет пакет в БД; при ошибке откладывает его в файл."""
+        try:
+            self.database.init_db()
+            self.database.write_weather_batch(batch)
+        except Exception as e:
+            logger.warning(f"БД недоступна, показаний отложено в файл: {len(batch)} ({e})")
+            self._spool(batch)
+            return
+
+        # БД снова доступна — досылаем отложенное ранее
+        self._replay_spool()
+
+    def _spool(self, payloads: List[Dict[str, Any]]) -> None:
+        """Дописывает показания в резервный файл, не превышая spool_max_bytes."""
+        lines = "".join(json.dumps(payload, ensure_ascii=False) + "\n" for payload in payloads)
+        path = self.config.spool_file
+        with self._spool_lock:
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size + len(lines.encode("utf-8")) > self.config.spool_max_bytes:
+                logger.error(f"Резервный файл {path} переполнен, потеряно показаний: {len(payloads)}")
+                return
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def _replay_spool(self) -> None:
+        """Досылает показания из резервного файла; при ошибке возвращает их обратно."""
+        path = self.config.spool_file
+        claimed = f"{path}.{os.getpid()}.replay"
+        with self._spool_lock:
+            try:
+                # Переименование забирает файл целиком: другой процесс его не повторит
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                return
+
+        payloads = []
+        with open(claimed, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    payloads.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+        try:
+            self.database.write_weather_batch(payloads)
+            logger.info(f"Досланы отложенные показания: {len(payloads)}")
+        except Exception as e:
+            logger.warning(f"Не удалось дослать отложенные показания: {e}")
+            self._spool(payloads)
+        finally:
+            os.remove(claimed)
+
+
+_write_behind: Optional[WriteBehindQueue] = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind(database=None) -> WriteBehindQueue:
+    """
+    Возвращает общую очередь отложенной записи процесса.
+    Очередь сбрасывается в БД (или в резервный файл) при выходе.
+
+    Args:
+        database: БД для записи; по умолчанию глобальный weather.database.db
+    """
+    global _write_behind
+    with _write_behind_lock:
+        if _write_behind is None:
+            if database is None:
+                from .database import db as database
+            _write_behind = WriteBehindQueue(database)
+            atexit.register(_write_behind.close)
+        return _write_behind
@@ -10,33 +10,18 @@ CREATE USER weather_user WITH PASSWORD 'weather_pass';
 -- Даем права пользователю
 GRANT ALL PRIVILEGES ON DATABASE weather_db TO weather_user;
 
--- Создаем таблицы
-CREATE TABLE IF NOT EXISTS locations (
-    id SERIAL PRIMARY KEY,
-    city_name VARCHAR(100) NOT NULL,
-    latitude DECIMAL(9,6) NOT NULL,
-    longitude DECIMAL(9,6) NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-
-CREATE TABLE IF NOT EXISTS weather_records (
-    id SERIAL PRIMARY KEY,
-    location_id INTEGER REFERENCES locations(id),
-    temperature DECIMAL(5,2) NOT NULL,
-    wind_speed DECIMAL(5,2) NOT NULL,
-    wind_direction INTEGER,
-    weather_time TIMESTAMP NOT NULL,
-    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-
--- Создаем индексы
-CREATE INDEX IF NOT EXISTS idx_locations_city ON locations(city_name);
-CREATE INDEX IF NOT EXISTS idx_weather_records_time ON weather_records(weather_time);
-CREATE INDEX IF NOT EXISTS idx_weather_records_location ON weather_records(location_id);
+-- Таблицы и индексы создаются версионированными миграциями приложения
+-- (weather/migrations.py) при первом запуске; примененные версии хранятся в schema_migrations
 
 -- Даем права на схему и последовательности
 GRANT ALL ON SCHEMA public TO weather_user;
 GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA public TO weather_user;
 
 -- Даем права на таблицы
-GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO weather_user;
\ No newline at end of file
+GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO weather_user;
+
+-- Обновление баз, созданных прежней версией этого скрипта: таблицы создавал
+-- суперпользователь, а миграциям приложения нужно быть их владельцем
+-- (вместе с таблицей переходят ее индексы и последовательности)
+ALTER TABLE IF EXISTS locations OWNER TO weather_user;
+ALTER TABLE IF EXISTS weather_records OWNER TO weather_user;